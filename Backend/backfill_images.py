@@ -0,0 +1,142 @@
+"""
+Image backfill script
+Run this to render responsive variants and layout metadata (size,
+dominant color, blurhash) for posts created before they existed, and
+variants for drafts. Safe to re-run: finished variants are skipped on
+disk and rows that already have them are not selected.
+"""
+import argparse
+import asyncio
+from sqlalchemy import inspect, or_, select, text, update
+from core.database import engine, async_engine, AsyncSessionLocal
+from models.user import User
+from models.post import Post
+from models.draft import Draft
+from services.image_variants import image_variants
+
+# Columns added to posts after the table was first created
+IMAGE_COLUMNS = {
+    "image_variants": "JSON",
+    "width": "INTEGER",
+    "height": "INTEGER",
+    "aspect_ratio": "FLOAT",
+    "dominant_color": "VARCHAR(7)",
+    "blurhash": "VARCHAR",
+}
+# Columns added to drafts after the table was first created
+DRAFT_IMAGE_COLUMNS = {"image_variants": "JSON"}
+
+
+def ensure_columns():
+    """Add image columns to tables created before they existed"""
+    for table, columns in (("posts", IMAGE_COLUMNS), ("drafts", DRAFT_IMAGE_COLUMNS)):
+        existing = {c["name"] for c in inspect(engine).get_columns(table)}
+        with engine.begin() as conn:
+            for name, column_type in columns.items():
+                if name not in existing:
+                    conn.execute(
+                        text(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+                    )
+                    print(f"✓ Added {table}.{name}")
+
+
+async def process(
+    post_id: str, image_url: str, need_variants: bool, need_layout: bool
+):
+    """Column values to set on one post, empty if its image is not local"""
+    values = {}
+    if need_variants:
+        variants = await image_variants.try_generate(image_url)
+        if variants is not None:
+            values["image_variants"] = variants
+    if need_layout:
+        values.update(await image_variants.try_analyze(image_url) or {})
+    return post_id, values
+
+
+async def backfill(batch_size: int):
+    """Fill image columns for every post missing them, one batch at a time"""
+    image_variants.start()
+    last_id = ""
+    updated = skipped = 0
+    try:
+        async with AsyncSessionLocal() as db:
+            while True:
+                result = await db.execute(
+                    select(
+                        Post.id,
+                        Post.image_url,
+                        Post.image_variants.is_(None),
+                        Post.blurhash.is_(None),
+                    )
+                    .where(
+                        or_(Post.image_variants.is_(None), Post.blurhash.is_(None)),
+                        Post.id > last_id,
+                    )
+                    .order_by(Post.id)
+                    .limit(batch_size)
+                )
+                batch = result.all()
+                if not batch:
+                    break
+                last_id = batch[-1][0]
+
+                # The whole batch is processed in parallel across the process pool
+                results = await asyncio.gather(*(process(*row) for row in batch))
+                for post_id, values in results:
+                    if not values:
+                        skipped += 1
+                        continue
+                    await db.execute(
+                        update(Post).where(Post.id == post_id).values(**values)
+                    )
+                    updated += 1
+                await db.commit()
+                print(f"  {updated} posts updated, {skipped} skipped")
+        await backfill_drafts(batch_size)
+    finally:
+        await image_variants.stop()
+        await async_engine.dispose()
+    print("✓ Images backfilled!")
+
+
+async def backfill_drafts(batch_size: int):
+    """Render variants for every draft missing them, one batch at a time"""
+    last_id = ""
+    updated = skipped = 0
+    async with AsyncSessionLocal() as db:
+        while True:
+            result = await db.execute(
+                select(Draft.id, Draft.image_url)
+                .where(Draft.image_variants.is_(None), Draft.id > last_id)
+                .order_by(Draft.id)
+                .limit(batch_size)
+            )
+            batch = result.all()
+            if not batch:
+                break
+            last_id = batch[-1][0]
+
+            results = await asyncio.gather(
+                *(image_variants.try_generate(image_url) for _, image_url in batch)
+            )
+            for (draft_id, _), variants in zip(batch, results):
+                if variants is None:
+                    skipped += 1
+                    continue
+                await db.execute(
+                    update(Draft)
+                    .where(Draft.id == draft_id)
+                    .values(image_variants=variants)
+                )
+                updated += 1
+            await db.commit()
+            print(f"  {updated} drafts updated, {skipped} skipped")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+    ensure_columns()
+    asyncio.run(backfill(args.batch_size))
@@ -0,0 +1,134 @@
+"""
+Shared setup for the benchmarks
+
+Importing this fills in the settings the app needs before any app module
+is imported. Without DATABASE_URL the benchmarks run on a throwaway
+SQLite file; point DATABASE_URL at a scratch Postgres database for
+numbers that mean something in production. Tables are created if missing
+and seeded rows are removed again by clear().
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+if "DATABASE_URL" not in os.environ:
+    _tmp = tempfile.mkdtemp(prefix="thread-ai-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/bench.db"
+    os.environ.setdefault("UPLOAD_DIR", os.path.join(_tmp, "uploads"))
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+os.environ.setdefault("GOOGLE_CLIENT_ID", "bench-client-id")
+os.environ.setdefault("GOOGLE_CLIENT_SECRET", "bench-client-secret")
+
+from sqlalchemy import insert  # noqa: E402
+from core.database import engine  # noqa: E402
+import init_db  # noqa: E402  also registers every model with Base.metadata
+from models.post import Post  # noqa: E402
+from models.user import User  # noqa: E402
+
+TAGS = ["street", "minimal", "vintage", "formal", "summer", "denim", "boho", "y2k"]
+WORDS = [
+    "linen", "oversized", "blazer", "pleated", "skirt", "leather", "boots",
+    "cropped", "cardigan", "wide", "leg", "trousers", "silk", "slip", "dress",
+    "chunky", "knit", "sweater", "tailored", "coat", "denim", "jacket",
+]
+
+
+def _vocabulary(size: int = 5000) -> list:
+    """WORDS plus pronounceable made-up words, so text is not 22 words"""
+    rng = random.Random(7)
+    consonants, vowels = "bcdfghklmnprstvz", "aeiou"
+    words = set(WORDS)
+    while len(words) < size:
+        length = rng.randint(2, 4)
+        words.add(
+            "".join(rng.choice(consonants) + rng.choice(vowels) for _ in range(length))
+        )
+    return sorted(words)
+
+
+VOCABULARY = _vocabulary()
+
+
+def text(rng: random.Random, words: int) -> str:
+    """Words drawn with a long tail, like real titles and descriptions"""
+    return " ".join(
+        VOCABULARY[min(int(rng.paretovariate(1.2)) - 1, len(VOCABULARY) - 1)]
+        if rng.random() < 0.5
+        else rng.choice(VOCABULARY)
+        for _ in range(words)
+    )
+
+
+def seed(posts: int, users: int = 100, chunk: int = 10000) -> None:
+    """Insert users and posts with titles, tags and spread-out timestamps"""
+    init_db.init_database()
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(
+            insert(User.__table__),
+            [
+                {
+                    "id": f"bench-u{i}",
+                    "email": f"bench{i}@example.com",
+                    "name": f"{WORDS[i % len(WORDS)].title()} Creator {i}",
+                    "username": f"creator{i}",
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for i in range(users)
+            ],
+        )
+    started = time.perf_counter()
+    for offset in range(0, posts, chunk):
+        rows = []
+        for i in range(offset, min(offset + chunk, posts)):
+            created_at = now - timedelta(seconds=i * 7)
+            rows.append(
+                {
+                    "id": f"bench-p{i:07d}",
+                    "user_id": f"bench-u{i % users}",
+                    "image_url": f"/uploads/bench-{i}.jpg",
+                    "image_variants": {
+                        fmt: [
+                            {"width": w, "url": f"/uploads/bench-{i}.w{w}.{fmt}"}
+                            for w in (1080, 640, 320)
+                        ]
+                        for fmt in ("webp", "jpeg")
+                    },
+                    "width": 1080,
+                    "height": 1350,
+                    "aspect_ratio": 0.8,
+                    "dominant_color": "#a0785a",
+                    "blurhash": "LEHV6nWB2yk8pyo0adR*.7kCMdnj",
+                    "title": text(rng, 3),
+                    "description": text(rng, 12),
+                    "tags": [TAGS[i % len(TAGS)], TAGS[(i // 3) % len(TAGS)]],
+                    "likes": (i * 37) % 500,
+                    "saves": (i * 11) % 80,
+                    "is_ai_generated": i % 4 == 0,
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                }
+            )
+        with engine.begin() as conn:
+            conn.execute(insert(Post.__table__), rows)
+    print(f"seeded {posts} posts in {time.perf_counter() - started:.1f}s")
+
+
+def clear() -> None:
+    """Remove the seeded rows"""
+    with engine.begin() as conn:
+        conn.execute(Post.__table__.delete().where(Post.id.like("bench-p%")))
+        conn.execute(User.__table__.delete().where(User.id.like("bench-u%")))
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
@@ -0,0 +1,124 @@
+"""
+Concurrent throughput of a feed page query, sync vs async sessions
+
+    python benchmarks/db_concurrency.py [--posts N] [--concurrency C] [--requests R]
+
+'sync' runs the query through SessionLocal inside a coroutine, the way
+every route ran before the async engine; 'async' runs it through
+AsyncSessionLocal. A heartbeat task sleeping 1 ms measures how long the
+event loop is stalled, which is what /health and every other request in
+flight wait out while a blocking query holds the loop.
+
+Run it against Postgres for production numbers. On SQLite (20000 posts,
+1000 requests) async trails sync on both req/s and p95:
+
+    -c 20   sync:  743 req/s  p95  1.66 ms  loop stall max 1345 ms
+           async:  415 req/s  p95 75.61 ms  loop stall max   17 ms
+    -c 1    sync:  695 req/s  p95  1.68 ms  loop stall max 1437 ms
+           async:  387 req/s  p95  3.17 ms  loop stall max   10 ms
+
+The req/s gap is per-query overhead, not concurrency: it is the same at
+-c 1. aiosqlite runs every DB-API call on the connection's own thread
+and wakes the loop with the result, and one page query makes 10 such
+hops (pre-ping, execute, fetches, rollback on checkin), about 1 ms more
+than the same query run inline. SQLite serializes the queries anyway,
+so 20 in flight cannot overlap to win that back.
+
+The p95 gap is mostly how it is measured. A sync request never yields,
+so the 20 workers run one query at a time and each latency covers just
+its own query; the time spent queued behind the others shows up as the
+loop stall instead, which is what any other request would have waited.
+Async requests interleave, so each latency includes the queries of the
+others in flight: about 20 x 3.2 ms at -c 20, against 3.2 ms at -c 1.
+On Postgres, where queries run in parallel on the server and asyncpg
+does not hop threads, neither cost applies.
+"""
+import argparse
+import asyncio
+import time
+import common
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+from core.database import AsyncSessionLocal, SessionLocal, async_engine
+from models.post import Post
+
+QUERY = (
+    select(Post)
+    .options(joinedload(Post.user))
+    .order_by(Post.created_at.desc(), Post.id.desc())
+    .limit(20)
+)
+
+
+async def sync_request() -> None:
+    db = SessionLocal()
+    try:
+        db.execute(QUERY).scalars().all()
+    finally:
+        db.close()
+
+
+async def async_request() -> None:
+    async with AsyncSessionLocal() as db:
+        (await db.execute(QUERY)).scalars().all()
+
+
+async def heartbeat(stop: asyncio.Event, stalls: list) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.001)
+        stalls.append(time.perf_counter() - started - 0.001)
+
+
+async def measure(request, concurrency: int, requests: int) -> dict:
+    remaining = iter(range(requests))
+    latencies = []
+
+    async def worker():
+        for _ in remaining:
+            started = time.perf_counter()
+            await request()
+            latencies.append(time.perf_counter() - started)
+
+    stop = asyncio.Event()
+    stalls = []
+    beat = asyncio.create_task(heartbeat(stop, stalls))
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await beat
+    return {
+        "rps": requests / elapsed,
+        "p95_ms": common.percentile(latencies, 95) * 1e3,
+        "max_stall_ms": max(stalls, default=0.0) * 1e3,
+        "p95_stall_ms": common.percentile(stalls or [0.0], 95) * 1e3,
+    }
+
+
+async def main(args) -> None:
+    try:
+        for name, request in (("sync", sync_request), ("async", async_request)):
+            await request()  # warm the pool
+            result = await measure(request, args.concurrency, args.requests)
+            print(
+                f"{name:>5}: {result['rps']:8.0f} req/s  "
+                f"p95 {result['p95_ms']:7.2f} ms  "
+                f"loop stall p95 {result['p95_stall_ms']:7.2f} ms, "
+                f"max {result['max_stall_ms']:7.2f} ms"
+            )
+    finally:
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--posts", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    common.seed(args.posts)
+    try:
+        asyncio.run(main(args))
+    finally:
+        common.clear()
@@ -0,0 +1,93 @@
+"""
+Cost of validating an image header vs decoding its pixels
+
+    python benchmarks/image_validation.py [--corpus DIR] [--runs N]
+
+Times inspect_image on JPEG, PNG and WebP files of growing pixel counts
+next to a full Pillow decode of the same bytes. Without --corpus a
+synthetic corpus of noise images is generated. Header validation should
+stay flat as the pixel count grows, and a decompression bomb should be
+rejected in about the same time as a small image is accepted.
+"""
+import argparse
+import io
+import os
+import time
+from pathlib import Path
+
+# Large noise images would trip the production upload limit
+os.environ.setdefault("MAX_FILE_SIZE", str(512 * 1024 * 1024))
+
+import common  # noqa: E402,F401
+from PIL import Image  # noqa: E402
+from services.image_validation import inspect_image  # noqa: E402
+
+SIDES = (256, 1024, 2048, 4000)
+FORMATS = ("JPEG", "PNG", "WEBP")
+
+
+def encode(image: Image.Image, fmt: str) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, fmt)
+    return buffer.getvalue()
+
+
+def synthetic_corpus():
+    for side in SIDES:
+        image = Image.effect_noise((side, side), 64).convert("RGB")
+        for fmt in FORMATS:
+            yield f"{fmt.lower()} {side}x{side}", encode(image, fmt)
+
+
+def directory_corpus(path: str):
+    for file in sorted(Path(path).iterdir()):
+        if file.is_file():
+            yield file.name, file.read_bytes()
+
+
+def best_of(runs: int, fn) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def full_decode(data: bytes) -> None:
+    with Image.open(io.BytesIO(data)) as image:
+        image.load()
+
+
+def main(args) -> None:
+    corpus = directory_corpus(args.corpus) if args.corpus else synthetic_corpus()
+    print(f"{'image':<22}{'bytes':>11}{'pixels':>12}{'header':>12}{'decode':>12}")
+    for name, data in corpus:
+        try:
+            metadata = inspect_image(data)
+        except ValueError as e:
+            print(f"{name:<22}{len(data):>11}  rejected: {e}")
+            continue
+        header = best_of(args.runs, lambda: inspect_image(data))
+        decode = best_of(max(1, args.runs // 10), lambda: full_decode(data))
+        print(
+            f"{name:<22}{len(data):>11}{metadata.width * metadata.height:>12}"
+            f"{header * 1e6:>10.0f}us{decode * 1e3:>10.1f}ms"
+        )
+
+    # 400 megapixels of a single colour compress to a few hundred KB
+    bomb = encode(Image.new("1", (20000, 20000)), "PNG")
+    started = time.perf_counter()
+    try:
+        inspect_image(bomb)
+        print("decompression bomb was accepted")
+    except ValueError as e:
+        elapsed = time.perf_counter() - started
+        print(f"bomb {len(bomb)} bytes rejected in {elapsed * 1e3:.2f} ms: {e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--corpus", help="directory of images to validate")
+    parser.add_argument("--runs", type=int, default=50)
+    main(parser.parse_args())
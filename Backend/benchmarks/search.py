@@ -0,0 +1,72 @@
+"""
+Keystroke latency of GET /api/search on a seeded corpus
+
+    python benchmarks/search.py [--posts N] [--target-ms MS]
+
+Seeds N posts (default 1,000,000) and types a set of queries one
+character at a time, calling SearchService.search for every prefix the
+way the header search bar does. Reports p50/p95/max per keystroke and
+exits non-zero when p95 is over the target (default 50 ms).
+
+Point DATABASE_URL at Postgres to measure the production path (the
+search_vector column, GIN and trigram indexes; init_db creates them).
+On SQLite the in-process index is measured instead; its one-off build
+is reported separately.
+"""
+import argparse
+import asyncio
+import sys
+import time
+import common
+from core.database import AsyncSessionLocal, async_engine
+from services.search_service import SearchService
+
+LIMIT = 10
+
+
+def typed_queries(count: int = 40) -> list:
+    """Every prefix of phrases built from common and rare corpus words"""
+    words = common.WORDS + common.VOCABULARY[:: max(1, len(common.VOCABULARY) // 40)]
+    phrases = [f"{words[i]} {words[(i * 7 + 3) % len(words)]}" for i in range(count)]
+    phrases += ["creator 1", "zoe", "street", "y2k"]
+    return [phrase[:n] for phrase in phrases for n in range(1, len(phrase) + 1)]
+
+
+async def main(args) -> float:
+    queries = typed_queries()
+    try:
+        async with AsyncSessionLocal() as db:
+            started = time.perf_counter()
+            await SearchService.search(db, "warm up", LIMIT)
+            print(f"first search (index build, tag histogram): "
+                  f"{(time.perf_counter() - started) * 1e3:.0f} ms")
+
+        latencies = []
+        for query in queries:
+            async with AsyncSessionLocal() as db:
+                started = time.perf_counter()
+                await SearchService.search(db, query, LIMIT)
+                latencies.append(time.perf_counter() - started)
+    finally:
+        await async_engine.dispose()
+
+    p95 = common.percentile(latencies, 95) * 1e3
+    print(
+        f"{len(queries)} keystrokes: p50 {common.percentile(latencies, 50) * 1e3:.1f} ms"
+        f"  p95 {p95:.1f} ms  max {max(latencies) * 1e3:.1f} ms"
+        f"  (target p95 {args.target_ms:.0f} ms)"
+    )
+    return p95
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--posts", type=int, default=1_000_000)
+    parser.add_argument("--target-ms", type=float, default=50.0)
+    args = parser.parse_args()
+    common.seed(args.posts)
+    try:
+        p95 = asyncio.run(main(args))
+    finally:
+        common.clear()
+    sys.exit(0 if p95 <= args.target_ms else 1)
@@ -0,0 +1,102 @@
+"""
+Serialization time of one 100-post feed page, before and after RowEncoder
+
+    python benchmarks/serialize_page.py [--runs N]
+
+'before' is what FastAPI did for response_model=PostListResponse:
+validate the page model against the response field, jsonable_encoder,
+then stdlib json in JSONResponse. 'after' is RowEncoder straight from
+the ORM rows to orjson bytes. Both are timed on the same loaded rows and
+the script fails if their bytes differ. Cache hits are timed too: before,
+a cached page was validated from JSON and rendered again; now the cached
+bytes are the body.
+"""
+import argparse
+import asyncio
+import time
+import common
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from core.database import AsyncSessionLocal, async_engine
+from core.serialization import RowEncoder
+from schemas.post import PostListResponse
+from services.post_service import PostService
+
+PAGE_SIZE = 100
+
+
+async def load_page():
+    try:
+        async with AsyncSessionLocal() as db:
+            return await PostService.get_all(db, limit=PAGE_SIZE)
+    finally:
+        await async_engine.dispose()
+
+
+def best_of(runs: int, fn) -> float:
+    fn()
+    best = float("inf")
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(args) -> None:
+    posts, total, next_cursor = asyncio.run(load_page())
+    page = {
+        "items": posts,
+        "page": 1,
+        "page_size": PAGE_SIZE,
+        "total": total,
+        "has_more": next_cursor is not None,
+        "next_cursor": next_cursor,
+    }
+    field = create_response_field(name="Response", type_=PostListResponse)
+    encoder = RowEncoder(PostListResponse)
+    loop = asyncio.new_event_loop()
+
+    def render(model: PostListResponse) -> bytes:
+        content = loop.run_until_complete(
+            serialize_response(field=field, response_content=model, is_coroutine=True)
+        )
+        return JSONResponse(content).body
+
+    def before() -> bytes:
+        return render(PostListResponse(**page))
+
+    def after() -> bytes:
+        return encoder.dumps(page)
+
+    cached_before = PostListResponse(**page).model_dump_json()
+    cached_after = after()
+
+    def hit_before() -> bytes:
+        return render(PostListResponse.model_validate_json(cached_before))
+
+    def hit_after() -> bytes:
+        return cached_after
+
+    if before() != after():
+        raise SystemExit("RowEncoder output differs from the response_model path")
+    print(f"{len(after())} bytes per page, identical before and after")
+    for name, fn in (
+        ("before: validate + jsonable_encoder + json", before),
+        ("after:  RowEncoder + orjson", after),
+        ("before: cache hit", hit_before),
+        ("after:  cache hit", hit_after),
+    ):
+        print(f"{name:<44}{best_of(args.runs, fn) * 1e3:8.3f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+    common.seed(PAGE_SIZE)
+    try:
+        main(args)
+    finally:
+        common.clear()
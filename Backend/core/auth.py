@@ -0,0 +1,123 @@
+import hashlib
+import secrets
+import time
+from fastapi import Depends, Header, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy import select
+from core.cache import TTLCache
+from core.config import settings
+from core.database import AsyncSessionLocal
+from core.security import verify_token
+from core.single_flight import SingleFlight
+from models.user import User
+from schemas.user import UserResponse
+from typing import Optional
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+# Decoded access tokens by SHA-256 of the token, each kept until its exp
+_tokens = TTLCache(
+    settings.TOKEN_CACHE_MAX_ENTRIES, settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+)
+# Users by id; UserService drops entries when a user changes
+_identities = TTLCache(settings.USER_CACHE_MAX_ENTRIES, settings.USER_CACHE_TTL)
+_identity_flights = SingleFlight()
+# Bumped on every invalidation, so a load that raced one is not cached
+_invalidations = 0
+
+
+def decode_token(token: str) -> Optional[dict]:
+    """Payload of a valid access token, verified once per token"""
+    digest = hashlib.sha256(token.encode()).digest()
+    payload = _tokens.get(digest)
+    if payload is None:
+        payload = verify_token(token)
+        if payload is None or "sub" not in payload:
+            return None
+        _tokens.set(digest, payload, ttl=payload["exp"] - time.time())
+    return payload
+
+
+async def _load_identity(user_id: str) -> Optional[UserResponse]:
+    invalidations = _invalidations
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(User).filter(User.id == user_id))
+        user = result.scalars().first()
+    if user is None:
+        return None
+    identity = UserResponse.model_validate(user)
+    if invalidations == _invalidations:
+        _identities.set(user_id, identity)
+    return identity
+
+
+async def get_identity(user_id: str) -> Optional[UserResponse]:
+    """A user's identity, loaded once per TTL however many requests ask"""
+    identity = _identities.get(user_id)
+    if identity is None:
+        identity = await _identity_flights.do(user_id, lambda: _load_identity(user_id))
+    return identity
+
+
+def invalidate_user(user_id: str) -> None:
+    """Forget a cached identity after the user is updated or deleted"""
+    global _invalidations
+    _invalidations += 1
+    _identities.pop(user_id)
+
+
+async def get_current_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+) -> UserResponse:
+    """
+    Authenticated user for a request with an 'Authorization: Bearer' token
+
+    A token seen before skips signature verification, and a user seen
+    within USER_CACHE_TTL skips the database, so the usual cost is two
+    dict lookups.
+    """
+    unauthorized = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Not authenticated",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    if credentials is None:
+        raise unauthorized
+    payload = decode_token(credentials.credentials)
+    if payload is None:
+        raise unauthorized
+    identity = await get_identity(payload["sub"])
+    if identity is None:
+        raise unauthorized
+    return identity
+
+
+async def get_optional_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+) -> Optional[UserResponse]:
+    """Authenticated user if the request carries a valid token, else None"""
+    if credentials is None:
+        return None
+    payload = decode_token(credentials.credentials)
+    if payload is None:
+        return None
+    return await get_identity(payload["sub"])
+
+
+async def require_internal_token(
+    x_internal_token: Optional[str] = Header(None),
+) -> None:
+    """
+    Guard for operational endpoints: the X-Internal-Token header must equal
+    INTERNAL_API_TOKEN. Without a configured token they do not exist.
+    """
+    expected = settings.INTERNAL_API_TOKEN
+    if not expected:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if x_internal_token is None or not secrets.compare_digest(
+        x_internal_token.encode(), expected.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid internal token",
+        )
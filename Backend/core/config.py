@@ -1,30 +1,103 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # seconds before a connection is replaced
+    DB_POOL_PRE_PING: bool = True
+    QUERY_COUNT_HEADER: bool = False  # add X-Query-Count to every response
+    QUERY_BUDGET_PER_REQUEST: int = 10  # log a warning above this
 
     # Security
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    TOKEN_CACHE_MAX_ENTRIES: int = 10000  # decoded access tokens
+    USER_CACHE_MAX_ENTRIES: int = 10000  # authenticated user identities
+    USER_CACHE_TTL: int = 60  # seconds
+    # X-Internal-Token for /api/internal; unset hides those endpoints
+    INTERNAL_API_TOKEN: Optional[str] = None
 
     # Google OAuth
     GOOGLE_CLIENT_ID: str
     GOOGLE_CLIENT_SECRET: str
+    GOOGLE_JWKS_URL: str = "https://www.googleapis.com/oauth2/v3/certs"
+    GOOGLE_JWKS_FILE: Optional[str] = None  # local JWKS instead, for dev/tests
 
     # CORS
     FRONTEND_URL: str = "http://localhost:3000"
 
+    # Feed
+    FEED_COUNT_STRATEGY: str = "counter"  # 'exact', 'counter', 'estimate'
+    FEED_COUNT_CACHE_TTL: int = 60  # seconds, for 'estimate'
+    FEED_COUNT_CACHE_MAX_ENTRIES: int = 10000  # scope/tag combinations
+    FEED_CACHE_BACKEND: str = "memory"  # 'memory' or 'redis'
+    FEED_CACHE_URL: Optional[str] = None  # e.g. redis://localhost:6379/0
+    FEED_CACHE_TTL: int = 15  # seconds, 0 disables the cache
+    FEED_CACHE_MAX_ENTRIES: int = 1000
+    FEED_CACHE_MAX_PAGE: int = 3  # offset pages beyond this are not cached
+
+    # Search
+    SEARCH_TAGS_TTL: int = 300  # seconds between tag histogram refreshes
+
+    # Like/save counters are buffered and flushed in batches
+    COUNTER_FLUSH_INTERVAL: float = 1.0  # seconds
+    COUNTER_FLUSH_THRESHOLD: int = 500  # pending increments
+
+    # Trending feed
+    TRENDING_SIZE: int = 500  # posts kept ranked
+    TRENDING_INTERVAL: float = 30.0  # seconds between incremental recomputes
+    TRENDING_REBUILD_INTERVAL: int = 3600  # seconds between full recomputes
+    TRENDING_WINDOW_DAYS: int = 7  # older posts are never ranked
+    TRENDING_BATCH_SIZE: int = 5000  # posts scored per vectorized batch
+    TRENDING_DECAY_SECONDS: float = 45000  # age that costs a 10x engagement lead
+    TRENDING_SAVE_WEIGHT: float = 2.0  # a save counts as this many likes
+    TRENDING_AI_BOOST: float = 1.2  # engagement multiplier for AI-generated looks
+
     # File Upload
     UPLOAD_DIR: str = "uploads"
     MAX_FILE_SIZE: int = 10485760  # 10MB
+    MAX_IMAGE_SIDE: int = 8000  # pixels, either dimension
+    MAX_IMAGE_PIXELS: int = 40000000  # width * height, guards decompression bombs
+    IMAGE_VARIANT_WIDTHS: List[int] = [320, 640, 1080]  # responsive derivatives
+    IMAGE_VARIANT_WORKERS: int = 2  # processes rendering derivatives
+    BLOB_GC_GRACE: int = 604800  # seconds an unreferenced upload is kept
 
     # AI Service
     AI_API_KEY: Optional[str] = None
     AI_API_URL: Optional[str] = None
+    AI_JOB_BACKEND: str = "memory"  # 'memory' or 'redis' (job states shared by workers)
+    AI_JOB_URL: Optional[str] = None  # e.g. redis://localhost:6379/0
+    AI_WORKERS: int = 4  # concurrent generations per process
+    AI_QUEUE_MAX_DEPTH: int = 100  # queued jobs per process before submissions get 503
+    AI_JOB_TIMEOUT: int = 120  # seconds per generation
+    AI_JOB_RESULT_TTL: int = 600  # seconds finished jobs stay readable
+    GENERATION_CACHE_MAX_ENTRIES: int = 512  # in-memory tier
+    GENERATION_CACHE_TTL: int = 86400  # seconds, both tiers
+
+    # Garment images fetched from shops
+    GARMENT_FETCH_MAX_CONNECTIONS: int = 20  # shared pool, all shops
+    GARMENT_FETCH_PER_HOST: int = 4  # requests in flight per shop
+    GARMENT_FETCH_TIMEOUT: float = 10.0  # seconds
+    GARMENT_CACHE_TTL: int = 3600  # seconds before a cached image is revalidated
+    GARMENT_FETCH_ALLOW_PRIVATE_HOSTS: bool = False  # only for local development
+
+    # Admission control for AI generation
+    ADMISSION_BACKEND: str = "memory"  # 'memory' or 'redis' (shared buckets)
+    ADMISSION_URL: Optional[str] = None  # e.g. redis://localhost:6379/0
+    AI_USER_RATE: float = 0.2  # generations per second per user, sustained
+    AI_USER_BURST: int = 5
+    AI_GLOBAL_RATE: float = 5.0  # generations per second, all users
+    AI_GLOBAL_BURST: int = 20
+    AI_MAX_IN_FLIGHT: int = 8  # synchronous generations per process
+    AI_MAX_IN_FLIGHT_PER_USER: int = 2
+    AI_ADMISSION_MAX_QUEUED: int = 32  # requests waiting for a free slot
+    AI_ADMISSION_QUEUE_TIMEOUT: float = 2.0  # seconds before a waiter gets 429
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,44 @@
+import hashlib
+from functools import lru_cache
+from fastapi import Response, status
+from pydantic import BaseModel
+from typing import Any, Iterable, Optional, Type
+
+
+@lru_cache(maxsize=None)
+def _representation(model: Type[BaseModel]) -> str:
+    """Changes whenever the fields of model change, so a deploy that adds
+    a field does not leave clients holding matching ETags for old bodies"""
+    schema = repr(sorted(model.model_json_schema().items()))
+    return hashlib.blake2b(schema.encode(), digest_size=4).hexdigest()
+
+
+def make_etag(model: Type[BaseModel], parts: Iterable[Any]) -> str:
+    """
+    Strong ETag for a model rendering of the state described by parts
+
+    parts are whatever identifies that state: ids, updated_at values,
+    pending counters. Datetimes go in as isoformat, so microseconds count.
+    """
+    raw = "|".join(
+        [_representation(model)]
+        + [p.isoformat() if hasattr(p, "isoformat") else str(p) for p in parts]
+    )
+    return '"' + hashlib.blake2b(raw.encode(), digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header names etag (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def not_modified(etag: str) -> Response:
+    """304 for a client whose copy is current; no body is rendered"""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
@@ -0,0 +1,194 @@
+import asyncio
+import json
+import logging
+import re
+import time
+from pathlib import Path
+import httpx
+from jose import JWTError, jwt
+from core.config import settings
+from core.single_flight import SingleFlight
+from typing import Dict, Optional, Protocol, Tuple
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+# Used when the key source does not say how long its keys stay valid
+DEFAULT_MAX_AGE = 3600
+# Refresh in the background once this share of the max-age has passed
+SOFT_EXPIRY = 0.8
+# Least seconds between refreshes forced by an unknown kid
+KID_MISS_INTERVAL = 30
+
+
+class GoogleTokenError(ValueError):
+    """Raised for an ID token that is malformed, expired or not Google's"""
+
+
+class SigningKeysUnavailable(Exception):
+    """Raised when a token cannot be checked because no keys can be loaded"""
+
+
+class KeySource(Protocol):
+    async def fetch(self) -> Tuple[dict, Optional[int]]:
+        """A JWKS document and how many seconds it may be cached, if known"""
+        ...
+
+
+class HttpKeySource:
+    """Google's published JWKS, cached for as long as Cache-Control allows"""
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url = url
+        self.timeout = timeout
+
+    async def fetch(self) -> Tuple[dict, Optional[int]]:
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            response = await client.get(self.url)
+            response.raise_for_status()
+        match = MAX_AGE_PATTERN.search(response.headers.get("cache-control", ""))
+        max_age = None
+        if match:
+            max_age = int(match.group(1)) - int(response.headers.get("age", 0))
+        return response.json(), max_age
+
+
+class FileKeySource:
+    """A JWKS document on disk, for development and tests"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+    async def fetch(self) -> Tuple[dict, Optional[int]]:
+        return json.loads(await asyncio.to_thread(self.path.read_text)), None
+
+
+class GoogleTokenVerifier:
+    """
+    Verifies Google ID tokens locally against cached signing keys
+
+    Keys are loaded from a pluggable KeySource and kept for the max-age
+    it reports. Past SOFT_EXPIRY of that age, a request still uses the
+    cached keys while one background refresh runs; only fully expired
+    keys make a request wait. All refreshes go through one SingleFlight,
+    so concurrent logins never fetch the key set more than once. A token
+    signed with an unknown kid (Google rotated its keys) triggers a
+    refresh, at most every KID_MISS_INTERVAL seconds.
+    """
+
+    def __init__(self, source: KeySource, audience: str):
+        self.source = source
+        self.audience = audience
+        self._keys: Dict[str, dict] = {}
+        self._soft_expires_at = 0.0
+        self._expires_at = 0.0
+        self._last_refresh = 0.0
+        self._refresh_failed = False
+        self._flight = SingleFlight()
+        self._background: Optional[asyncio.Task] = None
+        self.refreshes = 0
+
+    def start(self) -> None:
+        """Load the keys in the background so the first login is local"""
+        self._refresh_in_background()
+
+    async def stop(self) -> None:
+        if self._background is not None and not self._background.done():
+            self._background.cancel()
+
+    async def verify(self, token: str) -> dict:
+        """
+        Claims of a valid Google ID token for this app's client id
+
+        Raises GoogleTokenError for a bad token and SigningKeysUnavailable
+        when the keys to check it against cannot be loaded.
+        """
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+        except JWTError:
+            raise GoogleTokenError("Malformed token")
+
+        key = await self._key_for(kid)
+        try:
+            claims = jwt.decode(
+                token,
+                key,
+                algorithms=["RS256"],
+                audience=self.audience,
+                issuer=GOOGLE_ISSUERS,
+                options={"verify_at_hash": False},
+            )
+        except JWTError as e:
+            raise GoogleTokenError(str(e))
+        if not claims.get("email_verified", False):
+            raise GoogleTokenError("Email address is not verified")
+        return claims
+
+    async def _key_for(self, kid: Optional[str]) -> dict:
+        now = time.monotonic()
+        if now >= self._expires_at:
+            await self._refresh(keep_stale=True)
+        elif now >= self._soft_expires_at:
+            self._refresh_in_background()
+
+        if kid not in self._keys:
+            if time.monotonic() - self._last_refresh >= KID_MISS_INTERVAL:
+                await self._refresh(keep_stale=True)
+            if self._refresh_failed:
+                # The key may well be new; the token is not known bad
+                raise SigningKeysUnavailable("Signing keys could not be refreshed")
+        if kid not in self._keys:
+            raise GoogleTokenError("Token signed with an unknown key")
+        return self._keys[kid]
+
+    async def _refresh(self, keep_stale: bool = False) -> bool:
+        """Load the keys; False if that failed and the old ones were kept"""
+        try:
+            await self._flight.do("jwks", self._load)
+            return True
+        except Exception:
+            # Google publishes keys well before using them, so the last
+            # set keeps working through a short outage
+            if not (keep_stale and self._keys):
+                logger.exception("Loading Google signing keys failed")
+                raise SigningKeysUnavailable("Signing keys are unavailable")
+            logger.exception("Refreshing Google signing keys failed, keeping old keys")
+            # Retry later rather than on every login while the source is down;
+            # an unknown kid waits out KID_MISS_INTERVAL from this attempt too
+            self._last_refresh = time.monotonic()
+            self._expires_at = self._last_refresh + KID_MISS_INTERVAL
+            self._soft_expires_at = self._expires_at
+            self._refresh_failed = True
+            return False
+
+    def _refresh_in_background(self) -> None:
+        if self._background is None or self._background.done():
+            self._background = asyncio.create_task(self._refresh(keep_stale=True))
+            self._background.add_done_callback(
+                lambda task: task.cancelled() or task.exception()
+            )
+
+    async def _load(self) -> None:
+        jwks, max_age = await self.source.fetch()
+        keys = {key["kid"]: key for key in jwks.get("keys", []) if "kid" in key}
+        if not keys:
+            raise ValueError("Key set has no keys")
+
+        now = time.monotonic()
+        max_age = max_age if max_age and max_age > 0 else DEFAULT_MAX_AGE
+        self._keys = keys
+        self._last_refresh = now
+        self._refresh_failed = False
+        self._expires_at = now + max_age
+        self._soft_expires_at = now + max_age * SOFT_EXPIRY
+        self.refreshes += 1
+
+
+def _key_source() -> KeySource:
+    if settings.GOOGLE_JWKS_FILE:
+        return FileKeySource(settings.GOOGLE_JWKS_FILE)
+    return HttpKeySource(settings.GOOGLE_JWKS_URL)
+
+
+google_tokens = GoogleTokenVerifier(_key_source(), settings.GOOGLE_CLIENT_ID)
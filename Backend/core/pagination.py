@@ -0,0 +1,39 @@
+import base64
+import json
+from datetime import datetime
+from typing import List, Tuple
+
+
+def encode_cursor(created_at: datetime, post_id: str) -> str:
+    """Encode a (created_at, id) keyset position as an opaque cursor"""
+    raw = json.dumps([created_at.isoformat(), post_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decode an opaque cursor, raising ValueError if it is malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, post_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), str(post_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+# Most ids a batch endpoint accepts in one request
+MAX_BATCH_IDS = 100
+
+
+def parse_ids(values: List[str], limit: int = MAX_BATCH_IDS) -> List[str]:
+    """
+    Ids from repeated and/or comma-separated query values, de-duplicated
+    in first-seen order, raising ValueError for none or more than limit
+    """
+    ids = dict.fromkeys(
+        part.strip() for value in values for part in value.split(",") if part.strip()
+    )
+    if not ids:
+        raise ValueError("No ids given")
+    if len(ids) > limit:
+        raise ValueError(f"At most {limit} ids per request")
+    return list(ids)
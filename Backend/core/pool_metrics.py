@@ -0,0 +1,86 @@
+import time
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+from typing import Dict, List
+
+# Upper bounds (seconds) of the checkout wait histogram buckets
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class PoolMetrics:
+    """Checkout wait histogram for a single connection pool"""
+
+    def __init__(self):
+        self.bucket_counts: List[int] = [0] * (len(WAIT_BUCKETS) + 1)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def observe(self, seconds: float, timed_out: bool = False) -> None:
+        """Record how long one checkout waited for a connection"""
+        index = next(
+            (i for i, bound in enumerate(WAIT_BUCKETS) if seconds <= bound),
+            len(WAIT_BUCKETS),
+        )
+        self.bucket_counts[index] += 1
+        self.wait_seconds_total += seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+        if timed_out:
+            self.timeouts += 1
+        else:
+            self.checkouts += 1
+
+    def histogram(self) -> Dict[str, int]:
+        """Cumulative bucket counts keyed by upper bound, Prometheus style"""
+        labels = [str(bound) for bound in WAIT_BUCKETS] + ["+Inf"]
+        cumulative, running = {}, 0
+        for label, count in zip(labels, self.bucket_counts):
+            running += count
+            cumulative[label] = running
+        return cumulative
+
+
+class _TimedPoolMixin:
+    """Times every connect() call, which includes any wait in the queue"""
+
+    def connect(self):
+        metrics = self.__dict__.setdefault("metrics", PoolMetrics())
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            metrics.observe(time.perf_counter() - start, timed_out=True)
+            raise
+        metrics.observe(time.perf_counter() - start)
+        return connection
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_stats(pool: Pool) -> dict:
+    """Snapshot of a pool's occupancy and checkout wait times"""
+    stats = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+        )
+
+    metrics = getattr(pool, "metrics", None) or PoolMetrics()
+    stats.update(
+        checkouts=metrics.checkouts,
+        timeouts=metrics.timeouts,
+        wait_seconds_total=round(metrics.wait_seconds_total, 6),
+        wait_seconds_max=round(metrics.wait_seconds_max, 6),
+        wait_histogram=metrics.histogram(),
+    )
+    return stats
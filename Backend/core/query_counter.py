@@ -0,0 +1,29 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from typing import Iterator, List, Optional
+
+# Mutable per-request counter so greenlet-run listeners can add to it
+_query_count: ContextVar[Optional[List[int]]] = ContextVar("query_count", default=None)
+
+
+def install(engine: Engine) -> None:
+    """Count every statement the engine executes in the current context"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        counter = _query_count.get()
+        if counter is not None:
+            counter[0] += 1
+
+
+@contextmanager
+def track_queries() -> Iterator[List[int]]:
+    """Yield a one-item list holding the number of queries run inside the block"""
+    counter = [0]
+    token = _query_count.set(counter)
+    try:
+        yield counter
+    finally:
+        _query_count.reset(token)
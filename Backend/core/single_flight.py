@@ -0,0 +1,77 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class _Flight:
+    """A shared task and the number of callers awaiting it"""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into one execution
+
+    The first caller starts the work as its own task; everyone with the
+    same key awaits that task through asyncio.shield, so one cancelled
+    caller (leader or not) does not cancel the work for the others. When
+    the last caller is cancelled, by a timeout or a disconnect, the work
+    is cancelled too, so it never outlives everyone waiting for it. When
+    it finishes, all waiters get its result or its exception, and the
+    next call with that key starts fresh.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Flight] = {}
+        self.executions = 0
+        self.coalesced = 0
+        self.abandoned = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        flight = self._calls.get(key)
+        if flight is None:
+            self.executions += 1
+            flight = _Flight(asyncio.create_task(fn()))
+            self._calls[key] = flight
+            flight.task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.task.done():
+                # Nobody is left to use the result
+                self.abandoned += 1
+                flight.task.cancel()
+                # A caller arriving before the task winds down starts anew
+                if self._calls.get(key) is flight:
+                    del self._calls[key]
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        flight = self._calls.get(key)
+        if flight is not None and flight.task is task:
+            del self._calls[key]
+        # Mark the exception retrieved in case every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": self.in_flight,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "abandoned": self.abandoned,
+        }
@@ -0,0 +1,33 @@
+"""
+Blob garbage collection script
+Run this periodically (e.g. daily from cron) to delete uploads that no
+post, draft or cached generation references any more.
+"""
+import argparse
+import asyncio
+from core.config import settings
+from core.database import async_engine, AsyncSessionLocal
+from models.user import User
+from models.post import Post
+from models.draft import Draft
+from models.blob_ref import BlobRef
+from services.blob_ref_service import BlobRefService
+
+
+async def collect(grace: int, dry_run: bool):
+    """Delete unreferenced blobs older than grace seconds"""
+    try:
+        async with AsyncSessionLocal() as db:
+            removed, freed = await BlobRefService.collect_garbage(db, grace, dry_run)
+    finally:
+        await async_engine.dispose()
+    verb = "Would remove" if dry_run else "Removed"
+    print(f"✓ {verb} {removed} unreferenced blobs, {freed / 1048576:.1f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--grace", type=int, default=settings.BLOB_GC_GRACE)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(collect(args.grace, args.dry_run))
@@ -2,16 +2,33 @@
 Database initialization script
 Run this to create all tables in the database
 """
+from sqlalchemy import text
 from core.database import engine, Base
 from models.user import User
-from models.post import Post
+from models.post import Post, SEARCH_VECTOR_DDL
 from models.draft import Draft
+from models.post_counter import PostCounter
+from models.blob_ref import BlobRef
+from models.trending_post import TrendingPost
 
 
 def init_database():
     """Create all database tables"""
     print("Creating database tables...")
+    if engine.dialect.name == "postgresql":
+        # Trigram indexes used by search
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
     Base.metadata.create_all(bind=engine)
+    # create_all skips tables that exist, so add indexes defined later
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    if engine.dialect.name == "postgresql":
+        # Stored search document; adding it rewrites posts once
+        with engine.begin() as conn:
+            for statement in SEARCH_VECTOR_DDL:
+                conn.execute(text(statement))
     print("✓ Database tables created successfully!")
 
 
@@ -1,12 +1,47 @@
-from fastapi import FastAPI
+import logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.staticfiles import StaticFiles
 from core.config import settings
-from routes import auth, users, posts, drafts, ai
+from core.database import async_engine
+from core.google_tokens import google_tokens
+from core.query_counter import track_queries
+from routes import auth, users, posts, drafts, ai, search, uploads, internal
+from services.counter_buffer import post_counters
+from services.garment_fetcher import garment_fetcher
+from services.image_variants import image_variants
+from services.post_count_service import PostCountService
+from services.job_queue import generation_jobs
+from services.trending import trending
+from services.upload_service import UploadService
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await PostCountService.seed_counters()
+    post_counters.start()
+    generation_jobs.start()
+    image_variants.start()
+    garment_fetcher.start()
+    google_tokens.start()
+    trending.start()
+    yield
+    await trending.stop()
+    await google_tokens.stop()
+    await generation_jobs.stop()
+    await garment_fetcher.stop()
+    await image_variants.stop()
+    # Flush buffered likes/saves before the connection pool goes away
+    await post_counters.stop()
+    await async_engine.dispose()
+
 
 app = FastAPI(
     title="Thread.AI API",
     description="AI Fashion Discovery Platform API",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS Configuration
@@ -16,14 +51,45 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lets the frontend read ETags to send back as If-None-Match
+    expose_headers=["ETag"],
 )
 
+logger = logging.getLogger(__name__)
+
+
+# Query budget: surfaces N+1 regressions per request
+@app.middleware("http")
+async def count_queries(request: Request, call_next):
+    with track_queries() as queries:
+        response = await call_next(request)
+    if queries[0] > settings.QUERY_BUDGET_PER_REQUEST:
+        logger.warning(
+            "%s %s ran %d queries", request.method, request.url.path, queries[0]
+        )
+    if settings.QUERY_COUNT_HEADER:
+        response.headers["X-Query-Count"] = str(queries[0])
+    return response
+
+
 # Include Routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/api/users", tags=["Users"])
 app.include_router(posts.router, prefix="/api/posts", tags=["Posts"])
 app.include_router(drafts.router, prefix="/api/drafts", tags=["Drafts"])
 app.include_router(ai.router, prefix="/api/ai", tags=["AI"])
+app.include_router(search.router, prefix="/api/search", tags=["Search"])
+app.include_router(uploads.router, prefix="/api/uploads", tags=["Uploads"])
+app.include_router(
+    internal.router, prefix="/api/internal", tags=["Internal"], include_in_schema=False
+)
+
+# Uploaded images; the caches kept beside them in UPLOAD_DIR are not public
+app.mount(
+    UploadService.url_for("").rstrip("/"),
+    StaticFiles(directory=UploadService.images_dir()),
+    name="uploads",
+)
 
 
 @app.get("/")
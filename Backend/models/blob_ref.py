@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, DateTime, Index
+from datetime import datetime
+from core.database import Base
+
+
+class BlobRef(Base):
+    """
+    One owner's reference to an uploaded blob
+
+    A blob with no rows here is garbage once its grace period has passed.
+    """
+
+    __tablename__ = "blob_refs"
+    __table_args__ = (Index("ix_blob_refs_owner", "owner_type", "owner_id"),)
+
+    blob_id = Column(String, primary_key=True)  # upload id, '<sha256>.<ext>'
+    owner_type = Column(String, primary_key=True)  # 'post', 'draft', 'generation'
+    owner_id = Column(String, primary_key=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
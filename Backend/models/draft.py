@@ -11,6 +11,8 @@ class Draft(Base):
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, ForeignKey("users.id"), nullable=False)
     image_url = Column(String, nullable=False)
+    # {format: [{width, url}]} derivatives of image_url, see image_variants
+    image_variants = Column(JSON, nullable=True)
     title = Column(String, nullable=True)
     description = Column(Text, nullable=True)
     garments = Column(JSON, default=[])
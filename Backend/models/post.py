@@ -1,19 +1,39 @@
-from sqlalchemy import Column, String, DateTime, Text, Integer, Boolean, ForeignKey, ARRAY
+from sqlalchemy import Column, String, DateTime, Text, Integer, Float, Boolean, ForeignKey, Index, JSON, exists, func, literal_column, select
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from core.database import Base
 import uuid
+from typing import List, Optional
 
 
 class Post(Base):
     __tablename__ = "posts"
+    __table_args__ = (
+        # Backs keyset pagination of the feed (created_at desc, id desc)
+        Index("ix_posts_created_at_id", "created_at", "id"),
+        Index("ix_posts_user_id_created_at_id", "user_id", "created_at", "id"),
+        # Backs tag filters (@> and &&) on the wall feed
+        Index("ix_posts_tags", "tags", postgresql_using="gin"),
+        # Lets the trending engine find posts whose engagement changed
+        Index("ix_posts_updated_at", "updated_at"),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, ForeignKey("users.id"), nullable=False)
     image_url = Column(String, nullable=False)
+    # {format: [{width, url}]} derivatives of image_url, see image_variants
+    image_variants = Column(JSON, nullable=True)
+    # Layout metadata so the wall can reserve space before the image loads
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    aspect_ratio = Column(Float, nullable=True)  # width / height
+    dominant_color = Column(String(7), nullable=True)  # '#rrggbb'
+    blurhash = Column(String, nullable=True)
     title = Column(String, nullable=True)
     description = Column(Text, nullable=True)
-    tags = Column(ARRAY(String), default=[])
+    # JSON on SQLite, which has no arrays (local development and tests)
+    tags = Column(ARRAY(String).with_variant(JSON(), "sqlite"), default=[])
     likes = Column(Integer, default=0)
     saves = Column(Integer, default=0)
     is_ai_generated = Column(Boolean, default=False)
@@ -21,4 +41,55 @@ class Post(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
-    user = relationship("User", back_populates="posts")
+    # Never lazy-load authors: queries must use joinedload/selectinload
+    user = relationship("User", back_populates="posts", lazy="raise_on_sql")
+
+
+# Full-text document for search, stored by Postgres in a generated column
+# so ranking reads it rather than rebuilding a tsvector per matching row.
+# It is not mapped (SQLite has no tsvector); init_db adds it and its index.
+SEARCH_VECTOR = literal_column("posts.search_vector", TSVECTOR)
+
+SEARCH_VECTOR_DDL = (
+    "ALTER TABLE posts ADD COLUMN IF NOT EXISTS search_vector tsvector"
+    " GENERATED ALWAYS AS (to_tsvector('simple',"
+    " coalesce(title, '') || ' ' || coalesce(description, ''))) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_posts_search_vector"
+    " ON posts USING gin (search_vector)",
+    # Expression index the stored column replaces
+    "DROP INDEX IF EXISTS ix_posts_search_document",
+)
+
+
+def tag_filters(
+    dialect: str,
+    tags: Optional[List[str]] = None,
+    any_tags: Optional[List[str]] = None,
+) -> list:
+    """
+    WHERE conditions keeping posts with all of tags and any of any_tags
+
+    Postgres compares arrays (@>, &&) so the GIN index applies; SQLite
+    looks into the JSON list with json_each. Raises ValueError on other
+    databases.
+    """
+    conditions = []
+    if not (tags or any_tags):
+        return conditions
+    if dialect == "postgresql":
+        if tags:
+            conditions.append(Post.tags.contains(tags))
+        if any_tags:
+            conditions.append(Post.tags.overlap(any_tags))
+    elif dialect == "sqlite":
+
+        def carries(values: List[str]):
+            each = func.json_each(Post.tags).table_valued("value")
+            return exists(select(1).select_from(each).where(each.c.value.in_(values)))
+
+        conditions.extend(carries([tag]) for tag in dict.fromkeys(tags or ()))
+        if any_tags:
+            conditions.append(carries(any_tags))
+    else:
+        raise ValueError(f"Tag filters are not supported on {dialect}")
+    return conditions
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, String, Integer
+from core.database import Base
+
+
+class PostCounter(Base):
+    """Maintained post totals, one row per scope ('*' or a user_id)"""
+
+    __tablename__ = "post_counters"
+
+    scope = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
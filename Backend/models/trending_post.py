@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, Integer, Float, DateTime
+from core.database import Base
+
+
+class TrendingPost(Base):
+    """Latest snapshot of the trending ranking, one row per ranked post"""
+
+    __tablename__ = "trending_posts"
+
+    post_id = Column(String, primary_key=True)
+    rank = Column(Integer, nullable=False)  # 0 is the top post
+    score = Column(Float, nullable=False)
+    # posts.updated_at up to which engagement is reflected in the scores
+    as_of = Column(DateTime, nullable=True)
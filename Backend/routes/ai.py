@@ -1,14 +1,53 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from schemas.ai import AIGenerationRequest, AIGenerationResponse
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from core.auth import get_optional_user
+from schemas.ai import AIGenerationRequest, AIGenerationResponse, AIJobResponse
+from schemas.user import UserResponse
+from services.admission import (
+    AdmissionRejected,
+    generation_admission,
+    retry_after_header,
+)
 from services.ai_service import AIService
+from services.job_queue import generation_jobs, QueueFullError
+from services.upload_service import UploadService
+from typing import Optional
 
 router = APIRouter()
 
+# Seconds between SSE frames while a job is unchanged
+SSE_HEARTBEAT = 15
+
+
+def _check_image_id(request: AIGenerationRequest) -> None:
+    if request.user_image_id and UploadService.path_for(request.user_image_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unknown user_image_id",
+        )
+
+
+def _admission_key(http_request: Request, user: Optional[UserResponse]) -> str:
+    """Who a generation is charged to: the user, else the client address"""
+    if user is not None:
+        return f"user:{user.id}"
+    host = http_request.client.host if http_request.client else "unknown"
+    return f"ip:{host}"
+
+
+def _too_many_requests(e: AdmissionRejected) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=f"Too many generation requests ({e.reason}), try again shortly",
+        headers={"Retry-After": retry_after_header(e.retry_after)},
+    )
+
 
 @router.post("/generate", response_model=AIGenerationResponse)
 async def generate_outfit(
     request: AIGenerationRequest,
-    # TODO: Add authentication
+    http_request: Request,
+    user: Optional[UserResponse] = Depends(get_optional_user),
 ):
     """
     Generate AI outfit based on user image and selected garments
@@ -21,10 +60,19 @@ async def generate_outfit(
     Returns:
     - Generated outfit image URL
     - Generation metadata
+
+    Holds the connection for the whole generation; prefer POST /jobs.
+    Over the caller's rate, or with every generation slot busy, answers
+    429 with Retry-After before doing any work.
     """
+    _check_image_id(request)
+    key = _admission_key(http_request, user)
     try:
-        result = await AIService.generate_outfit(request)
-        return result
+        await generation_admission.check_rate(key)
+        async with generation_admission.slot(key):
+            return await AIService.generate_outfit(request)
+    except AdmissionRejected as e:
+        raise _too_many_requests(e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -32,15 +80,80 @@ async def generate_outfit(
         )
 
 
+@router.post(
+    "/jobs", response_model=AIJobResponse, status_code=status.HTTP_202_ACCEPTED
+)
+async def submit_generation_job(
+    request: AIGenerationRequest,
+    http_request: Request,
+    user: Optional[UserResponse] = Depends(get_optional_user),
+):
+    """
+    Queue an outfit generation and return its job right away
+
+    Poll GET /jobs/{job_id} or stream GET /jobs/{job_id}/events for the
+    result. Submissions share the rate limits of /generate; the queue
+    bounds how many run at once.
+    """
+    _check_image_id(request)
+    try:
+        await generation_admission.check_rate(_admission_key(http_request, user))
+    except AdmissionRejected as e:
+        raise _too_many_requests(e)
+    try:
+        job = await generation_jobs.submit(request)
+    except QueueFullError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Generation queue is full, try again shortly",
+            headers={"Retry-After": "5"},
+        )
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=AIJobResponse)
+async def get_generation_job(job_id: str):
+    """Get the status, and once finished the result, of a generation job"""
+    job = await generation_jobs.get(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found",
+        )
+    return job
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_generation_job(job_id: str):
+    """Server-sent events with the job's state on every change"""
+    job = await generation_jobs.get(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found",
+        )
+
+    async def events():
+        async for state in generation_jobs.watch(job_id, SSE_HEARTBEAT):
+            yield f"event: {state.status}\ndata: {state.model_dump_json()}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/validate-image")
 async def validate_image(
     image_data: str,
 ):
     """Validate uploaded image before processing"""
-    is_valid = await AIService.validate_image(image_data)
-    if not is_valid:
+    try:
+        metadata = await AIService.validate_image(image_data)
+    except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid image format or size",
+            detail=f"Invalid image: {e}",
         )
-    return {"valid": True}
+    return {"valid": True, **metadata.model_dump()}
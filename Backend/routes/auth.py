@@ -1,11 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from core.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.auth import get_current_user
+from core.database import get_async_db
+from core.google_tokens import (
+    KID_MISS_INTERVAL,
+    GoogleTokenError,
+    SigningKeysUnavailable,
+    google_tokens,
+)
 from core.security import create_access_token
 from schemas.auth import GoogleAuthRequest, GoogleAuthResponse
-from schemas.user import UserCreate
+from schemas.user import UserCreate, UserResponse
 from services.user_service import UserService
-import httpx
 
 router = APIRouter()
 
@@ -13,47 +19,42 @@ router = APIRouter()
 @router.post("/google", response_model=GoogleAuthResponse)
 async def google_auth(
     auth_request: GoogleAuthRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
-    Authenticate user with Google OAuth
+    Authenticate user with a Google ID token
 
-    TODO: Verify Google token with Google API
-    This is a simplified version
+    The token is verified locally against Google's cached signing keys,
+    so login makes no call to Google.
     """
-    # TODO: Verify token with Google
-    # async with httpx.AsyncClient() as client:
-    #     response = await client.get(
-    #         f"https://oauth2.googleapis.com/tokeninfo?id_token={auth_request.token}"
-    #     )
-    #     if response.status_code != 200:
-    #         raise HTTPException(
-    #             status_code=status.HTTP_401_UNAUTHORIZED,
-    #             detail="Invalid token",
-    #         )
-    #     user_info = response.json()
-
-    # Mock user info (replace with actual Google response)
-    user_info = {
-        "sub": "google-id-123",
-        "email": "user@example.com",
-        "name": "Test User",
-        "picture": "https://example.com/avatar.jpg",
-    }
+    try:
+        user_info = await google_tokens.verify(auth_request.token)
+    except GoogleTokenError as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=f"Invalid token: {e}",
+        )
+    except SigningKeysUnavailable:
+        # Google's keys could not be fetched; the token may be fine
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Sign-in is temporarily unavailable",
+            headers={"Retry-After": str(KID_MISS_INTERVAL)},
+        )
 
     # Check if user exists
-    user = UserService.get_by_google_id(db, user_info["sub"])
+    user = await UserService.get_by_google_id(db, user_info["sub"])
 
     # Create user if doesn't exist
     if not user:
-        user = UserService.get_by_email(db, user_info["email"])
+        user = await UserService.get_by_email(db, user_info["email"])
         if not user:
             user_create = UserCreate(
                 email=user_info["email"],
-                name=user_info["name"],
+                name=user_info.get("name") or user_info["email"],
                 google_id=user_info["sub"],
             )
-            user = UserService.create(db, user_create)
+            user = await UserService.create(db, user_create)
 
     # Create access token
     access_token = create_access_token(data={"sub": user.id, "email": user.email})
@@ -69,14 +70,9 @@ async def google_auth(
     )
 
 
-@router.get("/me")
-async def get_current_user(
-    # TODO: Add authentication dependency
-    db: Session = Depends(get_db),
+@router.get("/me", response_model=UserResponse)
+async def read_current_user(
+    current_user: UserResponse = Depends(get_current_user),
 ):
     """Get current authenticated user"""
-    # TODO: Implement JWT verification
-    raise HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Not implemented",
-    )
+    return current_user
@@ -1,49 +1,72 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from core.database import get_db
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.auth import get_current_user
+from core.database import get_async_db
+from core.etag import etag_matches, not_modified
+from core.serialization import RawJSONResponse, RowEncoder
 from schemas.draft import DraftCreate, DraftUpdate, DraftResponse, DraftListResponse
+from schemas.user import UserResponse
 from services.draft_service import DraftService
+from typing import Optional
 
 router = APIRouter()
 
+_draft_encoder = RowEncoder(DraftResponse)
+_list_encoder = RowEncoder(DraftListResponse)
+
 
 @router.get("/", response_model=DraftListResponse)
 async def get_user_drafts(
-    db: Session = Depends(get_db),
-    # TODO: Get user_id from authentication
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserResponse = Depends(get_current_user),
 ):
-    """Get all drafts for current user"""
-    # Mock user_id for now
-    user_id = "user-1"
-    drafts = DraftService.get_user_drafts(db, user_id)
-    return DraftListResponse(items=drafts, total=len(drafts))
+    """Get all drafts for current user, or 304 if If-None-Match is current"""
+    drafts = await DraftService.get_user_drafts(db, current_user.id)
+    etag = DraftService.list_etag(drafts)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    body = _list_encoder.dumps({"items": drafts, "total": len(drafts)})
+    return RawJSONResponse(body, headers={"ETag": etag})
 
 
 @router.get("/{draft_id}", response_model=DraftResponse)
 async def get_draft(
     draft_id: str,
-    db: Session = Depends(get_db),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """Get draft by ID"""
-    draft = DraftService.get_by_id(db, draft_id)
+    """
+    Get draft by ID
+
+    Answers 304 when If-None-Match names the current ETag, which is
+    checked from updated_at without loading the draft.
+    """
+    if if_none_match:
+        etag = await DraftService.get_etag(db, draft_id)
+        if etag and etag_matches(if_none_match, etag):
+            return not_modified(etag)
+    draft = await DraftService.get_by_id(db, draft_id)
     if not draft:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Draft not found",
         )
-    return draft
+    etag = DraftService.etag(draft.id, draft.updated_at)
+    return RawJSONResponse(_draft_encoder.dumps(draft), headers={"ETag": etag})
 
 
 @router.post("/", response_model=DraftResponse, status_code=status.HTTP_201_CREATED)
 async def create_draft(
     draft_create: DraftCreate,
-    db: Session = Depends(get_db),
-    # TODO: Get user_id from authentication
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserResponse = Depends(get_current_user),
 ):
-    """Create new draft"""
-    # Mock user_id for now
-    user_id = "user-1"
-    draft = DraftService.create(db, user_id, draft_create)
+    """Create new draft as the authenticated user"""
+    try:
+        draft = await DraftService.create(db, current_user.id, draft_create)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     return draft
 
 
@@ -51,11 +74,14 @@ async def create_draft(
 async def update_draft(
     draft_id: str,
     draft_update: DraftUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     # TODO: Add authentication - verify user owns the draft
 ):
     """Update draft"""
-    draft = DraftService.update(db, draft_id, draft_update)
+    try:
+        draft = await DraftService.update(db, draft_id, draft_update)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     if not draft:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -67,11 +93,11 @@ async def update_draft(
 @router.delete("/{draft_id}")
 async def delete_draft(
     draft_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     # TODO: Add authentication - verify user owns the draft
 ):
     """Delete draft"""
-    success = DraftService.delete(db, draft_id)
+    success = await DraftService.delete(db, draft_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
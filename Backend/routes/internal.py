@@ -0,0 +1,76 @@
+import os
+from fastapi import APIRouter, Depends
+from core.auth import require_internal_token
+from core.database import async_engine, engine
+from core.pool_metrics import pool_stats
+from services.admission import generation_admission
+from services.feed_cache import feed_cache
+from services.garment_fetcher import garment_fetcher
+from services.ai_service import generation_flights
+from services.generation_cache import generation_cache
+from services.job_queue import generation_jobs
+from services.trending import trending
+
+# Operational stats; callers send X-Internal-Token (see INTERNAL_API_TOKEN)
+router = APIRouter(dependencies=[Depends(require_internal_token)])
+
+
+@router.get("/pool")
+async def get_pool_stats():
+    """
+    Connection pool occupancy and checkout wait times for this worker
+
+    Each uvicorn worker has its own pools, so pid identifies which
+    process answered.
+    """
+    return {
+        "pid": os.getpid(),
+        "pools": {
+            "async": pool_stats(async_engine.pool),
+            "sync": pool_stats(engine.pool),
+        },
+    }
+
+
+@router.get("/feed-cache")
+async def get_feed_cache_stats():
+    """Feed cache hit/miss counters for this worker, for tuning the TTL"""
+    return {"pid": os.getpid(), **feed_cache.stats()}
+
+
+@router.get("/ai-jobs")
+async def get_ai_job_stats():
+    """Generation queue depth and worker count for this worker process"""
+    return {
+        "pid": os.getpid(),
+        "workers": generation_jobs.workers,
+        "queue_depth": generation_jobs.depth,
+    }
+
+
+@router.get("/generation-cache")
+async def get_generation_cache_stats():
+    """Generation cache hit rates for this worker process"""
+    return {
+        "pid": os.getpid(),
+        **generation_cache.stats(),
+        "single_flight": generation_flights.stats(),
+    }
+
+
+@router.get("/garment-fetcher")
+async def get_garment_fetcher_stats():
+    """Garment image cache and download counters for this worker process"""
+    return {"pid": os.getpid(), **garment_fetcher.stats()}
+
+
+@router.get("/admission")
+async def get_admission_stats():
+    """Generation admission counters and slot occupancy for this worker"""
+    return {"pid": os.getpid(), **generation_admission.stats()}
+
+
+@router.get("/trending")
+async def get_trending_stats():
+    """Trending ranking size and recompute counters for this worker"""
+    return {"pid": os.getpid(), **trending.stats()}
@@ -1,58 +1,149 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from core.database import get_db
-from schemas.post import PostCreate, PostUpdate, PostResponse, PostListResponse
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.auth import get_current_user
+from core.database import get_async_db
+from core.etag import etag_matches, not_modified
+from core.pagination import MAX_BATCH_IDS, parse_ids
+from core.serialization import RawJSONResponse, RowEncoder
+from schemas.post import (
+    PostBatchResponse,
+    PostCreate,
+    PostUpdate,
+    PostResponse,
+    PostListResponse,
+)
+from schemas.user import UserResponse
 from services.post_service import PostService
-from typing import Optional
+from services.feed_service import FeedService
+from typing import List, Literal, Optional
 
 router = APIRouter()
 
+_post_encoder = RowEncoder(PostResponse)
+_batch_encoder = RowEncoder(PostBatchResponse)
+
 
 @router.get("/", response_model=PostListResponse)
 async def get_posts(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     user_id: Optional[str] = None,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    tags: Optional[List[str]] = Query(None, description="Posts with all of these tags"),
+    any_tags: Optional[List[str]] = Query(None, description="Posts with any of these tags"),
+    feed: Literal["recent", "trending"] = Query(
+        "recent", description="'recent' (newest first) or 'trending'"
+    ),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Get all posts with pagination
+
+    Pass the previous response's next_cursor as cursor to page by keyset,
+    which costs the same at any depth. page is kept for older clients.
+    feed=trending pages by page only and takes no filters. Answers 304
+    when If-None-Match names the page's current ETag.
+    """
+    if feed == "trending":
+        if cursor or user_id or tags or any_tags:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="The trending feed takes no cursor or filters",
+            )
+        etag, body = await FeedService.get_trending_page(
+            db, page=page, page_size=page_size, if_none_match=if_none_match
+        )
+        if body is None:
+            return not_modified(etag)
+        return RawJSONResponse(body, headers={"ETag": etag})
+
+    try:
+        etag, body = await FeedService.get_page(
+            db,
+            page=page,
+            page_size=page_size,
+            user_id=user_id,
+            cursor=cursor,
+            tags=tags,
+            any_tags=any_tags,
+            if_none_match=if_none_match,
+        )
+    except ValueError as e:
+        # A malformed cursor, or tag filters the database cannot run
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    if body is None:
+        return not_modified(etag)
+    return RawJSONResponse(body, headers={"ETag": etag})
+
+
+@router.get("/batch", response_model=PostBatchResponse)
+async def get_posts_batch(
+    ids: List[str] = Query(
+        [], description=f"Post ids, comma-separated or repeated, max {MAX_BATCH_IDS}"
+    ),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """Get all posts with pagination"""
-    skip = (page - 1) * page_size
-    posts, total = PostService.get_all(db, skip=skip, limit=page_size, user_id=user_id)
-
-    return PostListResponse(
-        items=posts,
-        page=page,
-        page_size=page_size,
-        total=total,
-        has_more=skip + len(posts) < total,
+    """Get several posts by ID with one query, in the order requested"""
+    try:
+        post_ids = parse_ids(ids)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    posts = await PostService.get_by_ids(db, post_ids)
+    found = {post.id for post in posts}
+    return RawJSONResponse(
+        _batch_encoder.dumps(
+            {
+                "items": posts,
+                "missing": [post_id for post_id in post_ids if post_id not in found],
+            }
+        )
     )
 
 
 @router.get("/{post_id}", response_model=PostResponse)
 async def get_post(
     post_id: str,
-    db: Session = Depends(get_db),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """Get post by ID"""
-    post = PostService.get_by_id(db, post_id)
+    """
+    Get post by ID
+
+    Answers 304 when If-None-Match names the current ETag, which is
+    checked from two timestamps without loading the post.
+    """
+    if if_none_match:
+        etag = await PostService.get_etag(db, post_id)
+        if etag and etag_matches(if_none_match, etag):
+            return not_modified(etag)
+    post = await PostService.get_by_id(db, post_id)
     if not post:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Post not found",
         )
-    return post
+    etag = PostService.etag(post.id, post.updated_at, post.user.updated_at)
+    return RawJSONResponse(_post_encoder.dumps(post), headers={"ETag": etag})
 
 
 @router.post("/", response_model=PostResponse, status_code=status.HTTP_201_CREATED)
 async def create_post(
     post_create: PostCreate,
-    db: Session = Depends(get_db),
-    # TODO: Get user_id from authentication
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserResponse = Depends(get_current_user),
 ):
-    """Create new post"""
-    # Mock user_id for now
-    user_id = "user-1"
-    post = PostService.create(db, user_id, post_create)
+    """Create new post as the authenticated user"""
+    try:
+        post = await PostService.create(db, current_user.id, post_create)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     return post
 
 
@@ -60,11 +151,11 @@ async def create_post(
 async def update_post(
     post_id: str,
     post_update: PostUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     # TODO: Add authentication - verify user owns the post
 ):
     """Update post"""
-    post = PostService.update(db, post_id, post_update)
+    post = await PostService.update(db, post_id, post_update)
     if not post:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -76,11 +167,11 @@ async def update_post(
 @router.delete("/{post_id}")
 async def delete_post(
     post_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     # TODO: Add authentication - verify user owns the post
 ):
     """Delete post"""
-    success = PostService.delete(db, post_id)
+    success = await PostService.delete(db, post_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -92,10 +183,10 @@ async def delete_post(
 @router.post("/{post_id}/like", response_model=PostResponse)
 async def like_post(
     post_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Like a post"""
-    post = PostService.like_post(db, post_id)
+    post = await PostService.like_post(db, post_id)
     if not post:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -107,10 +198,10 @@ async def like_post(
 @router.post("/{post_id}/save", response_model=PostResponse)
 async def save_post(
     post_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Save a post"""
-    post = PostService.save_post(db, post_id)
+    post = await PostService.save_post(db, post_id)
     if not post:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
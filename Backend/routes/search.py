@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.database import get_async_db
+from schemas.search import SearchResponse
+from services.search_service import SearchService
+
+router = APIRouter()
+
+
+@router.get("/", response_model=SearchResponse)
+async def search(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Search posts, tags and creators
+
+    The last word of q matches as a prefix, so this can be called on
+    every keystroke of the header search bar.
+    """
+    return await SearchService.search(db, q, limit)
@@ -0,0 +1,74 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from core.auth import get_current_user
+from core.config import settings
+from schemas.upload import UploadResponse
+from schemas.user import UserResponse
+from services.upload_service import UploadService, UploadError, UploadTooLargeError
+
+router = APIRouter()
+
+# Allowance for multipart boundaries and part headers around the file
+MULTIPART_OVERHEAD = 64 * 1024
+
+UPLOAD_REQUEST_BODY = {
+    "content": {
+        "multipart/form-data": {
+            "schema": {
+                "type": "object",
+                "properties": {"file": {"type": "string", "format": "binary"}},
+                "required": ["file"],
+            }
+        }
+    },
+    "required": True,
+}
+
+
+@router.post(
+    "/",
+    response_model=UploadResponse,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra={"requestBody": UPLOAD_REQUEST_BODY},
+)
+async def upload_image(
+    request: Request,
+    current_user: UserResponse = Depends(get_current_user),
+):
+    """
+    Upload an image as multipart/form-data
+
+    The body is streamed straight to disk, so memory use does not grow
+    with file size. The returned id can be sent as user_image_id to
+    /api/ai endpoints or image_id when creating a draft.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit():
+        if int(content_length) > settings.MAX_FILE_SIZE + MULTIPART_OVERHEAD:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail="File too large",
+            )
+
+    try:
+        image_id, metadata = await UploadService.save_multipart(
+            request.headers.get("content-type", ""), request.stream()
+        )
+    except UploadTooLargeError:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="File too large",
+        )
+    except UploadError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+
+    return UploadResponse(
+        id=image_id,
+        url=UploadService.url_for(image_id),
+        size=metadata.size,
+        format=metadata.format,
+        width=metadata.width,
+        height=metadata.height,
+    )
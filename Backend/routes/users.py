@@ -1,52 +1,105 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from core.database import get_db
-from schemas.user import UserResponse, UserUpdate, UserProfile
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.database import get_async_db
+from core.etag import etag_matches, not_modified
+from core.pagination import MAX_BATCH_IDS, parse_ids
+from core.serialization import RawJSONResponse, RowEncoder
+from schemas.user import UserBatchResponse, UserResponse, UserUpdate, UserProfile
 from services.user_service import UserService
-from typing import Optional
+from typing import List, Optional
 
 router = APIRouter()
 
+_user_encoder = RowEncoder(UserResponse)
+_batch_encoder = RowEncoder(UserBatchResponse)
+
+
+@router.get("/batch", response_model=UserBatchResponse)
+async def get_users_batch(
+    ids: List[str] = Query(
+        [], description=f"User ids, comma-separated or repeated, max {MAX_BATCH_IDS}"
+    ),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Get several users by ID with one query, in the order requested"""
+    try:
+        user_ids = parse_ids(ids)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    users = await UserService.get_by_ids(db, user_ids)
+    found = {user.id for user in users}
+    return RawJSONResponse(
+        _batch_encoder.dumps(
+            {
+                "items": users,
+                "missing": [user_id for user_id in user_ids if user_id not in found],
+            }
+        )
+    )
+
+
+def _user_response(user) -> RawJSONResponse:
+    etag = UserService.etag(user.id, user.updated_at)
+    return RawJSONResponse(_user_encoder.dumps(user), headers={"ETag": etag})
+
 
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(
     user_id: str,
-    db: Session = Depends(get_db),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """Get user by ID"""
-    user = UserService.get_by_id(db, user_id)
+    """
+    Get user by ID
+
+    Answers 304 when If-None-Match names the current ETag, which is
+    checked from updated_at without loading the user.
+    """
+    if if_none_match:
+        etag = await UserService.get_etag(db, user_id=user_id)
+        if etag and etag_matches(if_none_match, etag):
+            return not_modified(etag)
+    user = await UserService.get_by_id(db, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found",
         )
-    return user
+    return _user_response(user)
 
 
 @router.get("/username/{username}", response_model=UserResponse)
 async def get_user_by_username(
     username: str,
-    db: Session = Depends(get_db),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """Get user by username"""
-    user = UserService.get_by_username(db, username)
+    """Get user by username, with the same ETag handling as by ID"""
+    if if_none_match:
+        etag = await UserService.get_etag(db, username=username)
+        if etag and etag_matches(if_none_match, etag):
+            return not_modified(etag)
+    user = await UserService.get_by_username(db, username)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found",
         )
-    return user
+    return _user_response(user)
 
 
 @router.put("/{user_id}", response_model=UserResponse)
 async def update_user(
     user_id: str,
     user_update: UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     # TODO: Add authentication - verify user is updating their own profile
 ):
     """Update user profile"""
-    user = UserService.update(db, user_id, user_update)
+    user = await UserService.update(db, user_id, user_update)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -58,11 +111,11 @@ async def update_user(
 @router.delete("/{user_id}")
 async def delete_user(
     user_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     # TODO: Add authentication - verify user is deleting their own account
 ):
     """Delete user account"""
-    success = UserService.delete(db, user_id)
+    success = await UserService.delete(db, user_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
 from typing import Optional, List, Dict, Any
+from datetime import datetime
 from schemas.draft import Garment
 
 
@@ -10,10 +11,17 @@ class StyleParams(BaseModel):
 
 
 class AIGenerationRequest(BaseModel):
-    user_image: str  # Base64 or URL
+    user_image: Optional[str] = None  # Base64 or URL
+    user_image_id: Optional[str] = None  # id from POST /api/uploads
     garments: List[Garment]
     style_params: Optional[StyleParams] = None
 
+    @model_validator(mode="after")
+    def check_image_source(self):
+        if not self.user_image and not self.user_image_id:
+            raise ValueError("Provide user_image or user_image_id")
+        return self
+
 
 class AIGenerationResponse(BaseModel):
     image_url: str
@@ -21,3 +29,13 @@ class AIGenerationResponse(BaseModel):
     processing_time: float
     success: bool = True
     message: Optional[str] = None
+    cached: bool = False  # served from the generation cache
+
+
+class AIJobResponse(BaseModel):
+    id: str
+    status: str  # 'queued', 'running', 'succeeded', 'failed', 'timed_out'
+    result: Optional[AIGenerationResponse] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
@@ -1,6 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
 from typing import Optional, List, Dict, Any
 from datetime import datetime
+from schemas.post import ImageVariant
 
 
 class Garment(BaseModel):
@@ -17,15 +18,23 @@ class DraftBase(BaseModel):
 
 
 class DraftCreate(DraftBase):
-    image_url: str
+    image_url: Optional[str] = None
+    image_id: Optional[str] = None  # id from POST /api/uploads
     garments: List[Garment] = []
     style_params: Dict[str, Any] = {}
 
+    @model_validator(mode="after")
+    def check_image_source(self):
+        if not self.image_url and not self.image_id:
+            raise ValueError("Provide image_url or image_id")
+        return self
+
 
 class DraftUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
     image_url: Optional[str] = None
+    image_id: Optional[str] = None  # id from POST /api/uploads
     garments: Optional[List[Garment]] = None
     style_params: Optional[Dict[str, Any]] = None
 
@@ -34,6 +43,8 @@ class DraftResponse(DraftBase):
     id: str
     user_id: str
     image_url: str
+    # Resized copies by format, widest first; null until rendered
+    image_variants: Optional[Dict[str, List[ImageVariant]]] = None
     garments: List[Garment]
     style_params: Dict[str, Any]
     created_at: datetime
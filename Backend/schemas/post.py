@@ -1,9 +1,14 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 from schemas.user import UserResponse
 
 
+class ImageVariant(BaseModel):
+    width: int
+    url: str
+
+
 class PostBase(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
@@ -26,6 +31,13 @@ class PostResponse(PostBase):
     user_id: str
     user: UserResponse
     image_url: str
+    # Resized copies by format ('avif', 'webp', 'jpeg'), widest first
+    image_variants: Optional[Dict[str, List[ImageVariant]]] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    aspect_ratio: Optional[float] = None
+    dominant_color: Optional[str] = None
+    blurhash: Optional[str] = None
     likes: int
     saves: int
     is_ai_generated: bool
@@ -41,3 +53,9 @@ class PostListResponse(BaseModel):
     page_size: int
     total: int
     has_more: bool
+    next_cursor: Optional[str] = None
+
+
+class PostBatchResponse(BaseModel):
+    items: List[PostResponse]  # in the order the ids were given
+    missing: List[str] = []  # requested ids with no post
@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from typing import List
+from schemas.post import PostResponse
+from schemas.user import UserResponse
+
+
+class TagMatch(BaseModel):
+    tag: str
+    count: int
+
+
+class SearchResponse(BaseModel):
+    query: str
+    posts: List[PostResponse]
+    users: List[UserResponse]
+    tags: List[TagMatch]
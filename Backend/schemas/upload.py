@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+
+
+class ImageMetadata(BaseModel):
+    format: str  # 'jpeg', 'png', 'gif', 'webp'
+    width: int
+    height: int
+    orientation: int = 1  # EXIF orientation, 1-8
+    size: int  # bytes
+
+
+class UploadResponse(BaseModel):
+    id: str  # reference this as user_image_id / image_id
+    url: str
+    size: int
+    format: str
+    width: int
+    height: int
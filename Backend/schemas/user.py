@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -30,6 +30,11 @@ class UserResponse(UserBase):
         from_attributes = True
 
 
+class UserBatchResponse(BaseModel):
+    items: List[UserResponse]  # in the order the ids were given
+    missing: List[str] = []  # requested ids with no user
+
+
 class UserProfile(UserResponse):
     posts_count: int = 0
     drafts_count: int = 0
@@ -0,0 +1,272 @@
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+from core.config import settings
+from typing import AsyncIterator, Dict, Optional, Sequence, Tuple
+
+GLOBAL_KEY = "*"
+
+# Atomic take from several token buckets: refill each from elapsed time,
+# then take one token from every bucket, or from none if any is empty.
+# KEYS buckets; ARGV now, then rate and burst per bucket.
+# Returns {position of the first empty bucket or 0, seconds until it has a token}.
+TOKEN_BUCKET_SCRIPT = """
+local now = tonumber(ARGV[1])
+local tokens, rates, bursts = {}, {}, {}
+local refused = 0
+for i = 1, #KEYS do
+  local rate, burst = tonumber(ARGV[2 * i]), tonumber(ARGV[2 * i + 1])
+  local state = redis.call('HMGET', KEYS[i], 'tokens', 'at')
+  local at = tonumber(state[2]) or now
+  local stored = tonumber(state[1]) or burst
+  tokens[i] = math.min(burst, stored + math.max(0, now - at) * rate)
+  rates[i], bursts[i] = rate, burst
+  if refused == 0 and tokens[i] < 1 then
+    refused = i
+  end
+end
+for i = 1, #KEYS do
+  if refused == 0 then
+    tokens[i] = tokens[i] - 1
+  end
+  redis.call('HSET', KEYS[i], 'tokens', tokens[i], 'at', now)
+  if rates[i] > 0 then
+    redis.call('EXPIRE', KEYS[i], math.ceil(bursts[i] / rates[i]) + 1)
+  end
+end
+if refused == 0 then
+  return {0, '0'}
+end
+return {refused, tostring((1 - tokens[refused]) / rates[refused])}
+"""
+
+# (key, rate, burst) of one token bucket
+Bucket = Tuple[str, float, int]
+
+# Seconds between sweeps of refilled in-memory buckets
+SWEEP_INTERVAL = 60.0
+# Longest Retry-After sent, also for a bucket that never refills (rate 0)
+MAX_RETRY_AFTER = 3600
+
+
+def _refill_seconds(tokens: float, rate: float, level: float) -> float:
+    """Seconds until a bucket holding tokens is back up to level"""
+    if tokens >= level:
+        return 0.0
+    return (level - tokens) / rate if rate > 0 else math.inf
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is over a limit; retry_after is in seconds"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class MemoryBucketBackend:
+    """
+    In-process token buckets; each worker enforces its share of the rates
+
+    A bucket that has refilled to its burst behaves like a missing one, so
+    every sweep_interval seconds a take drops those.
+    """
+
+    def __init__(self, sweep_interval: float = SWEEP_INTERVAL):
+        self.sweep_interval = sweep_interval
+        # key: (tokens, time of the last take, time it is full again)
+        self._buckets: Dict[str, Tuple[float, float, float]] = {}
+        self._next_sweep = time.monotonic() + sweep_interval
+
+    async def take(self, buckets: Sequence[Bucket]) -> Tuple[Optional[int], float]:
+        """
+        Take one token from every bucket, or from none if any is empty
+
+        Returns the position of the first empty bucket, None if the tokens
+        were taken, and the seconds until that bucket has a token.
+        """
+        now = time.monotonic()
+        levels = []
+        refused = None
+        for position, (key, rate, burst) in enumerate(buckets):
+            tokens, at, _ = self._buckets.get(key, (burst, now, now))
+            tokens = min(burst, tokens + (now - at) * rate)
+            levels.append(tokens)
+            if refused is None and tokens < 1:
+                refused = position
+        for (key, rate, burst), tokens in zip(buckets, levels):
+            if refused is None:
+                tokens -= 1
+            full_at = now + _refill_seconds(tokens, rate, burst)
+            self._buckets[key] = (tokens, now, full_at)
+        if now >= self._next_sweep:
+            self._sweep(now)
+        if refused is None:
+            return None, 0.0
+        _, rate, _ = buckets[refused]
+        return refused, _refill_seconds(levels[refused], rate, 1)
+
+    def _sweep(self, now: float) -> None:
+        self._buckets = {
+            key: bucket for key, bucket in self._buckets.items() if bucket[2] > now
+        }
+        self._next_sweep = now + self.sweep_interval
+
+
+class RedisBucketBackend:
+    """
+    Token buckets shared by all workers, one Lua call per check
+
+    Requires the optional 'redis' package.
+    """
+
+    def __init__(self, url: str):
+        try:
+            from redis import asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("ADMISSION_BACKEND=redis requires 'redis'") from e
+        self._client = redis.from_url(url)
+        self._script = self._client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def take(self, buckets: Sequence[Bucket]) -> Tuple[Optional[int], float]:
+        args = [time.time()]
+        for _, rate, burst in buckets:
+            args += [rate, burst]
+        refused, wait = await self._script(
+            keys=[f"admission:{key}" for key, _, _ in buckets], args=args
+        )
+        return (int(refused) - 1 if refused else None), float(wait)
+
+
+class AdmissionController:
+    """
+    Admission control for generation requests
+
+    A request must take a token from the global bucket and from its user's
+    bucket, both or neither, so a rejection by one never spends a token of
+    the other. It then needs one of max_in_flight slots. One user may hold
+    at most max_in_flight_per_user of them, counting requests still
+    waiting for a slot. When every slot is busy, up to max_queued requests
+    wait up to queue_timeout seconds for one; anything else is rejected at
+    once, so an abusive client is turned away in microseconds and cannot
+    push well-behaved users' latency up.
+
+    Buckets can live in Redis to be shared across workers; slots are
+    always per process.
+    """
+
+    def __init__(
+        self,
+        backend,
+        user_rate: float,
+        user_burst: int,
+        global_rate: float,
+        global_burst: int,
+        max_in_flight: int,
+        max_in_flight_per_user: int,
+        max_queued: int,
+        queue_timeout: float,
+    ):
+        self.backend = backend
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.global_rate = global_rate
+        self.global_burst = global_burst
+        self.max_in_flight = max_in_flight
+        self.max_in_flight_per_user = max_in_flight_per_user
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.Semaphore(max_in_flight)
+        # Slots held or waited for, per user
+        self._reserved_by_user: Dict[str, int] = {}
+        self._queued = 0
+        self.admitted = 0
+        self.queued = 0
+        self.rejected: Dict[str, int] = {}
+
+    async def check_rate(self, user_key: str) -> None:
+        """Take a token from the global and the user's bucket"""
+        refused, wait = await self.backend.take(
+            [
+                (GLOBAL_KEY, self.global_rate, self.global_burst),
+                (user_key, self.user_rate, self.user_burst),
+            ]
+        )
+        if refused is not None:
+            self._reject(("global_rate", "user_rate")[refused], wait)
+
+    @asynccontextmanager
+    async def slot(self, user_key: str) -> AsyncIterator[None]:
+        """Hold one in-flight generation slot for the duration of the block"""
+        reserved = self._reserved_by_user.get(user_key, 0)
+        if reserved >= self.max_in_flight_per_user:
+            self._reject("user_in_flight", self.queue_timeout)
+        if self._slots.locked() and self._queued >= self.max_queued:
+            self._reject("in_flight", self.queue_timeout)
+
+        # Reserved before waiting, so one user's requests cannot all queue
+        # and then take every slot that frees up
+        self._reserved_by_user[user_key] = reserved + 1
+        try:
+            if self._slots.locked():
+                self._queued += 1
+                self.queued += 1
+                try:
+                    await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+                except asyncio.TimeoutError:
+                    self._reject("queue_timeout", self.queue_timeout)
+                finally:
+                    self._queued -= 1
+            else:
+                await self._slots.acquire()
+
+            self.admitted += 1
+            try:
+                yield
+            finally:
+                self._slots.release()
+        finally:
+            remaining = self._reserved_by_user[user_key] - 1
+            if remaining:
+                self._reserved_by_user[user_key] = remaining
+            else:
+                del self._reserved_by_user[user_key]
+
+    def _reject(self, reason: str, retry_after: float) -> None:
+        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+        raise AdmissionRejected(reason, retry_after)
+
+    def stats(self) -> dict:
+        return {
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": dict(self.rejected),
+            "in_flight": self.max_in_flight - self._slots._value,
+            "waiting": self._queued,
+        }
+
+
+def retry_after_header(retry_after: float) -> str:
+    """Retry-After value: whole seconds, at least one"""
+    return str(max(1, math.ceil(min(retry_after, MAX_RETRY_AFTER))))
+
+
+def _build_backend():
+    if settings.ADMISSION_BACKEND == "redis":
+        return RedisBucketBackend(settings.ADMISSION_URL)
+    return MemoryBucketBackend()
+
+
+generation_admission = AdmissionController(
+    _build_backend(),
+    user_rate=settings.AI_USER_RATE,
+    user_burst=settings.AI_USER_BURST,
+    global_rate=settings.AI_GLOBAL_RATE,
+    global_burst=settings.AI_GLOBAL_BURST,
+    max_in_flight=settings.AI_MAX_IN_FLIGHT,
+    max_in_flight_per_user=settings.AI_MAX_IN_FLIGHT_PER_USER,
+    max_queued=settings.AI_ADMISSION_MAX_QUEUED,
+    queue_timeout=settings.AI_ADMISSION_QUEUE_TIMEOUT,
+)
@@ -1,12 +1,63 @@
+import asyncio
 import time
 from schemas.ai import AIGenerationRequest, AIGenerationResponse
+from schemas.upload import ImageMetadata
+from core.database import AsyncSessionLocal
+from core.single_flight import SingleFlight
+from services.blob_ref_service import BlobRefService, OWNER_GENERATION
+from services.garment_fetcher import garment_fetcher
+from services.generation_cache import generation_cache, generation_key
+from services.image_validation import decode_base64_image, inspect_image
+from services.upload_service import UploadService
 from typing import Optional
 
+# Identical generations in flight at the same time share one model call
+generation_flights = SingleFlight()
+
 
 class AIService:
     @staticmethod
     async def generate_outfit(
         request: AIGenerationRequest,
+    ) -> AIGenerationResponse:
+        """
+        Generate AI outfit, reusing the result of an identical earlier request
+
+        Requests are identified by a canonical hash of the image bytes,
+        garments and style params; cache hits come back with cached=True.
+        Concurrent duplicates of a request that is still generating wait
+        for that generation instead of starting their own.
+        """
+        # Hashing a multi-megabyte image stays off the event loop
+        key = await asyncio.to_thread(generation_key, request)
+        cached = await generation_cache.get(key)
+        if cached is not None:
+            return cached
+
+        return await generation_flights.do(
+            key, lambda: AIService._generate_and_cache(key, request)
+        )
+
+    @staticmethod
+    async def _generate_and_cache(
+        key: str, request: AIGenerationRequest
+    ) -> AIGenerationResponse:
+        result = await AIService._run_generation(request)
+        if result.success:
+            await generation_cache.set(key, result)
+            # Uploads behind a cached result live as long as the cache entry
+            urls = [result.image_url]
+            if request.user_image_id:
+                urls.append(UploadService.url_for(request.user_image_id))
+            if BlobRefService.blob_ids(urls):
+                async with AsyncSessionLocal() as db:
+                    await BlobRefService.replace(db, OWNER_GENERATION, key, urls)
+                    await db.commit()
+        return result
+
+    @staticmethod
+    async def _run_generation(
+        request: AIGenerationRequest,
     ) -> AIGenerationResponse:
         """
         Generate AI outfit based on user image and garments
@@ -16,12 +67,18 @@ class AIService:
         """
         start_time = time.time()
 
+        # Garment images are shared across generations, so most come from
+        # the fetcher's cache; the rest download in parallel
+        garment_images = await garment_fetcher.fetch_all(
+            [g.image_url for g in request.garments]
+        )
+
         # Simulate AI processing time
         await asyncio.sleep(2)
 
         # TODO: Call actual AI API here
         # Example:
-        # - Send user_image and garments to AI service
+        # - Send user_image and garment_images to AI service
         # - Receive generated image
         # - Upload to cloud storage (S3, Cloudinary, etc.)
         # - Return image URL
@@ -38,16 +95,15 @@ class AIService:
         )
 
     @staticmethod
-    async def validate_image(image_data: str) -> bool:
+    async def validate_image(image_data: str) -> ImageMetadata:
         """
-        Validate uploaded image
+        Validate a base64 image from its header alone
 
-        TODO: Implement actual validation
-        - Check file size
-        - Check image dimensions
-        - Check file format
+        Checks size, format, dimensions and the decompression-bomb pixel
+        limit without decoding pixels, in a worker thread. Returns the
+        image's metadata; raises ValueError if it is not acceptable.
         """
-        return True
-
+        return await asyncio.to_thread(
+            lambda: inspect_image(decode_base64_image(image_data))
+        )
 
-import asyncio
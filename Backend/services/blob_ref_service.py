@@ -0,0 +1,211 @@
+import os
+import time
+from pathlib import Path
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.blob_ref import BlobRef
+from models.draft import Draft
+from models.post import Post
+from services.generation_cache import generation_cache
+from services.upload_service import UploadService
+from typing import Iterable, Optional, Set, Tuple
+
+OWNER_POST = "post"
+OWNER_DRAFT = "draft"
+OWNER_GENERATION = "generation"
+
+
+class BlobRefService:
+    """
+    Reference counts on uploaded blobs
+
+    Uploads are stored once per content hash, so several posts, drafts and
+    cached generations can share a file. Each of them holds a BlobRef row;
+    collect_garbage deletes blobs nobody references any more.
+    """
+
+    @staticmethod
+    def blob_ids(urls: Iterable[Optional[str]]) -> Set[str]:
+        """Upload ids behind the local URLs among urls"""
+        return {
+            blob_id
+            for blob_id in (UploadService.id_from_url(url) for url in urls if url)
+            if blob_id
+        }
+
+    @staticmethod
+    def add(
+        db: AsyncSession, owner_type: str, owner_id: str, urls: Iterable[Optional[str]]
+    ) -> None:
+        """
+        Reference the uploads among urls from a new owner
+
+        Raises ValueError if one of them no longer exists.
+        """
+        blob_ids = BlobRefService.blob_ids(urls)
+        BlobRefService._touch(blob_ids)
+        db.add_all(
+            BlobRef(blob_id=blob_id, owner_type=owner_type, owner_id=owner_id)
+            for blob_id in blob_ids
+        )
+
+    @staticmethod
+    async def replace(
+        db: AsyncSession, owner_type: str, owner_id: str, urls: Iterable[Optional[str]]
+    ) -> None:
+        """
+        Make an existing owner's references exactly the uploads among urls
+
+        Raises ValueError if a newly referenced one no longer exists.
+        """
+        wanted = BlobRefService.blob_ids(urls)
+        owned = (BlobRef.owner_type == owner_type) & (BlobRef.owner_id == owner_id)
+        await db.execute(delete(BlobRef).where(owned, BlobRef.blob_id.not_in(wanted)))
+        result = await db.execute(select(BlobRef.blob_id).where(owned))
+        existing = set(result.scalars())
+        BlobRefService._touch(wanted - existing)
+        db.add_all(
+            BlobRef(blob_id=blob_id, owner_type=owner_type, owner_id=owner_id)
+            for blob_id in wanted - existing
+        )
+
+    @staticmethod
+    def _touch(blob_ids: Iterable[str]) -> None:
+        """
+        Restart the GC grace period of blobs gaining a reference
+
+        Done before the reference is committed, so a collection that has
+        already read the references still sees a fresh mtime and keeps
+        the blob.
+        """
+        for blob_id in blob_ids:
+            if not UploadService.touch(blob_id):
+                raise ValueError(f"Upload {blob_id} does not exist")
+
+    @staticmethod
+    async def drop(db: AsyncSession, owner_type: str, owner_id: str) -> None:
+        """Drop every reference held by a deleted owner"""
+        await db.execute(
+            delete(BlobRef).where(
+                BlobRef.owner_type == owner_type, BlobRef.owner_id == owner_id
+            )
+        )
+
+    @staticmethod
+    async def drop_user(db: AsyncSession, user_id: str) -> None:
+        """Drop the references of a deleted user's posts and drafts"""
+        for owner_type, model in ((OWNER_POST, Post), (OWNER_DRAFT, Draft)):
+            owner_ids = select(model.id).where(model.user_id == user_id)
+            await db.execute(
+                delete(BlobRef).where(
+                    BlobRef.owner_type == owner_type, BlobRef.owner_id.in_(owner_ids)
+                )
+            )
+
+    @staticmethod
+    async def collect_garbage(
+        db: AsyncSession, grace: int, dry_run: bool = False
+    ) -> Tuple[int, int]:
+        """
+        Delete unreferenced blobs, with their variants, and return how many
+        blobs and bytes were freed
+
+        References whose owner no longer exists are dropped first. Blobs
+        written, re-uploaded or newly referenced within the last grace
+        seconds are kept, so an upload that is not referenced yet survives
+        until it is used.
+        """
+        # Owners can disappear without going through a service (cascades,
+        # manual deletes) and generation results expire from their cache
+        for owner_type, model in ((OWNER_POST, Post), (OWNER_DRAFT, Draft)):
+            await db.execute(
+                delete(BlobRef).where(
+                    BlobRef.owner_type == owner_type,
+                    BlobRef.owner_id.not_in(select(model.id)),
+                )
+            )
+        generation_keys = (
+            await db.execute(
+                select(BlobRef.owner_id)
+                .where(BlobRef.owner_type == OWNER_GENERATION)
+                .distinct()
+            )
+        ).scalars()
+        expired = [key for key in generation_keys if not generation_cache.holds(key)]
+        if expired:
+            await db.execute(
+                delete(BlobRef).where(
+                    BlobRef.owner_type == OWNER_GENERATION,
+                    BlobRef.owner_id.in_(expired),
+                )
+            )
+        referenced = set(
+            (await db.execute(select(BlobRef.blob_id).distinct())).scalars()
+        )
+        if dry_run:
+            await db.rollback()
+        else:
+            await db.commit()
+
+        cutoff = time.time() - grace
+        images_dir = UploadService.images_dir()
+        removed = freed = 0
+        for path in list(images_dir.iterdir()):
+            try:
+                if path.stat().st_mtime > cutoff:
+                    continue
+            except FileNotFoundError:
+                # A variant already removed with its original
+                continue
+            if path.name.startswith("."):
+                # Temp file of an upload or variant that never finished
+                freed += path.stat().st_size
+                if not dry_run:
+                    path.unlink(missing_ok=True)
+                continue
+            # Originals only; variants go with their original
+            if UploadService.path_for(path.name) is None or path.name in referenced:
+                continue
+            if dry_run:
+                size = path.stat().st_size
+            else:
+                size = await BlobRefService._delete_unreferenced(db, path, cutoff)
+                if size is None:
+                    continue
+            stem = path.name.rsplit(".", 1)[0]
+            for variant in images_dir.glob(f"{stem}.w*"):
+                size += variant.stat().st_size
+                if not dry_run:
+                    variant.unlink(missing_ok=True)
+            freed += size
+            removed += 1
+        return removed, freed
+
+    @staticmethod
+    async def _delete_unreferenced(
+        db: AsyncSession, path: Path, cutoff: float
+    ) -> Optional[int]:
+        """
+        Delete a blob unless it gained a reference since the scan began;
+        returns its size, or None if it was kept
+
+        Owners touch a blob before committing their reference (see add), so
+        the blob is first renamed away: from then on a new reference fails
+        instead of pointing at a file about to go. A reference that got in
+        before shows as a fresh mtime or, once committed, as a BlobRef row;
+        either puts the blob back.
+        """
+        tombstone = path.with_name(f".{path.name}.gc")
+        try:
+            os.rename(path, tombstone)
+        except FileNotFoundError:
+            return None
+        stat = tombstone.stat()
+        result = await db.execute(
+            select(BlobRef.blob_id).where(BlobRef.blob_id == path.name).limit(1)
+        )
+        if stat.st_mtime > cutoff or result.first() is not None:
+            os.replace(tombstone, path)
+            return None
+        tombstone.unlink()
+        return stat.st_size
@@ -0,0 +1,138 @@
+import asyncio
+import logging
+from collections import defaultdict
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm.attributes import set_committed_value
+from core.config import settings
+from core.database import async_engine
+from models.post import Post
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+COUNTER_FIELDS = ("likes", "saves")
+
+
+class CounterBuffer:
+    """
+    Write-behind buffer for post like/save counters
+
+    Increments are summed in memory per post and written as one batched
+    UPDATE posts SET likes = likes + n, saves = saves + m per flush, either
+    every flush_interval seconds or as soon as flush_threshold increments
+    are pending. Atomic increments keep several workers' buffers correct.
+    A batch being written stays visible to reads until its commit succeeds.
+    """
+
+    def __init__(self, flush_interval: float, flush_threshold: int):
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self._pending: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: dict.fromkeys(COUNTER_FIELDS, 0)
+        )
+        self._pending_total = 0
+        self._in_flight: Dict[str, Dict[str, int]] = {}
+        self._flush_lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def increment(self, post_id: str, field: str, amount: int = 1) -> None:
+        """Buffer an increment of likes or saves for a post"""
+        self._pending[post_id][field] += amount
+        self._pending_total += amount
+        if self._pending_total >= self.flush_threshold:
+            self._wake.set()
+
+    def pending(self, post_id: str) -> Dict[str, int]:
+        """Increments not yet committed to the database for a post"""
+        counts = dict.fromkeys(COUNTER_FIELDS, 0)
+        for buffered in (self._pending, self._in_flight):
+            if post_id in buffered:
+                for field, amount in buffered[post_id].items():
+                    counts[field] += amount
+        return counts
+
+    def apply(self, posts: Iterable[Post]) -> None:
+        """Add pending increments to freshly loaded posts without dirtying them"""
+        for post in posts:
+            if post.id not in self._pending and post.id not in self._in_flight:
+                continue
+            for field, amount in self.pending(post.id).items():
+                set_committed_value(post, field, getattr(post, field) + amount)
+
+    async def flush(self) -> None:
+        """Write all pending increments in one batched UPDATE"""
+        async with self._flush_lock:
+            await self._write()
+
+    async def _write(self) -> None:
+        if not self._pending:
+            return
+
+        self._in_flight, self._pending = self._pending, defaultdict(
+            lambda: dict.fromkeys(COUNTER_FIELDS, 0)
+        )
+        self._pending_total = 0
+
+        table = Post.__table__
+        statement = (
+            update(table)
+            .where(table.c.id == bindparam("post_id"))
+            .values(
+                likes=table.c.likes + bindparam("add_likes"),
+                saves=table.c.saves + bindparam("add_saves"),
+            )
+        )
+        params = [
+            {"post_id": post_id, "add_likes": c["likes"], "add_saves": c["saves"]}
+            for post_id, c in self._in_flight.items()
+        ]
+        committed = False
+        try:
+            async with async_engine.begin() as conn:
+                await conn.execute(statement, params)
+            committed = True
+        except Exception:
+            logger.exception(
+                "Counter flush failed, keeping %d posts", len(self._in_flight)
+            )
+        finally:
+            batch, self._in_flight = self._in_flight, {}
+            if not committed:
+                # Merge back for the next interval without re-triggering a flush
+                for post_id, counts in batch.items():
+                    for field, amount in counts.items():
+                        self._pending[post_id][field] += amount
+                        self._pending_total += amount
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            # Shielded so stopping the loop never abandons a batch mid-write
+            await asyncio.shield(self.flush())
+
+    def start(self) -> None:
+        """Start the periodic flush loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write whatever is still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+post_counters = CounterBuffer(
+    flush_interval=settings.COUNTER_FLUSH_INTERVAL,
+    flush_threshold=settings.COUNTER_FLUSH_THRESHOLD,
+)
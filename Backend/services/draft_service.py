@@ -1,61 +1,139 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.database import AsyncSessionLocal
+from core.etag import make_etag
 from models.draft import Draft
-from schemas.draft import DraftCreate, DraftUpdate
+from schemas.draft import DraftCreate, DraftListResponse, DraftResponse, DraftUpdate
+from services.blob_ref_service import BlobRefService, OWNER_DRAFT
+from services.image_variants import image_variants
+from services.upload_service import UploadService
 from typing import List, Optional
 
 
 class DraftService:
     @staticmethod
-    def get_by_id(db: Session, draft_id: str) -> Optional[Draft]:
+    async def get_by_id(db: AsyncSession, draft_id: str) -> Optional[Draft]:
         """Get draft by ID"""
-        return db.query(Draft).filter(Draft.id == draft_id).first()
+        result = await db.execute(select(Draft).filter(Draft.id == draft_id))
+        return result.scalars().first()
 
     @staticmethod
-    def get_user_drafts(db: Session, user_id: str) -> List[Draft]:
+    def etag(draft_id: str, updated_at) -> str:
+        """ETag of a draft's response"""
+        return make_etag(DraftResponse, [draft_id, updated_at])
+
+    @staticmethod
+    async def get_etag(db: AsyncSession, draft_id: str) -> Optional[str]:
+        """ETag of a draft from its updated_at, without loading the row"""
+        result = await db.execute(
+            select(Draft.updated_at).filter(Draft.id == draft_id)
+        )
+        updated_at = result.scalar()
+        if updated_at is None:
+            return None
+        return DraftService.etag(draft_id, updated_at)
+
+    @staticmethod
+    def list_etag(drafts: List[Draft]) -> str:
+        """ETag of a draft list: its ids and their latest updated_at"""
+        latest = max((draft.updated_at for draft in drafts), default=None)
+        return make_etag(DraftListResponse, [latest, *(draft.id for draft in drafts)])
+
+    @staticmethod
+    async def get_user_drafts(db: AsyncSession, user_id: str) -> List[Draft]:
         """Get all drafts for a user"""
-        return (
-            db.query(Draft)
+        result = await db.execute(
+            select(Draft)
             .filter(Draft.user_id == user_id)
             .order_by(Draft.updated_at.desc())
-            .all()
         )
+        return list(result.scalars().all())
 
     @staticmethod
-    def create(db: Session, user_id: str, draft_data: DraftCreate) -> Draft:
-        """Create new draft"""
+    async def create(db: AsyncSession, user_id: str, draft_data: DraftCreate) -> Draft:
+        """
+        Create new draft, raising ValueError for an unknown image_id
+
+        Image variants are rendered in the background once the draft is
+        committed, so publishing it as a post later finds them on disk.
+        """
         draft_dict = draft_data.model_dump()
         draft_dict["garments"] = [g.model_dump() for g in draft_data.garments]
+        DraftService._resolve_image_id(draft_dict)
         draft = Draft(user_id=user_id, **draft_dict)
         db.add(draft)
-        db.commit()
-        db.refresh(draft)
+        await db.flush()
+        BlobRefService.add(db, OWNER_DRAFT, draft.id, DraftService._image_urls(draft))
+        await db.commit()
+        image_variants.spawn(DraftService.render_image(draft.id, draft.image_url))
         return draft
 
     @staticmethod
-    def update(db: Session, draft_id: str, draft_data: DraftUpdate) -> Optional[Draft]:
-        """Update draft"""
-        draft = DraftService.get_by_id(db, draft_id)
+    async def render_image(draft_id: str, image_url: str) -> None:
+        """Store the image variants of a draft that still shows image_url"""
+        variants = await image_variants.try_generate(image_url)
+        if variants is None:
+            return
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(Draft)
+                .where(Draft.id == draft_id, Draft.image_url == image_url)
+                .values(image_variants=variants)
+            )
+            await db.commit()
+
+    @staticmethod
+    async def update(
+        db: AsyncSession, draft_id: str, draft_data: DraftUpdate
+    ) -> Optional[Draft]:
+        """Update draft, raising ValueError for an unknown image_id"""
+        draft = await DraftService.get_by_id(db, draft_id)
         if not draft:
             return None
 
         update_data = draft_data.model_dump(exclude_unset=True)
         if "garments" in update_data and update_data["garments"]:
             update_data["garments"] = [g.model_dump() for g in update_data["garments"]]
+        DraftService._resolve_image_id(update_data)
+        new_image = update_data.get("image_url", draft.image_url) != draft.image_url
 
         for field, value in update_data.items():
             setattr(draft, field, value)
+        if new_image:
+            draft.image_variants = None
+        if "image_url" in update_data or "garments" in update_data:
+            await BlobRefService.replace(
+                db, OWNER_DRAFT, draft.id, DraftService._image_urls(draft)
+            )
 
-        db.commit()
-        db.refresh(draft)
+        await db.commit()
+        if new_image:
+            image_variants.spawn(DraftService.render_image(draft.id, draft.image_url))
         return draft
 
     @staticmethod
-    def delete(db: Session, draft_id: str) -> bool:
+    async def delete(db: AsyncSession, draft_id: str) -> bool:
         """Delete draft"""
-        draft = DraftService.get_by_id(db, draft_id)
+        draft = await DraftService.get_by_id(db, draft_id)
         if not draft:
             return False
 
-        db.delete(draft)
-        db.commit()
+        await db.delete(draft)
+        await BlobRefService.drop(db, OWNER_DRAFT, draft_id)
+        await db.commit()
         return True
+
+    @staticmethod
+    def _resolve_image_id(data: dict) -> None:
+        """Replace an uploaded image id with the image's URL"""
+        image_id = data.pop("image_id", None)
+        if not image_id:
+            return
+        if UploadService.path_for(image_id) is None:
+            raise ValueError("Unknown image_id")
+        data["image_url"] = UploadService.url_for(image_id)
+
+    @staticmethod
+    def _image_urls(draft: Draft) -> List[str]:
+        """The draft's image and garment image URLs"""
+        return [draft.image_url] + [g.get("image_url") for g in draft.garments or []]
@@ -0,0 +1,133 @@
+import hashlib
+import json
+from core.cache import TTLCache
+from core.config import settings
+from typing import Any, Dict, Optional
+
+GLOBAL_SCOPE = "*"
+
+
+class MemoryCacheBackend:
+    """In-process LRU/TTL backend; each worker holds its own entries"""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self._entries = TTLCache(max_entries, ttl)
+        self._versions: Dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._entries.get(key)
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        self._entries.set(key, value, ttl)
+
+    async def get_version(self, scope: str) -> int:
+        return self._versions.get(scope, 0)
+
+    async def bump_version(self, scope: str) -> None:
+        self._versions[scope] = self._versions.get(scope, 0) + 1
+
+
+class RedisCacheBackend:
+    """
+    Redis-compatible backend shared by all workers
+
+    Eviction is left to the server (maxmemory-policy allkeys-lru) plus
+    per-key TTLs. Requires the optional 'redis' package.
+    """
+
+    def __init__(self, url: str):
+        try:
+            from redis import asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("FEED_CACHE_BACKEND=redis requires 'redis'") from e
+        self._client = redis.from_url(url, decode_responses=True)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._client.get(key)
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        await self._client.set(key, value, ex=ttl)
+
+    async def get_version(self, scope: str) -> int:
+        return int(await self._client.get(f"feed:version:{scope}") or 0)
+
+    async def bump_version(self, scope: str) -> None:
+        await self._client.incr(f"feed:version:{scope}")
+
+
+class FeedCache:
+    """
+    Read-through cache of serialized feed pages
+
+    Entries are namespaced by a per-scope version (global feed or one
+    user's feed); invalidating a scope bumps its version so stale pages
+    are never read again and age out through LRU/TTL.
+    """
+
+    def __init__(self, backend, ttl: int, max_page: int):
+        self.backend = backend
+        self.ttl = ttl
+        self.max_page = max_page
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def is_cacheable(self, page: int, cursor: Optional[str]) -> bool:
+        """Only the first few offset pages, and cursor pages, are cached"""
+        return self.ttl > 0 and (cursor is not None or page <= self.max_page)
+
+    async def key(
+        self,
+        page: int,
+        page_size: int,
+        user_id: Optional[str],
+        cursor: Optional[str],
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Build the entry key for a feed request"""
+        scope = user_id or GLOBAL_SCOPE
+        version = await self.backend.get_version(scope)
+        position = f"c:{cursor}" if cursor else f"p:{page}"
+        params = json.dumps([position, page_size, filters or {}], sort_keys=True)
+        digest = hashlib.sha1(params.encode()).hexdigest()
+        return f"feed:{scope}:{version}:{digest}"
+
+    async def get(self, key: str) -> Optional[str]:
+        value = await self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: str) -> None:
+        await self.backend.set(key, value, self.ttl)
+
+    async def invalidate(self, user_id: Optional[str] = None) -> None:
+        """Drop the global feed and, if given, one user's feed"""
+        self.invalidations += 1
+        await self.backend.bump_version(GLOBAL_SCOPE)
+        if user_id:
+            await self.backend.bump_version(user_id)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+def _build_backend():
+    if settings.FEED_CACHE_BACKEND == "redis":
+        return RedisCacheBackend(settings.FEED_CACHE_URL)
+    return MemoryCacheBackend(settings.FEED_CACHE_MAX_ENTRIES, settings.FEED_CACHE_TTL)
+
+
+feed_cache = FeedCache(
+    _build_backend(), ttl=settings.FEED_CACHE_TTL, max_page=settings.FEED_CACHE_MAX_PAGE
+)
@@ -0,0 +1,134 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.etag import etag_matches, make_etag
+from core.serialization import RowEncoder
+from models.post import Post
+from schemas.post import PostListResponse
+from services.counter_buffer import post_counters
+from services.feed_cache import feed_cache
+from services.post_service import PostService
+from services.trending import trending
+from typing import List, Optional, Tuple
+
+_page_encoder = RowEncoder(PostListResponse)
+
+
+class FeedService:
+    @staticmethod
+    def page_etag(
+        posts: List[Post], page: int, page_size: int, total: int, next_cursor
+    ) -> str:
+        """
+        ETag of a feed page: its ids, the latest updated_at among the posts
+        and their authors, and the like/save increments not yet written
+        """
+        latest = max(
+            (ts for post in posts for ts in (post.updated_at, post.user.updated_at)),
+            default=None,
+        )
+        parts = [page, page_size, total, next_cursor, latest]
+        for post in posts:
+            pending = post_counters.pending(post.id)
+            parts += [post.id, pending["likes"], pending["saves"]]
+        return make_etag(PostListResponse, parts)
+
+    @staticmethod
+    async def get_page(
+        db: AsyncSession,
+        page: int = 1,
+        page_size: int = 20,
+        user_id: Optional[str] = None,
+        cursor: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        any_tags: Optional[List[str]] = None,
+        if_none_match: Optional[str] = None,
+    ) -> Tuple[str, Optional[bytes]]:
+        """
+        Get one wall feed page as its ETag and PostListResponse JSON,
+        served from the feed cache when possible
+
+        Pages are encoded straight from the rows and cached as encoded,
+        ETag first, so a cache hit is returned without being parsed. The
+        body is None when if_none_match already names the ETag; it is then
+        never encoded. Raises ValueError for a malformed cursor.
+        """
+        tags = sorted(set(tags)) if tags else None
+        any_tags = sorted(set(any_tags)) if any_tags else None
+
+        key = None
+        if feed_cache.is_cacheable(page, cursor):
+            filters = {"tags": tags, "any_tags": any_tags}
+            key = await feed_cache.key(page, page_size, user_id, cursor, filters)
+            cached = await feed_cache.get(key)
+            if cached is not None:
+                etag, _, body = cached.partition("\n")
+                if etag_matches(if_none_match, etag):
+                    return etag, None
+                return etag, body.encode()
+
+        skip = (page - 1) * page_size
+        posts, total, next_cursor = await PostService.get_all(
+            db,
+            skip=skip,
+            limit=page_size,
+            user_id=user_id,
+            cursor=cursor,
+            tags=tags,
+            any_tags=any_tags,
+        )
+        etag = FeedService.page_etag(posts, page, page_size, total, next_cursor)
+        if etag_matches(if_none_match, etag):
+            return etag, None
+
+        body = _page_encoder.dumps(
+            {
+                "items": posts,
+                "page": page,
+                "page_size": page_size,
+                "total": total,
+                "has_more": next_cursor is not None,
+                "next_cursor": next_cursor,
+            }
+        )
+
+        if key is not None:
+            # Encoded JSON has no raw newline, so it cleanly ends the ETag
+            await feed_cache.set(key, f"{etag}\n{body.decode()}")
+        return etag, body
+
+    @staticmethod
+    async def get_trending_page(
+        db: AsyncSession,
+        page: int = 1,
+        page_size: int = 20,
+        if_none_match: Optional[str] = None,
+    ) -> Tuple[str, Optional[bytes]]:
+        """
+        Get one page of the trending feed as its ETag and PostListResponse
+        JSON, or a None body when if_none_match names the ETag
+
+        The ranking is precomputed by the trending engine, so a page is a
+        slice of ids plus one IN query however many posts exist.
+        """
+        skip = (page - 1) * page_size
+        post_ids = trending.page(skip, page_size)
+        posts = await PostService.get_by_ids(db, post_ids)
+        if len(posts) < len(post_ids):
+            # Deleted since the last recompute
+            found = {post.id for post in posts}
+            trending.discard([post_id for post_id in post_ids if post_id not in found])
+
+        total = len(trending)
+        etag = FeedService.page_etag(posts, page, page_size, total, None)
+        if etag_matches(if_none_match, etag):
+            return etag, None
+        body = _page_encoder.dumps(
+            {
+                "items": posts,
+                "page": page,
+                "page_size": page_size,
+                "total": total,
+                "has_more": skip + page_size < total,
+                "next_cursor": None,
+            }
+        )
+        return etag, body
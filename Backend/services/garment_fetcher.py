@@ -0,0 +1,339 @@
+import asyncio
+import hashlib
+import ipaddress
+import json
+import logging
+import os
+import socket
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from urllib.parse import urlsplit
+import httpcore
+import httpx
+from core.config import settings
+from core.single_flight import SingleFlight
+from typing import AsyncIterator, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class GarmentFetchError(Exception):
+    """Raised when a garment image cannot be downloaded"""
+
+
+def is_public_address(address: str) -> bool:
+    """Whether an IP address is routable on the public internet"""
+    return ipaddress.ip_address(address.split("%", 1)[0]).is_global
+
+
+async def resolve(host: str, port: int) -> List[str]:
+    """Addresses of host, in the resolver's order"""
+    infos = await asyncio.get_running_loop().getaddrinfo(
+        host, port, type=socket.SOCK_STREAM
+    )
+    return list(dict.fromkeys(info[4][0] for info in infos))
+
+
+class _PublicNetworkBackend(httpcore.AsyncNetworkBackend):
+    """
+    Opens connections to public addresses only
+
+    The host is resolved here and the connection is made to an address
+    that was checked, so a DNS answer that changes between the check and
+    the connect (rebinding) cannot reach an internal service. Refuses a
+    host if any of its addresses is not public. TLS still verifies the
+    certificate against the host name.
+    """
+
+    def __init__(self):
+        self._backend = httpcore.AnyIOBackend()
+
+    async def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: Optional[float] = None,
+        local_address: Optional[str] = None,
+        socket_options=None,
+    ) -> httpcore.AsyncNetworkStream:
+        try:
+            addresses = await asyncio.wait_for(resolve(host, port), timeout)
+        except asyncio.TimeoutError as e:
+            raise httpcore.ConnectTimeout(f"Resolving {host} timed out") from e
+        except OSError as e:
+            raise httpcore.ConnectError(f"Could not resolve {host}: {e}") from e
+        for address in addresses:
+            if not is_public_address(address):
+                raise GarmentFetchError(f"Refusing to fetch from {host} ({address})")
+
+        error: Optional[Exception] = None
+        for address in addresses:
+            try:
+                return await self._backend.connect_tcp(
+                    address, port, timeout, local_address, socket_options
+                )
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                error = e
+        raise error or httpcore.ConnectError(f"No addresses for {host}")
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+class _PublicHTTPTransport(httpx.AsyncHTTPTransport):
+    """
+    httpx transport whose connections go through _PublicNetworkBackend
+
+    httpx takes no network backend, so the connection pool it builds is
+    replaced with one built with it. The pool lives in _pool in the httpx
+    pinned in requirements.txt; an upgrade that moves it fails here, at
+    start, rather than silently connecting to unchecked addresses.
+    """
+
+    def __init__(self, limits: httpx.Limits):
+        super().__init__(limits=limits, trust_env=False)
+        if not isinstance(getattr(self, "_pool", None), httpcore.AsyncConnectionPool):
+            raise RuntimeError(
+                f"httpx {httpx.__version__} does not keep its pool in _pool;"
+                " the public address check cannot be installed"
+            )
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(trust_env=False),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            network_backend=_PublicNetworkBackend(),
+        )
+
+
+class _HostLimit:
+    def __init__(self, per_host: int):
+        self.semaphore = asyncio.Semaphore(per_host)
+        self.users = 0
+
+
+class GarmentFetcher:
+    """
+    Downloads garment images from shop URLs through a disk cache
+
+    Unless allow_private_hosts is set, connections go only to public
+    addresses, including after redirects. All requests share one
+    httpx.AsyncClient connection pool, with at most per_host requests in
+    flight to any one shop; a shop's limit is kept only while requests to
+    it are running or waiting. Responses are cached by
+    URL under directory: within ttl seconds the file is served without a
+    request, after that it is revalidated with If-None-Match /
+    If-Modified-Since. Concurrent fetches of one URL share a download,
+    and a stale copy is served if the shop cannot be reached.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_connections: int,
+        per_host: int,
+        timeout: float,
+        ttl: int,
+        allow_private_hosts: bool = False,
+    ):
+        self.directory = Path(directory)
+        self.max_connections = max_connections
+        self.per_host = per_host
+        self.timeout = timeout
+        self.ttl = ttl
+        self.allow_private_hosts = allow_private_hosts
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_limits: Dict[str, _HostLimit] = {}
+        self._flights = SingleFlight()
+        self.fresh_hits = 0
+        self.revalidated = 0
+        self.downloads = 0
+        self.stale_served = 0
+
+    def start(self) -> None:
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections,
+        )
+        if self.allow_private_hosts:
+            transport = httpx.AsyncHTTPTransport(limits=limits, trust_env=False)
+        else:
+            transport = _PublicHTTPTransport(limits)
+        self._client = httpx.AsyncClient(
+            transport=transport,
+            timeout=self.timeout,
+            follow_redirects=True,
+            # Redirect targets get the same URL check as the original URL
+            event_hooks={"request": [self._check_request]},
+            # An environment proxy would connect on our behalf, unchecked
+            trust_env=False,
+        )
+
+    async def stop(self) -> None:
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.aclose()
+
+    def _paths(self, url: str):
+        key = hashlib.sha256(url.encode()).hexdigest()
+        base = self.directory / key[:2] / key
+        return base.with_suffix(".img"), base.with_suffix(".json")
+
+    def _check_url(self, url: str) -> str:
+        """
+        Host of url, refusing anything but http(s) to a public address
+
+        Only IP literals and localhost are judged here; names are resolved
+        and checked when connecting, see _PublicNetworkBackend.
+        """
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise GarmentFetchError(f"Unsupported garment image URL: {url}")
+        if not self.allow_private_hosts:
+            host = parts.hostname
+            try:
+                private = not ipaddress.ip_address(host).is_global
+            except ValueError:
+                private = host == "localhost" or host.endswith(".localhost")
+            if private:
+                raise GarmentFetchError(f"Refusing to fetch from {host}")
+        return parts.netloc
+
+    async def _check_request(self, request: httpx.Request) -> None:
+        self._check_url(str(request.url))
+
+    async def fetch(self, url: str) -> Path:
+        """Path of the cached image at url, downloading it if needed"""
+        host = self._check_url(url)
+        return await self._flights.do(url, lambda: self._fetch(url, host))
+
+    async def fetch_all(self, urls: Sequence[str]) -> List[Path]:
+        """Fetch several images in parallel, in the order given"""
+        return list(await asyncio.gather(*(self.fetch(url) for url in urls)))
+
+    async def _fetch(self, url: str, host: str) -> Path:
+        body_path, meta_path = self._paths(url)
+        meta = await asyncio.to_thread(self._read_meta, meta_path)
+        if meta and not body_path.exists():
+            meta = None
+        if meta and meta["fetched_at"] + self.ttl > time.time():
+            self.fresh_hits += 1
+            return body_path
+
+        headers = {}
+        if meta:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        try:
+            async with self._host_slot(host):
+                return await self._download(url, body_path, meta_path, meta, headers)
+        except (httpx.HTTPError, GarmentFetchError) as e:
+            if meta:
+                logger.warning("Serving stale %s: %s", url, e)
+                self.stale_served += 1
+                return body_path
+            if isinstance(e, GarmentFetchError):
+                raise
+            raise GarmentFetchError(f"Could not fetch {url}: {e}") from e
+
+    @asynccontextmanager
+    async def _host_slot(self, host: str) -> AsyncIterator[None]:
+        """One of the per_host slots for host, forgetting idle hosts"""
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = self._host_limits[host] = _HostLimit(self.per_host)
+        limit.users += 1
+        try:
+            async with limit.semaphore:
+                yield
+        finally:
+            limit.users -= 1
+            if not limit.users:
+                del self._host_limits[host]
+
+    async def _download(
+        self,
+        url: str,
+        body_path: Path,
+        meta_path: Path,
+        meta: Optional[dict],
+        headers: Dict[str, str],
+    ) -> Path:
+        if self._client is None:
+            raise RuntimeError("GarmentFetcher.start() has not been called")
+
+        async with self._client.stream("GET", url, headers=headers) as response:
+            if response.status_code == 304 and meta:
+                self.revalidated += 1
+                meta["fetched_at"] = time.time()
+                await asyncio.to_thread(self._write_meta, meta_path, meta)
+                return body_path
+            if response.status_code != 200:
+                raise GarmentFetchError(f"{url} answered {response.status_code}")
+
+            body_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = body_path.with_suffix(f".{os.getpid()}.{id(response)}.tmp")
+            size = 0
+            try:
+                with open(tmp_path, "wb") as f:
+                    async for chunk in response.aiter_bytes():
+                        size += len(chunk)
+                        if size > settings.MAX_FILE_SIZE:
+                            raise GarmentFetchError(
+                                f"{url} exceeds {settings.MAX_FILE_SIZE} bytes"
+                            )
+                        f.write(chunk)
+                os.replace(tmp_path, body_path)
+            finally:
+                tmp_path.unlink(missing_ok=True)
+
+        self.downloads += 1
+        await asyncio.to_thread(
+            self._write_meta,
+            meta_path,
+            {
+                "url": url,
+                "etag": response.headers.get("etag"),
+                "last_modified": response.headers.get("last-modified"),
+                "content_type": response.headers.get("content-type"),
+                "fetched_at": time.time(),
+            },
+        )
+        return body_path
+
+    @staticmethod
+    def _read_meta(meta_path: Path) -> Optional[dict]:
+        try:
+            return json.loads(meta_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_meta(meta_path: Path, meta: dict) -> None:
+        tmp_path = meta_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(meta))
+        os.replace(tmp_path, meta_path)
+
+    def stats(self) -> dict:
+        return {
+            "fresh_hits": self.fresh_hits,
+            "revalidated": self.revalidated,
+            "downloads": self.downloads,
+            "stale_served": self.stale_served,
+            "busy_hosts": len(self._host_limits),
+            "single_flight": self._flights.stats(),
+        }
+
+
+garment_fetcher = GarmentFetcher(
+    os.path.join(settings.UPLOAD_DIR, "garment_cache"),
+    settings.GARMENT_FETCH_MAX_CONNECTIONS,
+    settings.GARMENT_FETCH_PER_HOST,
+    settings.GARMENT_FETCH_TIMEOUT,
+    settings.GARMENT_CACHE_TTL,
+    allow_private_hosts=settings.GARMENT_FETCH_ALLOW_PRIVATE_HOSTS,
+)
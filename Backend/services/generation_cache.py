@@ -0,0 +1,145 @@
+import asyncio
+import base64
+import binascii
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from core.cache import TTLCache
+from core.config import settings
+from schemas.ai import AIGenerationRequest, AIGenerationResponse
+from services.upload_service import UploadService
+from typing import Dict, Optional
+
+
+def _image_identity(user_image: str) -> bytes:
+    """
+    Bytes that identify the user image regardless of how it was encoded
+
+    Base64 payloads (with or without a data: URI prefix or line breaks)
+    hash by their decoded bytes; anything else, such as a URL, as given.
+    """
+    payload = user_image.strip()
+    if payload.startswith("data:") and "," in payload:
+        payload = payload.split(",", 1)[1]
+    try:
+        return base64.b64decode("".join(payload.split()), validate=True)
+    except (binascii.Error, ValueError):
+        return user_image.strip().encode()
+
+
+def _image_digest(request: AIGenerationRequest) -> bytes:
+    """
+    SHA-256 of the user image
+
+    Uploads are named by the SHA-256 of their bytes, so an uploaded image
+    shares its key with the same bytes sent inline as base64 without being
+    read. Raises ValueError for an unknown user_image_id.
+    """
+    if not request.user_image_id:
+        return hashlib.sha256(_image_identity(request.user_image)).digest()
+
+    if UploadService.path_for(request.user_image_id) is None:
+        raise ValueError("Unknown user_image_id")
+    return UploadService.content_hash(request.user_image_id)
+
+
+def generation_key(request: AIGenerationRequest) -> str:
+    """Canonical content hash of a generation request"""
+    garments = sorted((g.id, g.image_url) for g in request.garments)
+    style = request.style_params.model_dump(exclude_none=True) if request.style_params else {}
+
+    digest = hashlib.sha256()
+    digest.update(_image_digest(request))
+    digest.update(json.dumps([garments, style], sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+class GenerationCache:
+    """
+    Two-tier cache of successful generation results
+
+    A size-bounded LRU/TTL in memory sits in front of JSON files under
+    UPLOAD_DIR/generation_cache, which survive restarts and are shared by
+    workers on the same host. Both tiers expire entries after ttl seconds.
+    """
+
+    def __init__(self, directory: str, max_entries: int, ttl: int):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self._memory = TTLCache(max_entries, ttl)
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _read_disk(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            if path.stat().st_mtime + self.ttl <= time.time():
+                path.unlink(missing_ok=True)
+                return None
+            return path.read_text()
+        except FileNotFoundError:
+            return None
+
+    def _write_disk(self, key: str, payload: str) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename so readers never see a partial file
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(payload)
+        os.replace(tmp_path, path)
+
+    def holds(self, key: str) -> bool:
+        """Whether a live entry for key is on disk"""
+        try:
+            return self._path(key).stat().st_mtime + self.ttl > time.time()
+        except FileNotFoundError:
+            return False
+
+    async def get(self, key: str) -> Optional[AIGenerationResponse]:
+        """Get a cached result, marked as a cache hit"""
+        result = self._memory.get(key)
+        if result is not None:
+            self.memory_hits += 1
+            return result
+
+        payload = await asyncio.to_thread(self._read_disk, key)
+        if payload is None:
+            self.misses += 1
+            return None
+
+        self.disk_hits += 1
+        result = AIGenerationResponse.model_validate_json(payload).model_copy(
+            update={"cached": True}
+        )
+        self._memory.set(key, result)
+        return result
+
+    async def set(self, key: str, result: AIGenerationResponse) -> None:
+        """Store a fresh result in both tiers"""
+        cached = result.model_copy(update={"cached": True})
+        self._memory.set(key, cached)
+        await asyncio.to_thread(self._write_disk, key, cached.model_dump_json())
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        hits = self.memory_hits + self.disk_hits
+        return {
+            "memory_entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+generation_cache = GenerationCache(
+    os.path.join(settings.UPLOAD_DIR, "generation_cache"),
+    max_entries=settings.GENERATION_CACHE_MAX_ENTRIES,
+    ttl=settings.GENERATION_CACHE_TTL,
+)
@@ -0,0 +1,112 @@
+import numpy as np
+from PIL import Image, ImageOps
+
+# Side of the thumbnail all measurements are taken from
+ANALYSIS_SIZE = 32
+EXIF_ORIENTATION = 0x0112
+BASE83 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+
+
+def _encode83(value: int, length: int) -> str:
+    return "".join(BASE83[(value // 83 ** (length - i)) % 83] for i in range(1, length + 1))
+
+
+def _srgb_to_linear(values: np.ndarray) -> np.ndarray:
+    v = values / 255.0
+    return np.where(v <= 0.04045, v / 12.92, ((v + 0.055) / 1.055) ** 2.4)
+
+
+def _linear_to_srgb(value: float) -> int:
+    v = min(max(value, 0.0), 1.0)
+    if v <= 0.0031308:
+        return int(v * 12.92 * 255 + 0.5)
+    return int((1.055 * v ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def blurhash(pixels: np.ndarray, x_components: int, y_components: int) -> str:
+    """
+    Blurhash (https://blurha.sh) of an HxWx3 uint8 array
+
+    Every DCT component is one weighted sum over the whole image; the
+    cosine bases are outer products, so all of them come from one einsum.
+    """
+    height, width, _ = pixels.shape
+    linear = _srgb_to_linear(pixels.astype(np.float64))
+    basis_x = np.cos(np.pi * np.outer(np.arange(x_components), np.arange(width)) / width)
+    basis_y = np.cos(np.pi * np.outer(np.arange(y_components), np.arange(height)) / height)
+    # factors[j, i] = sum over y, x of basis_y[j, y] * basis_x[i, x] * linear[y, x]
+    factors = np.einsum("jy,ix,yxc->jic", basis_y, basis_x, linear) / (width * height)
+    factors[1:, :] *= 2
+    factors[0, 1:] *= 2
+    factors = factors.reshape(-1, 3)
+
+    dc, ac = factors[0], factors[1:]
+    result = _encode83((x_components - 1) + (y_components - 1) * 9, 1)
+    if len(ac):
+        quantised_max = int(max(0, min(82, np.floor(np.abs(ac).max() * 166 - 0.5))))
+        max_value = (quantised_max + 1) / 166
+        result += _encode83(quantised_max, 1)
+    else:
+        max_value = 1.0
+        result += _encode83(0, 1)
+
+    r, g, b = (_linear_to_srgb(c) for c in dc)
+    result += _encode83((r << 16) + (g << 8) + b, 4)
+
+    scaled = ac / max_value
+    quantised = np.clip(
+        np.floor(np.sign(scaled) * np.abs(scaled) ** 0.5 * 9 + 9.5), 0, 18
+    ).astype(int)
+    for qr, qg, qb in quantised:
+        result += _encode83(qr * 19 * 19 + qg * 19 + qb, 2)
+    return result
+
+
+def dominant_color(pixels: np.ndarray) -> str:
+    """
+    Hex color of the most populated region of RGB space
+
+    Pixels are bucketed 4 bits per channel; the winning bucket's pixels
+    are averaged so the color is not snapped to the bucket grid.
+    """
+    flat = pixels.reshape(-1, 3).astype(np.int64)
+    buckets = (flat[:, 0] >> 4) << 8 | (flat[:, 1] >> 4) << 4 | (flat[:, 2] >> 4)
+    winner = np.bincount(buckets, minlength=4096).argmax()
+    r, g, b = flat[buckets == winner].mean(axis=0).round().astype(int)
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+def analyze_image(path: str) -> dict:
+    """
+    Layout metadata of an image: display size, aspect ratio, dominant
+    color and blurhash placeholder
+
+    Runs in a worker process. Sizes come from the header; pixels are
+    decoded at a reduced scale where the format allows it and measured
+    from a thumbnail of at most ANALYSIS_SIZE pixels a side.
+    """
+    with Image.open(path) as img:
+        width, height = img.size
+        # Orientations 5-8 rotate by 90 degrees
+        if img.getexif().get(EXIF_ORIENTATION, 1) in (5, 6, 7, 8):
+            width, height = height, width
+
+        img.draft("RGB", (ANALYSIS_SIZE * 4, ANALYSIS_SIZE * 4))
+        image = ImageOps.exif_transpose(img)
+        if image.mode in ("RGBA", "LA") or "transparency" in image.info:
+            # Transparent areas show the page background, taken as white
+            rgba = image.convert("RGBA")
+            image = Image.new("RGB", rgba.size, "white")
+            image.paste(rgba, mask=rgba.getchannel("A"))
+        image = image.convert("RGB")
+        image.thumbnail((ANALYSIS_SIZE, ANALYSIS_SIZE), Image.BILINEAR)
+        pixels = np.asarray(image)
+
+    x_components, y_components = (4, 3) if width >= height else (3, 4)
+    return {
+        "width": width,
+        "height": height,
+        "aspect_ratio": round(width / height, 4),
+        "dominant_color": dominant_color(pixels),
+        "blurhash": blurhash(pixels, x_components, y_components),
+    }
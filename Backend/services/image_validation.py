@@ -0,0 +1,151 @@
+import base64
+import binascii
+import io
+import struct
+import warnings
+from pathlib import Path
+from PIL import Image, UnidentifiedImageError
+from core.config import settings
+from schemas.upload import ImageMetadata
+from typing import BinaryIO, Optional, Tuple, Union
+
+ALLOWED_FORMATS = {"JPEG", "PNG", "GIF", "WEBP"}
+EXIF_ORIENTATION = 0x0112
+WEBP_EXIF_FLAG = 0x08
+WEBP_EXIF_MAX = 64 * 1024
+
+
+def _webp_header(fp: BinaryIO) -> Optional[Tuple[int, int, Optional[bytes]]]:
+    """
+    Dimensions and EXIF of a WebP file, or None if fp is not a WebP
+
+    Pillow's WebP plugin reads the whole file on open, so the RIFF
+    header is parsed here instead; chunks other than EXIF are skipped
+    with a seek.
+    """
+    header = fp.read(30)
+    fp.seek(0)
+    if len(header) < 30 or header[:4] != b"RIFF" or header[8:12] != b"WEBP":
+        return None
+
+    chunk = header[12:16]
+    if chunk == b"VP8 ":
+        if header[23:26] != b"\x9d\x01\x2a":
+            raise ValueError("Corrupt or unrecognised image")
+        width, height = struct.unpack("<HH", header[26:30])
+        return width & 0x3FFF, height & 0x3FFF, None
+    if chunk == b"VP8L":
+        if header[20] != 0x2F:
+            raise ValueError("Corrupt or unrecognised image")
+        bits = int.from_bytes(header[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1, None
+    if chunk != b"VP8X":
+        raise ValueError("Corrupt or unrecognised image")
+
+    width = int.from_bytes(header[24:27], "little") + 1
+    height = int.from_bytes(header[27:30], "little") + 1
+    exif = None
+    if header[20] & WEBP_EXIF_FLAG:
+        fp.seek(12)
+        while True:
+            chunk_header = fp.read(8)
+            if len(chunk_header) < 8:
+                break
+            fourcc, length = chunk_header[:4], struct.unpack("<I", chunk_header[4:])[0]
+            if fourcc == b"EXIF":
+                exif = fp.read(min(length, WEBP_EXIF_MAX))
+                break
+            fp.seek(length + (length & 1), io.SEEK_CUR)
+    return width, height, exif
+
+
+def _open_header(fp: BinaryIO, size: int) -> ImageMetadata:
+    """
+    Read format, dimensions and EXIF orientation from the image header
+
+    Image.open only parses the container header and stops there; pixels
+    are never decoded, so the cost does not grow with the image's size.
+    """
+    webp = _webp_header(fp)
+    if webp is not None:
+        image_format = "WEBP"
+        width, height, exif = webp
+    else:
+        try:
+            with warnings.catch_warnings():
+                # The pixel limit below replaces Pillow's bomb warning
+                warnings.simplefilter("ignore", Image.DecompressionBombWarning)
+                with Image.open(fp) as img:
+                    image_format = img.format
+                    width, height = img.size
+                    exif = img.info.get("exif")
+        except Image.DecompressionBombError:
+            raise ValueError("Image has too many pixels")
+        except (UnidentifiedImageError, OSError, SyntaxError):
+            raise ValueError("Corrupt or unrecognised image")
+
+    if image_format not in ALLOWED_FORMATS:
+        raise ValueError(f"Unsupported image format: {image_format}")
+    if width < 1 or height < 1:
+        raise ValueError("Image has no pixels")
+    if max(width, height) > settings.MAX_IMAGE_SIDE:
+        raise ValueError(f"Image sides must be at most {settings.MAX_IMAGE_SIDE}px")
+    if width * height > settings.MAX_IMAGE_PIXELS:
+        raise ValueError("Image has too many pixels")
+
+    # info["exif"] is filled from the header; getexif() may decode a PNG
+    orientation = 1
+    if exif:
+        exif_data = Image.Exif()
+        try:
+            exif_data.load(exif)
+            orientation = int(exif_data.get(EXIF_ORIENTATION, 1))
+        except Exception:
+            pass
+
+    return ImageMetadata(
+        format=image_format.lower(),
+        width=width,
+        height=height,
+        orientation=orientation if 1 <= orientation <= 8 else 1,
+        size=size,
+    )
+
+
+def decode_base64_image(image_data: str) -> bytes:
+    """
+    Decode a base64 image, optionally a data: URI
+
+    The decoded size is known from the length of the text, so an
+    oversized image is rejected before anything is decoded.
+    """
+    payload = image_data.strip()
+    if payload.startswith("data:") and "," in payload:
+        payload = payload.split(",", 1)[1]
+    payload = "".join(payload.split())
+
+    if len(payload) // 4 * 3 - payload[-2:].count("=") > settings.MAX_FILE_SIZE:
+        raise ValueError(f"Image exceeds {settings.MAX_FILE_SIZE} bytes")
+    try:
+        return base64.b64decode(payload, validate=True)
+    except (binascii.Error, ValueError):
+        raise ValueError("Image is not valid base64")
+
+
+def inspect_image(source: Union[bytes, Path]) -> ImageMetadata:
+    """
+    Validate an image given as bytes or a file path, returning its metadata
+
+    Raises ValueError for anything that is not an acceptable image. This
+    does blocking I/O; call it through asyncio.to_thread.
+    """
+    if isinstance(source, Path):
+        size = source.stat().st_size
+        if size > settings.MAX_FILE_SIZE:
+            raise ValueError(f"Image exceeds {settings.MAX_FILE_SIZE} bytes")
+        with open(source, "rb") as f:
+            return _open_header(f, size)
+
+    if len(source) > settings.MAX_FILE_SIZE:
+        raise ValueError(f"Image exceeds {settings.MAX_FILE_SIZE} bytes")
+    return _open_header(io.BytesIO(source), len(source))
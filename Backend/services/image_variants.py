@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from PIL import Image, ImageOps
+from core.config import settings
+from services.image_analysis import analyze_image
+from services.upload_service import UploadService
+from typing import Awaitable, Dict, List, Optional, Sequence, Set
+
+logger = logging.getLogger(__name__)
+
+# Output formats, best first; AVIF only when this Pillow build can write it
+VARIANT_FORMATS = [
+    fmt for fmt in ("avif", "webp", "jpeg") if fmt != "avif" or "AVIF" in Image.SAVE
+]
+VARIANT_QUALITY = {"avif": 55, "webp": 80, "jpeg": 82}
+VARIANT_EXTENSIONS = {"avif": "avif", "webp": "webp", "jpeg": "jpg"}
+EXIF_ORIENTATION = 0x0112
+
+
+def variant_name(image_id: str, width: int, fmt: str) -> str:
+    """File name of one derivative, stored next to the original"""
+    stem = image_id.rsplit(".", 1)[0]
+    return f"{stem}.w{width}.{VARIANT_EXTENSIONS[fmt]}"
+
+
+def _save(image: Image.Image, path: Path, fmt: str) -> None:
+    if fmt == "jpeg" and image.mode != "RGB":
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+    # Write then rename so a half-written variant is never served
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    image.save(tmp_path, fmt.upper(), quality=VARIANT_QUALITY[fmt], optimize=fmt == "jpeg")
+    os.replace(tmp_path, path)
+
+
+def render_variants(
+    path: str, widths: Sequence[int], formats: Sequence[str]
+) -> Dict[str, Dict[int, str]]:
+    """
+    Write the missing width/format derivatives of an image
+
+    Runs in a worker process. Widths at or above the original's are
+    skipped, variants already on disk are left alone, and the original is
+    only decoded when something is missing. Returns {format: {width: file
+    name}} for every applicable variant.
+    """
+    source = Path(path)
+    with Image.open(source) as img:
+        orientation = img.getexif().get(EXIF_ORIENTATION, 1)
+        # Orientations 5-8 rotate by 90 degrees, so the displayed width is the height
+        display_width = img.height if orientation in (5, 6, 7, 8) else img.width
+        targets = sorted((w for w in set(widths) if w < display_width), reverse=True)
+        names = {
+            fmt: {w: variant_name(source.name, w, fmt) for w in targets} for fmt in formats
+        }
+        missing = {
+            (w, fmt)
+            for fmt in formats
+            for w in targets
+            if not (source.parent / names[fmt][w]).exists()
+        }
+        if not missing:
+            return names
+
+        # JPEGs can be decoded straight at a reduced scale
+        scale = targets[0] / display_width
+        img.draft("RGB", (math.ceil(img.width * scale), math.ceil(img.height * scale)))
+        image = ImageOps.exif_transpose(img)
+        has_alpha = image.mode in ("RGBA", "LA") or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+
+        # Largest first, each width resized from the previous one
+        for width in targets:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.LANCZOS, reducing_gap=2.0)
+            for fmt in formats:
+                if (width, fmt) in missing:
+                    _save(image, source.parent / names[fmt][width], fmt)
+    return names
+
+
+class ImageVariantPipeline:
+    """
+    Responsive derivatives and layout metadata of uploaded images,
+    computed in a process pool
+
+    Variants are named after the original and width, so rendering the same
+    image again finds its files on disk and does no work. Work started
+    with spawn() runs after the request that asked for it has returned;
+    stop() waits for it before shutting the pool down.
+    """
+
+    def __init__(self, widths: Sequence[int], workers: int):
+        self.widths = list(widths)
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    def start(self) -> None:
+        self._pool = ProcessPoolExecutor(max_workers=self.workers)
+
+    def spawn(self, work: Awaitable[None]) -> None:
+        """Run work in the background, logging failures"""
+        task = asyncio.create_task(self._background(work))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _background(self, work: Awaitable[None]) -> None:
+        try:
+            await work
+        except Exception:
+            logger.exception("Background image work failed")
+
+    async def stop(self) -> None:
+        if self._tasks:
+            await asyncio.gather(*self._tasks)
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            await asyncio.to_thread(pool.shutdown)
+
+    async def generate(self, image_url: str) -> Optional[Dict[str, List[dict]]]:
+        """
+        Render the variants of an uploaded image and return their URLs
+
+        Returns {format: [{width, url}, ...]} with the widest variant
+        first, or None when image_url is not a local upload.
+        """
+        names = await self._run(
+            image_url, render_variants, self.widths, VARIANT_FORMATS
+        )
+        if names is None:
+            return None
+        return {
+            fmt: [
+                {"width": width, "url": UploadService.url_for(name)}
+                for width, name in variants.items()
+            ]
+            for fmt, variants in names.items()
+        }
+
+    async def analyze(self, image_url: str) -> Optional[dict]:
+        """
+        Width, height, aspect_ratio, dominant_color and blurhash of an
+        uploaded image, or None when image_url is not a local upload
+        """
+        return await self._run(image_url, analyze_image)
+
+    async def try_generate(self, image_url: str) -> Optional[Dict[str, List[dict]]]:
+        """generate(), logging failures instead of raising them"""
+        try:
+            return await self.generate(image_url)
+        except Exception:
+            logger.exception("Rendering variants of %s failed", image_url)
+            return None
+
+    async def try_analyze(self, image_url: str) -> Optional[dict]:
+        """analyze(), logging failures instead of raising them"""
+        try:
+            return await self.analyze(image_url)
+        except Exception:
+            logger.exception("Analyzing %s failed", image_url)
+            return None
+
+    async def _run(self, image_url: str, fn, *args):
+        image_id = UploadService.id_from_url(image_url)
+        path = UploadService.path_for(image_id) if image_id else None
+        if path is None:
+            return None
+        # Before start() (e.g. in scripts) this falls back to the thread pool
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, fn, str(path), *args)
+
+
+image_variants = ImageVariantPipeline(
+    settings.IMAGE_VARIANT_WIDTHS, settings.IMAGE_VARIANT_WORKERS
+)
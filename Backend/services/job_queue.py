@@ -0,0 +1,245 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+from core.cache import TTLCache
+from core.config import settings
+from schemas.ai import AIGenerationRequest, AIJobResponse
+from services.ai_service import AIService
+from typing import AsyncIterator, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("succeeded", "failed", "timed_out")
+
+
+class QueueFullError(Exception):
+    """Raised when the generation queue is at its depth limit"""
+
+
+class GenerationJob:
+    def __init__(self, request: AIGenerationRequest):
+        self.id = f"job-{uuid.uuid4().hex}"
+        self.request = request
+        self.status = "queued"  # 'queued', 'running', 'succeeded', 'failed', 'timed_out'
+        self.result = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow()
+        self.updated_at = self.created_at
+
+    def update(self, status: str, result=None, error: Optional[str] = None) -> None:
+        self.status = status
+        self.result = result
+        self.error = error
+        self.updated_at = datetime.utcnow()
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    def to_response(self) -> AIJobResponse:
+        return AIJobResponse(
+            id=self.id,
+            status=self.status,
+            result=self.result,
+            error=self.error,
+            created_at=self.created_at,
+            updated_at=self.updated_at,
+        )
+
+
+class MemoryJobStore:
+    """In-process job states; only the worker that queued a job can read it"""
+
+    def __init__(self):
+        self._states = TTLCache(max_size=10000, ttl=0)
+        self._changed: Dict[str, asyncio.Event] = {}
+
+    async def save(self, state: AIJobResponse, ttl: int) -> None:
+        self._states.set(state.id, state, ttl)
+        # Wake everyone waiting on this job, then arm a fresh event
+        changed = self._changed.pop(state.id, None)
+        if changed is not None:
+            changed.set()
+        if state.status not in TERMINAL_STATUSES:
+            self._changed[state.id] = asyncio.Event()
+
+    async def load(self, job_id: str) -> Optional[AIJobResponse]:
+        return self._states.get(job_id)
+
+    async def watch(self, job_id: str, heartbeat: float) -> AsyncIterator[AIJobResponse]:
+        while True:
+            # Grab the event before reading so no change can slip between
+            changed = self._changed.get(job_id)
+            state = await self.load(job_id)
+            if state is None:
+                return
+            yield state
+            if changed is None:
+                return
+            try:
+                await asyncio.wait_for(changed.wait(), heartbeat)
+            except asyncio.TimeoutError:
+                pass
+
+
+class RedisJobStore:
+    """
+    Job states shared by all workers, changes announced over pub/sub
+
+    Any worker can answer for a job whichever one runs it. Requires the
+    optional 'redis' package.
+    """
+
+    def __init__(self, url: str):
+        try:
+            from redis import asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("AI_JOB_BACKEND=redis requires 'redis'") from e
+        self._client = redis.from_url(url, decode_responses=True)
+
+    async def save(self, state: AIJobResponse, ttl: int) -> None:
+        async with self._client.pipeline(transaction=False) as pipe:
+            pipe.set(f"job:{state.id}", state.model_dump_json(), ex=ttl)
+            pipe.publish(f"job:{state.id}:changed", state.status)
+            await pipe.execute()
+
+    async def load(self, job_id: str) -> Optional[AIJobResponse]:
+        data = await self._client.get(f"job:{job_id}")
+        return AIJobResponse.model_validate_json(data) if data else None
+
+    async def watch(self, job_id: str, heartbeat: float) -> AsyncIterator[AIJobResponse]:
+        loop = asyncio.get_running_loop()
+        pubsub = self._client.pubsub()
+        # Subscribe before reading so no change can slip between
+        await pubsub.subscribe(f"job:{job_id}:changed")
+        try:
+            while True:
+                state = await self.load(job_id)
+                if state is None:
+                    return
+                yield state
+                if state.status in TERMINAL_STATUSES:
+                    return
+                deadline = loop.time() + heartbeat
+                while (remaining := deadline - loop.time()) > 0:
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True, timeout=remaining
+                    )
+                    if message is not None:
+                        break
+        finally:
+            await pubsub.reset()
+
+
+class JobQueue:
+    """
+    Bounded queue of outfit generations
+
+    A fixed pool of worker tasks drains the queue, each generation
+    capped at job_timeout seconds. The queue and its depth limit are per
+    process; job states live in the store, so with a shared store any
+    worker can answer polls and streams for a job another one runs.
+    Finished jobs stay readable for result_ttl seconds.
+    """
+
+    def __init__(
+        self, store, workers: int, max_depth: int, job_timeout: float, result_ttl: int
+    ):
+        self.store = store
+        self.workers = workers
+        self.job_timeout = job_timeout
+        self.result_ttl = result_ttl
+        # Long enough to wait behind a full queue and then run
+        self.unfinished_ttl = int(job_timeout * (max_depth // workers + 2)) + result_ttl
+        self._queue: "asyncio.Queue[GenerationJob]" = asyncio.Queue(maxsize=max_depth)
+        self._tasks: List[asyncio.Task] = []
+
+    async def _update(
+        self, job: GenerationJob, status: str, result=None, error: Optional[str] = None
+    ) -> None:
+        job.update(status, result=result, error=error)
+        ttl = self.result_ttl if job.is_finished else self.unfinished_ttl
+        await self.store.save(job.to_response(), ttl)
+
+    async def submit(self, request: AIGenerationRequest) -> AIJobResponse:
+        """Queue a generation, raising QueueFullError at the depth limit"""
+        job = GenerationJob(request)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFullError("Generation queue is full")
+        state = job.to_response()
+        await self.store.save(state, self.unfinished_ttl)
+        return state
+
+    async def get(self, job_id: str) -> Optional[AIJobResponse]:
+        return await self.store.load(job_id)
+
+    def watch(self, job_id: str, heartbeat: float) -> AsyncIterator[AIJobResponse]:
+        """
+        Yield the job's state now, on every change, and at least every
+        heartbeat seconds, until it finishes
+        """
+        return self.store.watch(job_id, heartbeat)
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    async def _run_job(self, job: GenerationJob) -> None:
+        await self._update(job, "running")
+        try:
+            result = await asyncio.wait_for(
+                AIService.generate_outfit(job.request), self.job_timeout
+            )
+            await self._update(job, "succeeded", result=result)
+        except asyncio.TimeoutError:
+            await self._update(
+                job, "timed_out", error=f"Generation exceeded {self.job_timeout}s"
+            )
+        except asyncio.CancelledError:
+            await self._update(job, "failed", error="Server shutting down")
+            raise
+        except Exception as e:
+            logger.exception("Generation job %s failed", job.id)
+            await self._update(job, "failed", error=str(e))
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run_job(job)
+            finally:
+                self._queue.task_done()
+
+    def start(self) -> None:
+        """Start the worker pool"""
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Cancel the workers, failing running and queued jobs"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        while not self._queue.empty():
+            job = self._queue.get_nowait()
+            await self._update(job, "failed", error="Server shutting down")
+            self._queue.task_done()
+
+
+def _build_store():
+    if settings.AI_JOB_BACKEND == "redis":
+        return RedisJobStore(settings.AI_JOB_URL)
+    return MemoryJobStore()
+
+
+generation_jobs = JobQueue(
+    _build_store(),
+    workers=settings.AI_WORKERS,
+    max_depth=settings.AI_QUEUE_MAX_DEPTH,
+    job_timeout=settings.AI_JOB_TIMEOUT,
+    result_ttl=settings.AI_JOB_RESULT_TTL,
+)
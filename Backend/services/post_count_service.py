@@ -0,0 +1,193 @@
+import logging
+import time
+from sqlalchemy import delete, func, literal, select, text, true, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.cache import TTLCache
+from core.config import settings
+from core.database import AsyncSessionLocal
+from models.post import Post, tag_filters
+from models.post_counter import PostCounter
+from typing import List, Optional
+
+GLOBAL_SCOPE = "*"
+
+logger = logging.getLogger(__name__)
+
+
+class PostCountService:
+    """
+    Serves feed totals without a COUNT(*) per request
+
+    Strategies (settings.FEED_COUNT_STRATEGY):
+    - exact: COUNT(*) every time
+    - counter: read maintained per-scope rows, kept in step by create/delete
+      and seeded once by seed_counters at startup
+    - estimate: COUNT(*) cached in process for FEED_COUNT_CACHE_TTL seconds
+
+    Tag-filtered feeds have no maintained counter, so 'counter' falls back
+    to the cached estimate for them.
+    """
+
+    # (counted_at, total) by scope and normalized tags; bounded because the
+    # tags come from clients
+    _estimates = TTLCache(
+        settings.FEED_COUNT_CACHE_MAX_ENTRIES, settings.FEED_COUNT_CACHE_TTL
+    )
+    # When each scope last gained or lost a post; estimates of the scope,
+    # filtered or not, counted before then are stale
+    _changed_at = TTLCache(
+        settings.FEED_COUNT_CACHE_MAX_ENTRIES, settings.FEED_COUNT_CACHE_TTL
+    )
+
+    @staticmethod
+    async def get_total(
+        db: AsyncSession,
+        user_id: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        any_tags: Optional[List[str]] = None,
+    ) -> int:
+        """Get total number of posts in the feed scope"""
+        scope = user_id or GLOBAL_SCOPE
+        strategy = settings.FEED_COUNT_STRATEGY
+
+        if tags or any_tags:
+            if strategy == "exact":
+                return await PostCountService._count(db, scope, tags, any_tags)
+            return await PostCountService._read_estimate(db, scope, tags, any_tags)
+
+        if strategy == "counter":
+            return await PostCountService._read_counter(db, scope)
+        if strategy == "estimate":
+            return await PostCountService._read_estimate(db, scope)
+        return await PostCountService._count(db, scope)
+
+    @staticmethod
+    async def adjust(db: AsyncSession, user_id: str, delta: int) -> None:
+        """
+        Apply delta to the global and user counters
+
+        Runs inside the caller's transaction so the counters commit together
+        with the post insert/delete. A user's row is created by their first
+        post; the global row only by seed_counters.
+        """
+        await db.execute(
+            update(PostCounter)
+            .where(PostCounter.scope == GLOBAL_SCOPE)
+            .values(count=PostCounter.count + delta)
+            .execution_options(synchronize_session=False)
+        )
+        if user_id != GLOBAL_SCOPE:
+            insert = _insert(db)
+            stmt = insert(PostCounter).values(scope=user_id, count=delta)
+            await db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[PostCounter.scope],
+                    set_={"count": PostCounter.count + stmt.excluded.count},
+                )
+            )
+
+        for scope in (GLOBAL_SCOPE, user_id):
+            PostCountService._changed_at.set(scope, time.monotonic())
+
+    @staticmethod
+    async def drop_user(db: AsyncSession, user_id: str) -> None:
+        """Account for a user's posts being removed along with the user"""
+        removed = await PostCountService._count(db, user_id)
+        await PostCountService.adjust(db, GLOBAL_SCOPE, -removed)
+        await db.execute(
+            delete(PostCounter)
+            .where(PostCounter.scope == user_id)
+            .execution_options(synchronize_session=False)
+        )
+        PostCountService._changed_at.set(user_id, time.monotonic())
+
+    @staticmethod
+    async def _count(
+        db: AsyncSession,
+        scope: str,
+        tags: Optional[List[str]] = None,
+        any_tags: Optional[List[str]] = None,
+    ) -> int:
+        query = select(func.count(Post.id))
+        if scope != GLOBAL_SCOPE:
+            query = query.filter(Post.user_id == scope)
+        query = query.filter(*tag_filters(db.bind.dialect.name, tags, any_tags))
+        return (await db.execute(query)).scalar_one()
+
+    @staticmethod
+    async def seed_counters() -> None:
+        """
+        Count every scope exactly, once per database
+
+        Runs at startup and does nothing once the global row exists. On
+        Postgres the posts table is share-locked for the count, so no post
+        insert/delete can commit between the count and the write; counts
+        replace any user rows adjust created before seeding.
+        """
+        try:
+            async with AsyncSessionLocal() as db:
+                if await db.get(PostCounter, GLOBAL_SCOPE):
+                    return
+                if db.bind.dialect.name == "postgresql":
+                    await db.execute(text("LOCK TABLE posts IN SHARE MODE"))
+                insert = _insert(db)
+                for counts in (
+                    select(literal(GLOBAL_SCOPE), func.count(Post.id)).where(true()),
+                    select(Post.user_id, func.count(Post.id))
+                    .where(true())
+                    .group_by(Post.user_id),
+                ):
+                    stmt = insert(PostCounter).from_select(["scope", "count"], counts)
+                    await db.execute(
+                        stmt.on_conflict_do_update(
+                            index_elements=[PostCounter.scope],
+                            set_={"count": stmt.excluded.count},
+                        )
+                    )
+                await db.commit()
+        except Exception:
+            logger.exception("Seeding post counters failed; totals are counted")
+
+    @staticmethod
+    async def _read_counter(db: AsyncSession, scope: str) -> int:
+        result = await db.execute(
+            select(PostCounter.scope, PostCounter.count).where(
+                PostCounter.scope.in_([GLOBAL_SCOPE, scope])
+            )
+        )
+        counts = dict(result.all())
+        if GLOBAL_SCOPE not in counts:
+            # Not seeded yet: count exactly rather than trust partial rows
+            return await PostCountService._count(db, scope)
+        # Seeded, and no row means the user has never had a post
+        return counts.get(scope, 0)
+
+    @staticmethod
+    async def _read_estimate(
+        db: AsyncSession,
+        scope: str,
+        tags: Optional[List[str]] = None,
+        any_tags: Optional[List[str]] = None,
+    ) -> int:
+        key = (
+            scope,
+            tuple(sorted(set(tags or ()))),
+            tuple(sorted(set(any_tags or ()))),
+        )
+        cached = PostCountService._estimates.get(key)
+        if cached and cached[0] > PostCountService._changed_at.get(scope, 0.0):
+            return cached[1]
+
+        # Stamped before counting, so a change made during the count wins
+        counted_at = time.monotonic()
+        total = await PostCountService._count(db, scope, tags, any_tags)
+        PostCountService._estimates.set(key, (counted_at, total))
+        return total
+
+
+def _insert(db: AsyncSession):
+    """Dialect insert() supporting ON CONFLICT"""
+    if db.bind.dialect.name == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
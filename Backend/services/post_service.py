@@ -1,43 +1,182 @@
-from sqlalchemy.orm import Session
-from models.post import Post
-from schemas.post import PostCreate, PostUpdate
+import asyncio
+from sqlalchemy import select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from core.database import AsyncSessionLocal
+from core.etag import make_etag
+from core.pagination import encode_cursor, decode_cursor
+from models.post import Post, tag_filters
+from models.user import User
+from schemas.post import PostCreate, PostUpdate, PostResponse
+from services.post_count_service import PostCountService
+from services.counter_buffer import post_counters
+from services.blob_ref_service import BlobRefService, OWNER_POST
+from services.feed_cache import feed_cache
+from services.image_variants import image_variants
+from services.search_service import SearchService
+from services.trending import trending
 from typing import List, Optional
 
 
 class PostService:
     @staticmethod
-    def get_by_id(db: Session, post_id: str) -> Optional[Post]:
-        """Get post by ID"""
-        return db.query(Post).filter(Post.id == post_id).first()
+    async def get_by_id(db: AsyncSession, post_id: str) -> Optional[Post]:
+        """Get post by ID, with its author joined into the same query"""
+        result = await db.execute(
+            select(Post)
+            .options(joinedload(Post.user))
+            .filter(Post.id == post_id)
+            .execution_options(populate_existing=True)
+        )
+        post = result.scalars().first()
+        if post:
+            post_counters.apply([post])
+        return post
 
     @staticmethod
-    def get_all(
-        db: Session, skip: int = 0, limit: int = 20, user_id: Optional[str] = None
-    ) -> tuple[List[Post], int]:
-        """Get all posts with pagination"""
-        query = db.query(Post)
+    def etag(post_id: str, updated_at, author_updated_at) -> str:
+        """
+        ETag of a post's response: its and its author's updated_at, plus
+        like/save increments this worker has not written yet
+        """
+        pending = post_counters.pending(post_id)
+        parts = [post_id, updated_at, author_updated_at]
+        return make_etag(PostResponse, parts + [pending["likes"], pending["saves"]])
+
+    @staticmethod
+    async def get_etag(db: AsyncSession, post_id: str) -> Optional[str]:
+        """ETag of a post from two timestamps, without loading the row"""
+        result = await db.execute(
+            select(Post.updated_at, User.updated_at)
+            .join(User, Post.user_id == User.id)
+            .filter(Post.id == post_id)
+        )
+        row = result.first()
+        if row is None:
+            return None
+        return PostService.etag(post_id, *row)
+
+    @staticmethod
+    async def get_by_ids(db: AsyncSession, post_ids: List[str]) -> List[Post]:
+        """
+        Posts with the given ids in the order asked for, authors joined, in
+        one IN query; ids that do not exist are left out
+        """
+        if not post_ids:
+            return []
+        result = await db.execute(
+            select(Post)
+            .options(joinedload(Post.user))
+            .filter(Post.id.in_(post_ids))
+            .execution_options(populate_existing=True)
+        )
+        by_id = {post.id: post for post in result.scalars()}
+        posts = [by_id[post_id] for post_id in post_ids if post_id in by_id]
+        post_counters.apply(posts)
+        return posts
+
+    @staticmethod
+    async def get_all(
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 20,
+        user_id: Optional[str] = None,
+        cursor: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        any_tags: Optional[List[str]] = None,
+    ) -> tuple[List[Post], int, Optional[str]]:
+        """
+        Get posts newest first, paged by offset or by keyset cursor
+
+        When a cursor is given, skip is ignored and the page starts right
+        after the (created_at, id) position it encodes. One extra row is
+        fetched to decide whether a next cursor should be returned.
+
+        tags keeps posts carrying all of the given tags (@>), any_tags
+        posts carrying at least one (&&); both use the GIN index on tags.
+        Raises ValueError for a malformed cursor or, on a database that
+        cannot filter tags, for tags.
+        """
+        # Authors of the whole page are loaded with one IN query
+        query = select(Post).options(selectinload(Post.user))
 
         if user_id:
             query = query.filter(Post.user_id == user_id)
+        query = query.filter(*tag_filters(db.bind.dialect.name, tags, any_tags))
+
+        total = await PostCountService.get_total(db, user_id, tags, any_tags)
 
-        total = query.count()
-        posts = query.order_by(Post.created_at.desc()).offset(skip).limit(limit).all()
+        if cursor:
+            created_at, post_id = decode_cursor(cursor)
+            query = query.filter(
+                tuple_(Post.created_at, Post.id) < tuple_(created_at, post_id)
+            )
+            skip = 0
 
-        return posts, total
+        result = await db.execute(
+            query.order_by(Post.created_at.desc(), Post.id.desc())
+            .offset(skip)
+            .limit(limit + 1)
+            .execution_options(populate_existing=True)
+        )
+        posts = list(result.scalars().all())
+        post_counters.apply(posts)
+
+        next_cursor = None
+        if len(posts) > limit:
+            posts = posts[:limit]
+            next_cursor = encode_cursor(posts[-1].created_at, posts[-1].id)
+
+        return posts, total, next_cursor
 
     @staticmethod
-    def create(db: Session, user_id: str, post_data: PostCreate) -> Post:
-        """Create new post"""
+    async def create(db: AsyncSession, user_id: str, post_data: PostCreate) -> Post:
+        """
+        Create new post, raising ValueError for an upload that no longer
+        exists
+
+        Image variants and layout metadata are filled in the background
+        once the post is committed; until then they are null. Posts left
+        without them by a restart are picked up by backfill_images.py.
+        """
         post = Post(user_id=user_id, **post_data.model_dump())
         db.add(post)
-        db.commit()
-        db.refresh(post)
+        await db.flush()
+        BlobRefService.add(db, OWNER_POST, post.id, [post.image_url])
+        await PostCountService.adjust(db, user_id, 1)
+        await db.commit()
+        await feed_cache.invalidate(user_id)
+        SearchService.index_post(post)
+        await db.refresh(post, attribute_names=["user"])
+        image_variants.spawn(
+            PostService.render_image(post.id, user_id, post.image_url)
+        )
         return post
 
     @staticmethod
-    def update(db: Session, post_id: str, post_data: PostUpdate) -> Optional[Post]:
+    async def render_image(post_id: str, user_id: str, image_url: str) -> None:
+        """Store the image variants and layout metadata of a new post"""
+        variants, layout = await asyncio.gather(
+            image_variants.try_generate(image_url),
+            image_variants.try_analyze(image_url),
+        )
+        values = dict(layout or {})
+        if variants is not None:
+            values["image_variants"] = variants
+        if not values:
+            return
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(Post).where(Post.id == post_id).values(**values))
+            await db.commit()
+        await feed_cache.invalidate(user_id)
+
+    @staticmethod
+    async def update(
+        db: AsyncSession, post_id: str, post_data: PostUpdate
+    ) -> Optional[Post]:
         """Update post"""
-        post = PostService.get_by_id(db, post_id)
+        post = await PostService.get_by_id(db, post_id)
         if not post:
             return None
 
@@ -45,41 +184,46 @@ class PostService:
         for field, value in update_data.items():
             setattr(post, field, value)
 
-        db.commit()
-        db.refresh(post)
+        await db.commit()
+        await feed_cache.invalidate(post.user_id)
+        SearchService.index_post(post)
         return post
 
     @staticmethod
-    def delete(db: Session, post_id: str) -> bool:
+    async def delete(db: AsyncSession, post_id: str) -> bool:
         """Delete post"""
-        post = PostService.get_by_id(db, post_id)
+        post = await PostService.get_by_id(db, post_id)
         if not post:
             return False
 
-        db.delete(post)
-        db.commit()
+        await db.delete(post)
+        await BlobRefService.drop(db, OWNER_POST, post_id)
+        await PostCountService.adjust(db, post.user_id, -1)
+        await db.commit()
+        await feed_cache.invalidate(post.user_id)
+        SearchService.unindex(post_id=post_id)
+        trending.discard([post_id])
         return True
 
     @staticmethod
-    def like_post(db: Session, post_id: str) -> Optional[Post]:
-        """Increment likes count"""
-        post = PostService.get_by_id(db, post_id)
-        if not post:
-            return None
+    async def like_post(db: AsyncSession, post_id: str) -> Optional[Post]:
+        """Increment likes count through the write-behind counter buffer"""
+        return await PostService._increment(db, post_id, "likes")
 
-        post.likes += 1
-        db.commit()
-        db.refresh(post)
-        return post
+    @staticmethod
+    async def save_post(db: AsyncSession, post_id: str) -> Optional[Post]:
+        """Increment saves count through the write-behind counter buffer"""
+        return await PostService._increment(db, post_id, "saves")
 
     @staticmethod
-    def save_post(db: Session, post_id: str) -> Optional[Post]:
-        """Increment saves count"""
-        post = PostService.get_by_id(db, post_id)
+    async def _increment(db: AsyncSession, post_id: str, field: str) -> Optional[Post]:
+        post = await PostService.get_by_id(db, post_id)
         if not post:
             return None
 
-        post.saves += 1
-        db.commit()
-        db.refresh(post)
+        # Counts returned include pending increments; the buffer flushes them
+        post_counters.increment(post_id, field)
+        set_committed_value(post, field, getattr(post, field) + 1)
+        # Cached pages would show the old count until they expire
+        await feed_cache.invalidate(post.user_id)
         return post
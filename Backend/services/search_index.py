@@ -0,0 +1,168 @@
+import re
+from bisect import bisect_left, insort
+from collections import defaultdict
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Runs of letters and digits in any script; underscores split words
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+# A shorter last term matches whole words only; a one-letter prefix would
+# match and rank a large share of all documents
+MIN_PREFIX_LENGTH = 2
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercase alphanumeric tokens of a piece of text, in any script"""
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+class InvertedIndex:
+    """
+    In-process inverted index with prefix matching
+
+    Postings map token -> {doc number: weight}. A sorted vocabulary lets
+    the last query term match as a prefix (type-ahead) with a bisect
+    instead of a scan. Scoring is vectorized: each searched token's
+    postings are kept as numpy arrays, rebuilt only after the token's
+    postings change, so a term matching most of the corpus is summed with
+    one bincount instead of a loop over its documents. Used for
+    SQLite/dev, where there is no full-text index.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self._vocabulary: List[str] = []
+        self._doc_tokens: Dict[str, List[str]] = {}
+        # Documents are numbered once, in the order they are first seen
+        self._doc_ids: List[str] = []
+        self._doc_numbers: Dict[str, int] = {}
+        self._arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def upsert(self, doc_id: str, fields: Iterable[Tuple[Optional[str], float]]) -> None:
+        """(Re)index a document from (text, weight) pairs"""
+        self.remove(doc_id)
+        weights: Dict[str, float] = defaultdict(float)
+        for text, weight in fields:
+            for token in tokenize(text):
+                weights[token] += weight
+
+        number = self._doc_numbers.get(doc_id)
+        if number is None:
+            number = self._doc_numbers[doc_id] = len(self._doc_ids)
+            self._doc_ids.append(doc_id)
+        for token, weight in weights.items():
+            if not self._postings.get(token):
+                insort(self._vocabulary, token)
+            self._postings[token][number] = weight
+            self._arrays.pop(token, None)
+        self._doc_tokens[doc_id] = list(weights)
+
+    def remove(self, doc_id: str) -> None:
+        """Drop a document from the index"""
+        number = self._doc_numbers.get(doc_id)
+        for token in self._doc_tokens.pop(doc_id, []):
+            postings = self._postings[token]
+            postings.pop(number, None)
+            self._arrays.pop(token, None)
+            if not postings:
+                del self._postings[token]
+                index = bisect_left(self._vocabulary, token)
+                if index < len(self._vocabulary) and self._vocabulary[index] == token:
+                    del self._vocabulary[index]
+
+    def prefix_tokens(self, prefix: str, limit: Optional[int] = 200) -> List[str]:
+        """Vocabulary tokens starting with prefix, alphabetically"""
+        start = bisect_left(self._vocabulary, prefix)
+        end = None if limit is None else start + limit
+        tokens = []
+        for token in self._vocabulary[start:end]:
+            if not token.startswith(prefix):
+                break
+            tokens.append(token)
+        return tokens
+
+    def prefix_matches(self, query: str) -> Set[str]:
+        """Documents with, for every query term, a token starting with it"""
+        matched: Optional[Set[int]] = None
+        for term in tokenize(query):
+            docs: Set[int] = set()
+            for token in self.prefix_tokens(term, limit=None):
+                docs.update(self._postings[token])
+            matched = docs if matched is None else matched & docs
+            if not matched:
+                break
+        return {self._doc_ids[number] for number in matched or ()}
+
+    def prepare(self) -> None:
+        """Build every token's scoring arrays now instead of on first use"""
+        for token in self._postings:
+            self._token_arrays(token)
+
+    def _token_arrays(self, token: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Doc numbers and weights of a token's postings"""
+        arrays = self._arrays.get(token)
+        if arrays is None:
+            postings = self._postings[token]
+            arrays = self._arrays[token] = (
+                np.fromiter(postings.keys(), np.int32, len(postings)),
+                np.fromiter(postings.values(), np.float32, len(postings)),
+            )
+        return arrays
+
+    def search(self, query: str, limit: int) -> List[str]:
+        """
+        Rank documents matching every query term
+
+        All terms but the last must match whole tokens; the last matches
+        any token it is a prefix of once it is MIN_PREFIX_LENGTH long.
+        Ties go to the document indexed last, so feeding documents in
+        creation order ranks newer ones first.
+        """
+        terms = tokenize(query)
+        if not terms or limit <= 0:
+            return []
+
+        size = len(self._doc_ids)
+        scores: Optional[np.ndarray] = None
+        matched: Optional[np.ndarray] = None
+        for position, term in enumerate(terms):
+            is_last = position == len(terms) - 1
+            if is_last and len(term) >= MIN_PREFIX_LENGTH:
+                tokens = self.prefix_tokens(term)
+            else:
+                tokens = [term]
+            docs, weights = [], []
+            for token in tokens:
+                if not self._postings.get(token):
+                    continue
+                token_docs, token_weights = self._token_arrays(token)
+                docs.append(token_docs)
+                # Exact matches outrank prefix matches
+                weights.append(token_weights * (1.0 if token == term else 0.5))
+            if not docs:
+                return []
+            term_scores = np.bincount(
+                np.concatenate(docs), np.concatenate(weights), minlength=size
+            )
+            if scores is None:
+                scores, matched = term_scores, term_scores > 0
+            else:
+                scores += term_scores
+                matched &= term_scores > 0
+
+        candidates = np.flatnonzero(matched)
+        candidate_scores = scores[candidates]
+        if len(candidates) > limit:
+            # The limit-th best score; fewer than limit documents beat it,
+            # the rest of the page is the newest of those tying with it
+            kth = np.partition(candidate_scores, -limit)[-limit]
+            above = np.flatnonzero(candidate_scores > kth)
+            tied = np.flatnonzero(candidate_scores == kth)
+            keep = np.concatenate([above, tied[len(above) - limit :]])
+            candidates, candidate_scores = candidates[keep], candidate_scores[keep]
+        order = np.lexsort((-candidates, -candidate_scores))
+        return [self._doc_ids[number] for number in candidates[order].tolist()]
+
+    def __len__(self) -> int:
+        return len(self._doc_tokens)
@@ -0,0 +1,225 @@
+import asyncio
+import logging
+import time
+from collections import Counter
+from sqlalchemy import case, func, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from core.config import settings
+from core.database import AsyncSessionLocal
+from models.post import Post, SEARCH_VECTOR
+from models.user import User
+from schemas.search import SearchResponse, TagMatch
+from services.search_index import MIN_PREFIX_LENGTH, InvertedIndex, tokenize
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Field weights shared by both search paths
+POST_WEIGHTS = {"title": 3.0, "tags": 2.0, "description": 1.0}
+USER_WEIGHTS = {"name": 2.0, "username": 2.0}
+
+# Trigram indexes cannot narrow a substring match shorter than a trigram
+MIN_SUBSTRING_LENGTH = 3
+# Seconds before a failed tag histogram refresh is retried
+TAGS_RETRY_INTERVAL = 10
+
+
+class SearchService:
+    """
+    Ranked search across posts, tags and creators
+
+    On Postgres, posts are matched with a prefix tsquery against the stored
+    search_vector column and its GIN index, and creators with pg_trgm
+    similarity from the third character on. Elsewhere (SQLite/dev) an
+    in-process inverted index is built on first use and kept current by
+    the post/user services. Tags are matched in memory against a histogram
+    refreshed in the background.
+    """
+
+    _post_index = InvertedIndex()
+    _user_index = InvertedIndex()
+    _built = False
+    _build_lock = asyncio.Lock()
+    # Tag counts and an index of their words, replaced together
+    _tags: Optional[Tuple[Dict[str, int], InvertedIndex]] = None
+    _tags_expire_at = 0.0
+    _tags_refresh: Optional[asyncio.Task] = None
+
+    @staticmethod
+    async def search(db: AsyncSession, query: str, limit: int = 10) -> SearchResponse:
+        """Search posts, creators and tags for a (possibly partial) query"""
+        if db.bind.dialect.name == "postgresql":
+            posts = await SearchService._search_posts_pg(db, query, limit)
+            users = await SearchService._search_users_pg(db, query, limit)
+        else:
+            await SearchService._ensure_index(db)
+            post_ids = SearchService._post_index.search(query, limit)
+            user_ids = SearchService._user_index.search(query, limit)
+            posts = await SearchService._load(db, Post, post_ids)
+            users = await SearchService._load(db, User, user_ids)
+
+        tags = await SearchService._search_tags(query, limit)
+        return SearchResponse(query=query, posts=posts, users=users, tags=tags)
+
+    @staticmethod
+    async def _search_posts_pg(db: AsyncSession, query: str, limit: int) -> List[Post]:
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        # Whole words for all but the last term, which matches as a prefix
+        last = terms[-1]
+        if len(last) >= MIN_PREFIX_LENGTH:
+            last += ":*"
+        ts_query = func.to_tsquery(text("'simple'"), " & ".join(terms[:-1] + [last]))
+        tag_match = Post.tags.overlap([query.strip().lower(), *terms])
+        rank = func.ts_rank(SEARCH_VECTOR, ts_query) + case((tag_match, 1.0), else_=0.0)
+
+        result = await db.execute(
+            select(Post)
+            .options(selectinload(Post.user))
+            .where(or_(SEARCH_VECTOR.op("@@")(ts_query), tag_match))
+            .order_by(rank.desc(), Post.created_at.desc())
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def _search_users_pg(db: AsyncSession, query: str, limit: int) -> List[User]:
+        term = query.strip()
+        if len(term) < MIN_SUBSTRING_LENGTH:
+            return []
+        escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        pattern = f"%{escaped}%"
+        similarity = func.greatest(
+            func.similarity(User.name, term),
+            func.similarity(func.coalesce(User.username, ""), term),
+        )
+        result = await db.execute(
+            select(User)
+            .where(or_(User.name.ilike(pattern), User.username.ilike(pattern)))
+            .order_by(similarity.desc(), User.name)
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def _search_tags(query: str, limit: int) -> List[TagMatch]:
+        """Prefix-match tags by any word, most used first"""
+        if not tokenize(query):
+            return []
+
+        counts, index = await SearchService._tag_histogram()
+        matches = sorted(index.prefix_matches(query), key=lambda t: (-counts[t], t))
+        return [TagMatch(tag=tag, count=counts[tag]) for tag in matches[:limit]]
+
+    @staticmethod
+    async def _tag_histogram() -> Tuple[Dict[str, int], InvertedIndex]:
+        """
+        Tag counts, refreshed every SEARCH_TAGS_TTL by one background task
+
+        Requests keep reading the previous histogram during a refresh;
+        only requests arriving before the first one is loaded wait for it.
+        """
+        if (
+            SearchService._tags_refresh is None
+            and SearchService._tags_expire_at <= time.monotonic()
+        ):
+            SearchService._tags_refresh = asyncio.create_task(
+                SearchService._refresh_tags()
+            )
+        if SearchService._tags is None and SearchService._tags_refresh is not None:
+            await asyncio.shield(SearchService._tags_refresh)
+        return SearchService._tags or ({}, InvertedIndex())
+
+    @staticmethod
+    async def _refresh_tags() -> None:
+        # Tags are low-cardinality, so a periodically refreshed histogram is enough
+        retry_in = settings.SEARCH_TAGS_TTL
+        try:
+            async with AsyncSessionLocal() as db:
+                if db.bind.dialect.name == "postgresql":
+                    tag = func.unnest(Post.tags).label("tag")
+                    subquery = select(tag).subquery()
+                    result = await db.execute(
+                        select(subquery.c.tag, func.count()).group_by(subquery.c.tag)
+                    )
+                    counts = dict(result.all())
+                else:
+                    result = await db.execute(select(Post.tags))
+                    counts = Counter(t for (tags,) in result.all() for t in tags or [])
+
+            index = InvertedIndex()
+            for tag in counts:
+                index.upsert(tag, [(tag, 1.0)])
+            SearchService._tags = (counts, index)
+        except Exception:
+            logger.exception("Refreshing tag counts failed")
+            retry_in = TAGS_RETRY_INTERVAL
+        finally:
+            SearchService._tags_expire_at = time.monotonic() + retry_in
+            SearchService._tags_refresh = None
+
+    @staticmethod
+    async def _load(db: AsyncSession, model, ids: Sequence[str]) -> list:
+        """Load rows by id, keeping the ranked order"""
+        if not ids:
+            return []
+        query = select(model).where(model.id.in_(ids))
+        if model is Post:
+            query = query.options(selectinload(Post.user))
+        rows = {row.id: row for row in (await db.execute(query)).scalars().all()}
+        return [rows[i] for i in ids if i in rows]
+
+    @staticmethod
+    async def _ensure_index(db: AsyncSession) -> None:
+        if SearchService._built:
+            return
+        async with SearchService._build_lock:
+            if SearchService._built:
+                return
+            # Only the indexed columns, oldest first so that the index
+            # ranks the newer of two equal matches first
+            posts = select(
+                Post.id, Post.title, Post.tags, Post.description
+            ).order_by(Post.created_at, Post.id)
+            for post in (await db.execute(posts)).all():
+                SearchService.index_post(post, force=True)
+            users = select(User.id, User.name, User.username).order_by(
+                User.created_at, User.id
+            )
+            for user in (await db.execute(users)).all():
+                SearchService.index_user(user, force=True)
+            SearchService._post_index.prepare()
+            SearchService._built = True
+
+    @staticmethod
+    def index_post(post: Post, force: bool = False) -> None:
+        """Add or refresh a post in the in-process index, once it exists"""
+        if SearchService._built or force:
+            SearchService._post_index.upsert(
+                post.id,
+                [
+                    (post.title, POST_WEIGHTS["title"]),
+                    (" ".join(post.tags or []), POST_WEIGHTS["tags"]),
+                    (post.description, POST_WEIGHTS["description"]),
+                ],
+            )
+
+    @staticmethod
+    def index_user(user: User, force: bool = False) -> None:
+        """Add or refresh a user in the in-process index, once it exists"""
+        if SearchService._built or force:
+            SearchService._user_index.upsert(
+                user.id,
+                [(user.name, USER_WEIGHTS["name"]), (user.username, USER_WEIGHTS["username"])],
+            )
+
+    @staticmethod
+    def unindex(post_id: Optional[str] = None, user_id: Optional[str] = None) -> None:
+        """Remove a deleted post or user from the in-process index"""
+        if post_id:
+            SearchService._post_index.remove(post_id)
+        if user_id:
+            SearchService._user_index.remove(user_id)
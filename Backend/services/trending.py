@@ -0,0 +1,273 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy import delete, insert, select, text, tuple_
+from core.config import settings
+from core.database import AsyncSessionLocal
+from models.post import Post
+from models.trending_post import TrendingPost
+from typing import AsyncIterator, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Changed posts are looked for from a little before the previous scan, so
+# a commit stamped by a slightly slower clock on another worker is not lost
+WATERMARK_OVERLAP = timedelta(seconds=5)
+
+SCORE_COLUMNS = (
+    Post.id,
+    Post.likes,
+    Post.saves,
+    Post.is_ai_generated,
+    Post.created_at,
+)
+
+
+def score_posts(
+    likes: np.ndarray,
+    saves: np.ndarray,
+    is_ai_generated: np.ndarray,
+    created_at: np.ndarray,  # datetime64[us]
+    save_weight: float,
+    ai_boost: float,
+    decay_seconds: float,
+) -> np.ndarray:
+    """
+    Trending scores for a batch of posts
+
+    log10 of the weighted engagement plus the creation time in units of
+    decay_seconds, so a post decay_seconds newer needs a tenth of the
+    engagement to rank level. The time term grows with creation time
+    instead of shrinking with the clock: a post's score only changes when
+    its engagement does, and scores computed at different times compare.
+    """
+    boost = np.where(is_ai_generated, ai_boost, 1.0)
+    engagement = (likes + save_weight * saves) * boost
+    seconds = created_at.astype(np.int64) / 1e6
+    return np.log10(np.maximum(engagement, 1.0)) + seconds / decay_seconds
+
+
+class TrendingEngine:
+    """
+    Keeps the top trending posts ranked in memory
+
+    Every rebuild_interval seconds all posts of the last window_days are
+    scored in batches of batch_size. In between, every interval seconds,
+    only posts whose updated_at moved since the previous scan (counter
+    flushes and edits bump it) are rescored. Each batch is merged with
+    one vectorized sort of at most size + batch_size scores, so the work
+    follows the number of changed posts, not the number of posts.
+
+    Reads slice the ranked ids, which costs O(page). The ranking is
+    snapshotted to trending_posts after each rebuild; a starting worker
+    serves the snapshot until its own first rebuild is done.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        interval: float,
+        rebuild_interval: float,
+        window_days: int,
+        batch_size: int,
+        decay_seconds: float,
+        save_weight: float,
+        ai_boost: float,
+    ):
+        self.size = size
+        self.interval = interval
+        self.rebuild_interval = rebuild_interval
+        self.window_days = window_days
+        self.batch_size = batch_size
+        self.decay_seconds = decay_seconds
+        self.save_weight = save_weight
+        self.ai_boost = ai_boost
+        # Post ids best first, and their scores; replaced together
+        self._ids: List[str] = []
+        self._scores = np.empty(0)
+        self._watermark: Optional[datetime] = None
+        self._last_rebuild = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self.rebuilds = 0
+        self.updates = 0
+        self.rescored = 0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def page(self, skip: int, limit: int) -> List[str]:
+        """Ids of the posts ranked skip to skip + limit"""
+        return self._ids[skip : skip + limit]
+
+    def discard(self, post_ids: Sequence[str]) -> None:
+        """Drop deleted posts from the ranking until the next rebuild"""
+        gone = set(post_ids)
+        keep = [i for i, post_id in enumerate(self._ids) if post_id not in gone]
+        if len(keep) < len(self._ids):
+            self._ids, self._scores = [self._ids[i] for i in keep], self._scores[keep]
+
+    def _merge(self, ids: List[str], scores: np.ndarray, rows) -> tuple:
+        """Ranking ids, scores with a batch of rows rescored and merged in"""
+        batch_ids, likes, saves, is_ai_generated, created_at = zip(*rows)
+        # NULL counters come through as NaN and count as no engagement
+        batch_scores = score_posts(
+            np.nan_to_num(np.array(likes, dtype=float)),
+            np.nan_to_num(np.array(saves, dtype=float)),
+            np.array(is_ai_generated, dtype=bool),
+            np.array(created_at, dtype="datetime64[us]"),
+            self.save_weight,
+            self.ai_boost,
+            self.decay_seconds,
+        )
+
+        rescored = set(batch_ids)
+        keep = [i for i, post_id in enumerate(ids) if post_id not in rescored]
+        all_ids = np.array([ids[i] for i in keep] + list(batch_ids), dtype=object)
+        all_scores = np.concatenate([scores[keep], batch_scores])
+        order = np.argsort(-all_scores, kind="stable")[: self.size]
+        self.rescored += len(batch_ids)
+        return list(all_ids[order]), all_scores[order]
+
+    async def _batches(self, condition, key) -> AsyncIterator[list]:
+        """Score columns of matching posts, batch_size rows at a time"""
+        position = None
+        async with AsyncSessionLocal() as db:
+            while True:
+                query = select(*SCORE_COLUMNS, key).where(condition)
+                if position is not None:
+                    query = query.where(tuple_(key, Post.id) > position)
+                result = await db.execute(
+                    query.order_by(key, Post.id).limit(self.batch_size)
+                )
+                rows = result.all()
+                if not rows:
+                    return
+                yield [row[:-1] for row in rows]
+                if len(rows) < self.batch_size:
+                    return
+                position = (rows[-1][-1], rows[-1][0])
+
+    def _window_start(self) -> datetime:
+        return datetime.utcnow() - timedelta(days=self.window_days)
+
+    async def rebuild(self) -> None:
+        """Score every post in the window into a fresh ranking"""
+        watermark = datetime.utcnow()
+        ids: List[str] = []
+        scores = np.empty(0)
+        async for rows in self._batches(
+            Post.created_at >= self._window_start(), Post.created_at
+        ):
+            ids, scores = self._merge(ids, scores, rows)
+        self._ids, self._scores = ids, scores
+        self._watermark = watermark
+        self._last_rebuild = time.monotonic()
+        self.rebuilds += 1
+        await self.save_snapshot()
+
+    async def update(self) -> None:
+        """Rescore the posts changed since the previous scan"""
+        watermark = datetime.utcnow()
+        ids, scores = self._ids, self._scores
+        changed = (Post.updated_at > self._watermark - WATERMARK_OVERLAP) & (
+            Post.created_at >= self._window_start()
+        )
+        async for rows in self._batches(changed, Post.updated_at):
+            ids, scores = self._merge(ids, scores, rows)
+        self._ids, self._scores = ids, scores
+        self._watermark = watermark
+        self.updates += 1
+
+    async def save_snapshot(self) -> None:
+        """Replace the trending_posts table with the current ranking"""
+        async with AsyncSessionLocal() as db:
+            if db.bind.dialect.name == "postgresql":
+                # Workers snapshot on their own schedules; one at a time
+                await db.execute(
+                    text("LOCK TABLE trending_posts IN SHARE ROW EXCLUSIVE MODE")
+                )
+            await db.execute(delete(TrendingPost))
+            if self._ids:
+                await db.execute(
+                    insert(TrendingPost),
+                    [
+                        {
+                            "post_id": post_id,
+                            "rank": rank,
+                            "score": float(score),
+                            "as_of": self._watermark,
+                        }
+                        for rank, (post_id, score) in enumerate(
+                            zip(self._ids, self._scores)
+                        )
+                    ],
+                )
+            await db.commit()
+
+    async def load_snapshot(self) -> None:
+        """Serve the last snapshot until this worker has ranked posts itself"""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(TrendingPost.post_id, TrendingPost.score).order_by(
+                    TrendingPost.rank
+                )
+            )
+            rows = result.all()
+        if rows and not self._ids:
+            self._ids = [row.post_id for row in rows]
+            self._scores = np.array([row.score for row in rows], dtype=float)
+
+    async def _run(self) -> None:
+        try:
+            await self.load_snapshot()
+        except Exception:
+            logger.exception("Loading the trending snapshot failed")
+        while True:
+            try:
+                if (
+                    self._watermark is None
+                    or time.monotonic() - self._last_rebuild >= self.rebuild_interval
+                ):
+                    await self.rebuild()
+                else:
+                    await self.update()
+            except Exception:
+                logger.exception("Recomputing trending posts failed")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start the recompute loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "ranked": len(self._ids),
+            "watermark": self._watermark.isoformat() if self._watermark else None,
+            "rebuilds": self.rebuilds,
+            "updates": self.updates,
+            "rescored": self.rescored,
+        }
+
+
+trending = TrendingEngine(
+    size=settings.TRENDING_SIZE,
+    interval=settings.TRENDING_INTERVAL,
+    rebuild_interval=settings.TRENDING_REBUILD_INTERVAL,
+    window_days=settings.TRENDING_WINDOW_DAYS,
+    batch_size=settings.TRENDING_BATCH_SIZE,
+    decay_seconds=settings.TRENDING_DECAY_SECONDS,
+    save_weight=settings.TRENDING_SAVE_WEIGHT,
+    ai_boost=settings.TRENDING_AI_BOOST,
+)
@@ -0,0 +1,206 @@
+import asyncio
+import hashlib
+import os
+import re
+import uuid
+from pathlib import Path
+from multipart.multipart import MultipartParser, parse_options_header
+from core.config import settings
+from schemas.upload import ImageMetadata
+from services.image_validation import inspect_image
+from typing import AsyncIterator, BinaryIO, Optional, Tuple
+
+# Leading bytes of the image formats we accept, mapped to file extensions
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "jpg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+)
+# SHA-256 of the content
+IMAGE_ID_PATTERN = re.compile(r"^[0-9a-f]{64}\.(jpg|png|gif|webp)$")
+IMAGES_DIR = "images"
+
+
+class UploadError(Exception):
+    """Raised for a malformed upload or an unsupported file"""
+
+
+class UploadTooLargeError(UploadError):
+    """Raised as soon as an upload passes MAX_FILE_SIZE"""
+
+
+def sniff_extension(head: bytes) -> Optional[str]:
+    """File extension for an image, judged from its first bytes"""
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    for signature, extension in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return extension
+    return None
+
+
+class _ImagePartWriter:
+    """
+    multipart parser callbacks that write the first file part to disk
+
+    Only the current chunk is ever held in memory. The callbacks do
+    blocking file I/O, so the parser is fed from a worker thread.
+    """
+
+    def __init__(self, tmp_path: Path, max_size: int):
+        self.tmp_path = tmp_path
+        self.max_size = max_size
+        self.size = 0
+        self.head = b""
+        self.digest = hashlib.sha256()
+        self.done = False
+        self._file: Optional[BinaryIO] = None
+        self._is_file_part = False
+        self._header_field = b""
+        self._header_value = b""
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        if self._header_field.lower() == b"content-disposition":
+            _, options = parse_options_header(self._header_value)
+            self._is_file_part = b"filename" in options
+        self._header_field = self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        if self._is_file_part and not self.done and self._file is None:
+            self._file = open(self.tmp_path, "wb")
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._file is None:
+            return
+        self.size += end - start
+        if self.size > self.max_size:
+            raise UploadTooLargeError(f"File exceeds {self.max_size} bytes")
+        if len(self.head) < 16:
+            self.head += data[start : min(end, start + 16)]
+        self._file.write(data[start:end])
+        self.digest.update(data[start:end])
+
+    def on_part_end(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self.done = True
+        self._is_file_part = False
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class UploadService:
+    @staticmethod
+    def images_dir() -> Path:
+        path = Path(settings.UPLOAD_DIR) / IMAGES_DIR
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    @staticmethod
+    async def save_multipart(
+        content_type: str, chunks: AsyncIterator[bytes]
+    ) -> Tuple[str, ImageMetadata]:
+        """
+        Stream the file part of a multipart body into UPLOAD_DIR
+
+        Files are stored once, named by the SHA-256 of their bytes, so
+        uploading the same image again keeps the existing file and returns
+        the same id. Returns the image id and its metadata. Raises
+        UploadTooLargeError as soon as the file passes MAX_FILE_SIZE and
+        UploadError for anything that is not a valid JPEG/PNG/GIF/WebP
+        image within the dimension limits.
+        """
+        mime_type, options = parse_options_header(content_type)
+        boundary = options.get(b"boundary")
+        if mime_type != b"multipart/form-data" or not boundary:
+            raise UploadError("Expected a multipart/form-data body")
+
+        tmp_path = UploadService.images_dir() / f".{uuid.uuid4().hex}.part"
+        writer = _ImagePartWriter(tmp_path, settings.MAX_FILE_SIZE)
+        callbacks = {
+            name: getattr(writer, name)
+            for name in (
+                "on_header_field",
+                "on_header_value",
+                "on_header_end",
+                "on_headers_finished",
+                "on_part_data",
+                "on_part_end",
+            )
+        }
+        parser = MultipartParser(boundary, callbacks)
+
+        try:
+            async for chunk in chunks:
+                await asyncio.to_thread(parser.write, chunk)
+            await asyncio.to_thread(parser.finalize)
+            await asyncio.to_thread(writer.close)
+
+            if not writer.done:
+                raise UploadError("No file part in the upload")
+            extension = sniff_extension(writer.head)
+            if extension is None:
+                raise UploadError("Unsupported image format")
+            try:
+                metadata = await asyncio.to_thread(inspect_image, tmp_path)
+            except ValueError as e:
+                raise UploadError(str(e))
+
+            image_id = f"{writer.digest.hexdigest()}.{extension}"
+            path = UploadService.images_dir() / image_id
+            try:
+                # Duplicate: keep the stored blob, restarting its GC grace period
+                os.utime(path)
+            except FileNotFoundError:
+                # New, or collected since it was last uploaded
+                os.replace(tmp_path, path)
+            return image_id, metadata
+        finally:
+            writer.close()
+            tmp_path.unlink(missing_ok=True)
+
+    @staticmethod
+    def path_for(image_id: str) -> Optional[Path]:
+        """Path of an uploaded image, or None if the id is unknown"""
+        if not IMAGE_ID_PATTERN.match(image_id):
+            return None
+        path = Path(settings.UPLOAD_DIR) / IMAGES_DIR / image_id
+        return path if path.is_file() else None
+
+    @staticmethod
+    def touch(image_id: str) -> bool:
+        """Set an upload's mtime to now; False if the id is unknown"""
+        if not IMAGE_ID_PATTERN.match(image_id):
+            return False
+        try:
+            os.utime(Path(settings.UPLOAD_DIR) / IMAGES_DIR / image_id)
+        except FileNotFoundError:
+            return False
+        return True
+
+    @staticmethod
+    def content_hash(image_id: str) -> bytes:
+        """SHA-256 of an upload's bytes, read from its id"""
+        return bytes.fromhex(image_id.rsplit(".", 1)[0])
+
+    @staticmethod
+    def url_for(image_id: str) -> str:
+        """Public URL of an uploaded image"""
+        return f"/uploads/{IMAGES_DIR}/{image_id}"
+
+    @staticmethod
+    def id_from_url(url: str) -> Optional[str]:
+        """Image id behind a URL from url_for, or None for any other URL"""
+        prefix = UploadService.url_for("")
+        return url[len(prefix):] if url.startswith(prefix) else None
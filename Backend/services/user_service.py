@@ -1,43 +1,88 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.auth import invalidate_user
+from core.etag import make_etag
 from models.user import User
-from schemas.user import UserCreate, UserUpdate
-from typing import Optional
+from schemas.user import UserCreate, UserResponse, UserUpdate
+from services.blob_ref_service import BlobRefService
+from services.post_count_service import PostCountService
+from services.feed_cache import feed_cache
+from services.search_service import SearchService
+from typing import List, Optional
 
 
 class UserService:
     @staticmethod
-    def get_by_id(db: Session, user_id: str) -> Optional[User]:
+    async def get_by_id(db: AsyncSession, user_id: str) -> Optional[User]:
         """Get user by ID"""
-        return db.query(User).filter(User.id == user_id).first()
+        result = await db.execute(select(User).filter(User.id == user_id))
+        return result.scalars().first()
 
     @staticmethod
-    def get_by_email(db: Session, email: str) -> Optional[User]:
+    def etag(user_id: str, updated_at) -> str:
+        """ETag of a user's response"""
+        return make_etag(UserResponse, [user_id, updated_at])
+
+    @staticmethod
+    async def get_etag(
+        db: AsyncSession, user_id: Optional[str] = None, username: Optional[str] = None
+    ) -> Optional[str]:
+        """ETag of a user by id or username, without loading the row"""
+        query = select(User.id, User.updated_at)
+        if user_id is not None:
+            query = query.filter(User.id == user_id)
+        else:
+            query = query.filter(User.username == username)
+        row = (await db.execute(query)).first()
+        if row is None:
+            return None
+        return UserService.etag(*row)
+
+    @staticmethod
+    async def get_by_ids(db: AsyncSession, user_ids: List[str]) -> List[User]:
+        """
+        Users with the given ids in the order asked for, in one IN query;
+        ids that do not exist are left out
+        """
+        if not user_ids:
+            return []
+        result = await db.execute(select(User).filter(User.id.in_(user_ids)))
+        by_id = {user.id: user for user in result.scalars()}
+        return [by_id[user_id] for user_id in user_ids if user_id in by_id]
+
+    @staticmethod
+    async def get_by_email(db: AsyncSession, email: str) -> Optional[User]:
         """Get user by email"""
-        return db.query(User).filter(User.email == email).first()
+        result = await db.execute(select(User).filter(User.email == email))
+        return result.scalars().first()
 
     @staticmethod
-    def get_by_username(db: Session, username: str) -> Optional[User]:
+    async def get_by_username(db: AsyncSession, username: str) -> Optional[User]:
         """Get user by username"""
-        return db.query(User).filter(User.username == username).first()
+        result = await db.execute(select(User).filter(User.username == username))
+        return result.scalars().first()
 
     @staticmethod
-    def get_by_google_id(db: Session, google_id: str) -> Optional[User]:
+    async def get_by_google_id(db: AsyncSession, google_id: str) -> Optional[User]:
         """Get user by Google ID"""
-        return db.query(User).filter(User.google_id == google_id).first()
+        result = await db.execute(select(User).filter(User.google_id == google_id))
+        return result.scalars().first()
 
     @staticmethod
-    def create(db: Session, user_data: UserCreate) -> User:
+    async def create(db: AsyncSession, user_data: UserCreate) -> User:
         """Create new user"""
         user = User(**user_data.model_dump())
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        SearchService.index_user(user)
         return user
 
     @staticmethod
-    def update(db: Session, user_id: str, user_data: UserUpdate) -> Optional[User]:
+    async def update(
+        db: AsyncSession, user_id: str, user_data: UserUpdate
+    ) -> Optional[User]:
         """Update user"""
-        user = UserService.get_by_id(db, user_id)
+        user = await UserService.get_by_id(db, user_id)
         if not user:
             return None
 
@@ -45,17 +90,25 @@ class UserService:
         for field, value in update_data.items():
             setattr(user, field, value)
 
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        invalidate_user(user_id)
+        # Feed pages embed the author, so their cached copies are stale
+        await feed_cache.invalidate(user_id)
+        SearchService.index_user(user)
         return user
 
     @staticmethod
-    def delete(db: Session, user_id: str) -> bool:
+    async def delete(db: AsyncSession, user_id: str) -> bool:
         """Delete user"""
-        user = UserService.get_by_id(db, user_id)
+        user = await UserService.get_by_id(db, user_id)
         if not user:
             return False
 
-        db.delete(user)
-        db.commit()
+        await PostCountService.drop_user(db, user_id)
+        await BlobRefService.drop_user(db, user_id)
+        await db.delete(user)
+        await db.commit()
+        invalidate_user(user_id)
+        await feed_cache.invalidate(user_id)
+        SearchService.unindex(user_id=user_id)
         return True
@@ -0,0 +1,69 @@
+"""
+Test setup: the app runs against a throwaway SQLite database
+
+Settings are read when core.config is first imported, so the environment
+is filled in here before any app module is. Set TEST_DATABASE_URL to run
+the suite against another database; its tables are dropped afterwards.
+"""
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+_tmp = tempfile.mkdtemp(prefix="thread-ai-tests-")
+os.environ["DATABASE_URL"] = os.environ.get(
+    "TEST_DATABASE_URL", f"sqlite:///{_tmp}/test.db"
+)
+os.environ["UPLOAD_DIR"] = os.path.join(_tmp, "uploads")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GOOGLE_CLIENT_ID", "test-client-id")
+os.environ.setdefault("GOOGLE_CLIENT_SECRET", "test-client-secret")
+os.environ["INTERNAL_API_TOKEN"] = "test-internal-token"
+# Every request should reach the database unless a test says otherwise
+os.environ["FEED_CACHE_TTL"] = "0"
+
+import asyncio  # noqa: E402
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from core.database import Base, async_engine, engine  # noqa: E402
+from core.security import create_access_token  # noqa: E402
+import init_db  # noqa: E402,F401  registers every model with Base.metadata
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    # Pooled aiosqlite connections each hold a thread that keeps the
+    # interpreter from exiting
+    asyncio.run(async_engine.dispose())
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture(autouse=True)
+def clean_tables(database):
+    yield
+    with database.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+
+
+@pytest.fixture
+def client():
+    """Client for the app without its lifespan, so no background tasks run"""
+    from main import app
+
+    return TestClient(app)
+
+
+@pytest.fixture
+def auth_headers():
+    """Authorization headers for a user id"""
+
+    def make(user_id: str) -> dict:
+        token = create_access_token(data={"sub": user_id})
+        return {"Authorization": f"Bearer {token}"}
+
+    return make
@@ -0,0 +1,156 @@
+"""Admission control for generation requests"""
+import asyncio
+from types import SimpleNamespace
+import pytest
+from services.admission import (
+    MAX_RETRY_AFTER,
+    AdmissionController,
+    AdmissionRejected,
+    MemoryBucketBackend,
+    retry_after_header,
+)
+
+SLOW = 1e-6  # tokens per second; buckets do not refill during a test
+
+
+def controller(**overrides) -> AdmissionController:
+    options = dict(
+        user_rate=SLOW,
+        user_burst=10,
+        global_rate=SLOW,
+        global_burst=10,
+        max_in_flight=1,
+        max_in_flight_per_user=1,
+        max_queued=10,
+        queue_timeout=5.0,
+    )
+    options.update(overrides)
+    return AdmissionController(MemoryBucketBackend(), **options)
+
+
+def tokens(admission, key) -> float:
+    return admission.backend._buckets[key][0]
+
+
+def rejection(coro) -> str:
+    with pytest.raises(AdmissionRejected) as e:
+        asyncio.run(coro)
+    return e.value.reason
+
+
+def test_global_rejection_leaves_the_user_token():
+    admission = controller(global_burst=1, user_burst=2)
+    asyncio.run(admission.check_rate("alice"))
+    assert rejection(admission.check_rate("alice")) == "global_rate"
+    assert tokens(admission, "alice") == pytest.approx(1)
+
+
+def test_user_rejection_leaves_the_global_token():
+    admission = controller(global_burst=2, user_burst=1)
+    asyncio.run(admission.check_rate("alice"))
+    assert rejection(admission.check_rate("alice")) == "user_rate"
+    assert tokens(admission, "*") == pytest.approx(1)
+    asyncio.run(admission.check_rate("bob"))
+
+
+async def hold(admission, user, release: asyncio.Event):
+    async with admission.slot(user):
+        await release.wait()
+
+
+def test_queued_request_counts_against_the_user_limit():
+    async def run():
+        admission = controller()
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold(admission, "alice", release))
+        waiter = asyncio.create_task(hold(admission, "bob", release))
+        await asyncio.sleep(0)
+        assert admission.stats()["waiting"] == 1
+        # bob's first request is only queued, yet a second one is refused
+        with pytest.raises(AdmissionRejected) as e:
+            async with admission.slot("bob"):
+                pass
+        release.set()
+        await asyncio.gather(holder, waiter)
+        return e.value.reason, admission
+
+    reason, admission = asyncio.run(run())
+    assert reason == "user_in_flight"
+    assert admission._reserved_by_user == {}
+
+
+def test_reservation_is_released_on_timeout():
+    async def run():
+        admission = controller(queue_timeout=0.01)
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold(admission, "alice", release))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as e:
+            await hold(admission, "bob", release)
+        reserved = dict(admission._reserved_by_user)
+        release.set()
+        await holder
+        return e.value.reason, reserved
+
+    reason, reserved = asyncio.run(run())
+    assert reason == "queue_timeout"
+    assert reserved == {"alice": 1}
+
+
+def test_reservation_is_released_on_cancel():
+    async def run():
+        admission = controller()
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold(admission, "alice", release))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(hold(admission, "bob", release))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        reserved = dict(admission._reserved_by_user)
+        stats = admission.stats()
+        release.set()
+        await holder
+        return reserved, stats
+
+    reserved, stats = asyncio.run(run())
+    assert reserved == {"alice": 1}
+    assert stats["waiting"] == 0 and stats["in_flight"] == 1
+
+
+def test_sweep_drops_only_refilled_buckets(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(
+        "services.admission.time", SimpleNamespace(monotonic=lambda: clock[0])
+    )
+    backend = MemoryBucketBackend(sweep_interval=60)
+
+    async def take(key, rate):
+        return await backend.take([(key, rate, 2)])
+
+    asyncio.run(take("fast", 1.0))  # full again after 1s
+    asyncio.run(take("slow", 0.001))  # after 1000s
+    clock[0] += 30
+    asyncio.run(take("other", 1.0))
+    # No sweep before the interval has passed
+    assert set(backend._buckets) == {"fast", "slow", "other"}
+
+    clock[0] += 31
+    asyncio.run(take("other", 1.0))
+    assert set(backend._buckets) == {"slow", "other"}
+
+
+def test_bucket_without_refill_is_kept_and_capped(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(
+        "services.admission.time", SimpleNamespace(monotonic=lambda: clock[0])
+    )
+    backend = MemoryBucketBackend(sweep_interval=60)
+
+    assert asyncio.run(backend.take([("frozen", 0.0, 1)])) == (None, 0.0)
+    clock[0] += 120
+    refused, wait = asyncio.run(backend.take([("frozen", 0.0, 1)]))
+    assert refused == 0 and wait == float("inf")
+    assert "frozen" in backend._buckets
+    assert retry_after_header(wait) == str(MAX_RETRY_AFTER)
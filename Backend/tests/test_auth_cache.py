@@ -0,0 +1,57 @@
+"""The cached principal behind get_current_user follows the user's changes"""
+import time
+from types import SimpleNamespace
+import pytest
+from core import auth
+from core.config import settings
+from core.database import SessionLocal
+from models.user import User
+
+
+@pytest.fixture(autouse=True)
+def user():
+    auth._identities.clear()
+    db = SessionLocal()
+    db.add(User(id="u1", email="u1@example.com", name="Before"))
+    db.commit()
+    db.close()
+    yield
+    auth._identities.clear()
+
+
+def me(client, auth_headers):
+    return client.get("/api/auth/me", headers=auth_headers("u1"))
+
+
+def rename_behind_the_cache(name: str) -> None:
+    db = SessionLocal()
+    db.get(User, "u1").name = name
+    db.commit()
+    db.close()
+
+
+def test_principal_is_served_from_the_cache(client, auth_headers):
+    assert me(client, auth_headers).json()["name"] == "Before"
+    rename_behind_the_cache("After")
+    assert me(client, auth_headers).json()["name"] == "Before"
+
+
+def test_updating_the_user_invalidates_the_principal(client, auth_headers):
+    assert me(client, auth_headers).json()["name"] == "Before"
+    assert client.put("/api/users/u1", json={"name": "After"}).status_code == 200
+    assert me(client, auth_headers).json()["name"] == "After"
+
+
+def test_deleting_the_user_invalidates_the_principal(client, auth_headers):
+    assert me(client, auth_headers).status_code == 200
+    assert client.delete("/api/users/u1").status_code == 200
+    assert me(client, auth_headers).status_code == 401
+
+
+def test_expired_principal_is_fetched_again(client, auth_headers, monkeypatch):
+    assert me(client, auth_headers).json()["name"] == "Before"
+    rename_behind_the_cache("After")
+
+    later = time.monotonic() + settings.USER_CACHE_TTL + 1
+    monkeypatch.setattr("core.cache.time", SimpleNamespace(monotonic=lambda: later))
+    assert me(client, auth_headers).json()["name"] == "After"
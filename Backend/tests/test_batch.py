@@ -0,0 +1,69 @@
+"""Batch reads of posts and users by id"""
+import pytest
+from core.database import SessionLocal
+from core.pagination import MAX_BATCH_IDS
+from models.post import Post
+from models.user import User
+
+ENDPOINTS = ["/api/posts/batch", "/api/users/batch"]
+
+
+@pytest.fixture(autouse=True)
+def rows():
+    """Users a, b, c, each with one post of the same id"""
+    db = SessionLocal()
+    for item_id in ("a", "b", "c"):
+        db.add(User(id=item_id, email=f"{item_id}@example.com", name=item_id))
+        db.add(Post(id=item_id, user_id=item_id, image_url="/x.jpg"))
+    db.commit()
+    db.close()
+
+
+def batch(client, url: str, ids):
+    return client.get(url, params={"ids": ids})
+
+
+@pytest.mark.parametrize("url", ENDPOINTS)
+def test_items_come_back_in_the_order_asked(client, url):
+    response = batch(client, url, ["c", "a", "b"])
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()["items"]] == ["c", "a", "b"]
+
+
+@pytest.mark.parametrize("url", ENDPOINTS)
+def test_unknown_ids_are_listed_as_missing(client, url):
+    body = batch(client, url, ["x", "b", "y"]).json()
+    assert [item["id"] for item in body["items"]] == ["b"]
+    assert body["missing"] == ["x", "y"]
+
+
+@pytest.mark.parametrize("url", ENDPOINTS)
+def test_repeated_and_comma_separated_ids_are_merged(client, url):
+    body = batch(client, url, ["b,a", "c", " a ,b", "x,x"]).json()
+    assert [item["id"] for item in body["items"]] == ["b", "a", "c"]
+    assert body["missing"] == ["x"]
+
+
+def test_posts_come_with_their_authors(client):
+    body = batch(client, "/api/posts/batch", ["a"]).json()
+    assert body["items"][0]["user"]["id"] == "a"
+
+
+@pytest.mark.parametrize("url", ENDPOINTS)
+@pytest.mark.parametrize("ids", [[], [""], [" , "]])
+def test_no_ids_is_a_bad_request(client, url, ids):
+    response = batch(client, url, ids)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "No ids given"
+
+
+@pytest.mark.parametrize("url", ENDPOINTS)
+def test_batch_size_is_capped(client, url):
+    ids = [f"id{i}" for i in range(MAX_BATCH_IDS)]
+    assert batch(client, url, [",".join(ids)]).status_code == 200
+    # Duplicates do not count towards the cap
+    assert batch(client, url, ids + ids[:5]).status_code == 200
+
+    response = batch(client, url, ids + ["one-more"])
+    assert response.status_code == 400
+    assert response.json()["detail"] == f"At most {MAX_BATCH_IDS} ids per request"
@@ -0,0 +1,105 @@
+"""Blob garbage collection against references added while it runs"""
+import asyncio
+import hashlib
+import os
+import time
+import pytest
+from core.database import AsyncSessionLocal, SessionLocal, async_engine
+from models.blob_ref import BlobRef
+from services.blob_ref_service import OWNER_DRAFT, BlobRefService
+from services.upload_service import UploadService
+
+GRACE = 60
+
+
+@pytest.fixture
+def blob():
+    """An upload with a variant, both older than the grace period"""
+    images_dir = UploadService.images_dir()
+    stem = hashlib.sha256(b"blob").hexdigest()
+    paths = [images_dir / f"{stem}.png", images_dir / f"{stem}.w320.webp"]
+    old = time.time() - 2 * GRACE
+    for path in paths:
+        path.write_bytes(b"blob")
+        os.utime(path, (old, old))
+    yield paths[0]
+    for path in images_dir.iterdir():
+        path.unlink()
+
+
+def collect():
+    async def run():
+        async with AsyncSessionLocal() as db:
+            result = await BlobRefService.collect_garbage(db, GRACE)
+        await async_engine.dispose()
+        return result
+
+    return asyncio.run(run())
+
+
+def reference_during_scan(monkeypatch, blob, touch: bool):
+    """Reference blob once the collection has read the existing references"""
+    path_for = UploadService.path_for
+
+    def add_reference(image_id):
+        if image_id != blob.name:
+            return path_for(image_id)
+        if touch:
+            assert UploadService.touch(image_id)
+        db = SessionLocal()
+        db.add(BlobRef(blob_id=image_id, owner_type=OWNER_DRAFT, owner_id="d1"))
+        db.commit()
+        db.close()
+        monkeypatch.setattr(UploadService, "path_for", path_for)
+        return path_for(image_id)
+
+    monkeypatch.setattr(UploadService, "path_for", add_reference)
+
+
+def test_unreferenced_blob_is_deleted_with_its_variants(blob):
+    assert collect() == (1, 8)
+    assert list(blob.parent.iterdir()) == []
+
+
+def test_blob_referenced_during_collection_is_kept(blob, monkeypatch):
+    reference_during_scan(monkeypatch, blob, touch=True)
+    assert collect() == (0, 0)
+    assert sorted(p.name for p in blob.parent.iterdir()) == [
+        blob.name,
+        blob.name.replace(".png", ".w320.webp"),
+    ]
+
+
+def test_reference_committed_without_touch_is_rechecked(blob, monkeypatch):
+    reference_during_scan(monkeypatch, blob, touch=False)
+    assert collect() == (0, 0)
+    assert blob.exists()
+
+
+def test_referencing_a_deleted_blob_fails(blob):
+    blob.unlink()
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            BlobRefService.add(db, OWNER_DRAFT, "d1", [UploadService.url_for(blob.name)])
+        await async_engine.dispose()
+
+    with pytest.raises(ValueError):
+        asyncio.run(run())
+
+
+def test_blob_gone_before_deletion_is_not_counted(blob, monkeypatch):
+    path_for = UploadService.path_for
+
+    def vanish(image_id):
+        found = path_for(image_id)
+        if image_id == blob.name:
+            blob.unlink()
+        return found
+
+    monkeypatch.setattr(UploadService, "path_for", vanish)
+    assert collect() == (0, 0)
+    # Its variants stay for whoever removed or replaced the original
+    assert [p.name for p in blob.parent.iterdir()] == [
+        blob.name.replace(".png", ".w320.webp")
+    ]
@@ -0,0 +1,62 @@
+import asyncio
+import pytest
+from core.cache import TTLCache
+from core.database import AsyncSessionLocal
+from services.post_count_service import PostCountService
+
+
+@pytest.fixture
+def counts(monkeypatch):
+    """Record the COUNTs run instead of running them"""
+    calls = []
+
+    async def fake_count(db, scope, tags=None, any_tags=None):
+        calls.append((scope, tags, any_tags))
+        return 42
+
+    monkeypatch.setattr(PostCountService, "_count", staticmethod(fake_count))
+    monkeypatch.setattr(PostCountService, "_estimates", TTLCache(5, 60))
+    monkeypatch.setattr(PostCountService, "_changed_at", TTLCache(5, 60))
+    return calls
+
+
+def estimate(scope, tags=None, any_tags=None):
+    async def run():
+        async with AsyncSessionLocal() as db:
+            return await PostCountService._read_estimate(db, scope, tags, any_tags)
+
+    return asyncio.run(run())
+
+
+def adjust(user_id):
+    async def run():
+        async with AsyncSessionLocal() as db:
+            await PostCountService.adjust(db, user_id, 1)
+
+    asyncio.run(run())
+
+
+def test_tag_order_and_duplicates_share_an_estimate(counts):
+    assert estimate("*", ["b", "a"]) == 42
+    assert estimate("*", ["a", "b", "a"]) == 42
+    assert len(counts) == 1
+
+
+def test_filtered_estimates_are_invalidated_by_a_new_post(counts):
+    estimate("*", ["a"])
+    estimate("u1", any_tags=["a"])
+    estimate("u2", ["a"])
+
+    adjust("u1")
+    estimate("*", ["a"])
+    estimate("u1", any_tags=["a"])
+    estimate("u2", ["a"])
+
+    # The global and author scopes were recounted, the other user's was not
+    assert [call[0] for call in counts] == ["*", "u1", "u2", "*", "u1"]
+
+
+def test_client_tags_cannot_grow_the_cache_without_bound(counts):
+    for i in range(50):
+        estimate("*", [f"random-{i}"])
+    assert len(PostCountService._estimates) == 5
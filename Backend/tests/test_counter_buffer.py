@@ -0,0 +1,136 @@
+"""Buffered like/save counters stay visible until their batch commits"""
+import asyncio
+from contextlib import asynccontextmanager
+import pytest
+from core.database import SessionLocal, async_engine
+from models.post import Post
+from models.user import User
+from services import counter_buffer
+from services.counter_buffer import CounterBuffer
+
+
+@pytest.fixture(autouse=True)
+def post():
+    db = SessionLocal()
+    db.add(User(id="u1", email="u1@example.com", name="u1"))
+    db.add(Post(id="p1", user_id="u1", image_url="/x.jpg", likes=10, saves=1))
+    db.commit()
+    db.close()
+
+
+def stored() -> tuple:
+    db = SessionLocal()
+    post = db.get(Post, "p1")
+    db.close()
+    return post.likes, post.saves
+
+
+class WatchedEngine:
+    """
+    async_engine stand-in that runs during_write while the UPDATE runs
+
+    during_write may raise to make the flush fail before its commit.
+    """
+
+    def __init__(self, during_write):
+        self.during_write = during_write
+
+    @asynccontextmanager
+    async def begin(self):
+        async with async_engine.begin() as conn:
+            self.conn = conn
+            yield self
+
+    async def execute(self, statement, params):
+        await self.during_write()
+        await self.conn.execute(statement, params)
+
+
+def run(buffer_work):
+    async def main():
+        try:
+            return await buffer_work()
+        finally:
+            await async_engine.dispose()
+
+    return asyncio.run(main())
+
+
+def test_flush_writes_and_clears_pending():
+    buffer = CounterBuffer(flush_interval=60, flush_threshold=100)
+    buffer.increment("p1", "likes", 2)
+    buffer.increment("p1", "saves")
+
+    run(buffer.flush)
+
+    assert stored() == (12, 2)
+    assert buffer.pending("p1") == {"likes": 0, "saves": 0}
+
+
+def test_batch_being_written_is_still_read(monkeypatch):
+    buffer = CounterBuffer(flush_interval=60, flush_threshold=100)
+    buffer.increment("p1", "likes", 2)
+    seen = []
+
+    async def during_write():
+        buffer.increment("p1", "likes")
+        seen.append(buffer.pending("p1"))
+        post = Post(id="p1", likes=10, saves=1)
+        buffer.apply([post])
+        seen.append((post.likes, post.saves))
+
+    monkeypatch.setattr(counter_buffer, "async_engine", WatchedEngine(during_write))
+    run(buffer.flush)
+
+    assert seen == [{"likes": 3, "saves": 0}, (13, 1)]
+    assert stored() == (12, 1)
+    assert buffer.pending("p1") == {"likes": 1, "saves": 0}
+
+
+def test_failed_flush_merges_its_batch_back(monkeypatch):
+    buffer = CounterBuffer(flush_interval=60, flush_threshold=100)
+    buffer.increment("p1", "likes", 2)
+
+    async def during_write():
+        buffer.increment("p1", "saves")
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(counter_buffer, "async_engine", WatchedEngine(during_write))
+    run(buffer.flush)
+
+    assert stored() == (10, 1)
+    assert buffer.pending("p1") == {"likes": 2, "saves": 1}
+    assert buffer._pending_total == 3
+
+    monkeypatch.undo()
+    run(buffer.flush)
+    assert stored() == (12, 2)
+
+
+def test_stop_drains_without_abandoning_a_write_in_progress(monkeypatch):
+    buffer = CounterBuffer(flush_interval=60, flush_threshold=1)
+
+    async def main():
+        writing, release = asyncio.Event(), asyncio.Event()
+
+        async def during_write():
+            writing.set()
+            await release.wait()
+
+        monkeypatch.setattr(
+            counter_buffer, "async_engine", WatchedEngine(during_write)
+        )
+        buffer.start()
+        buffer.increment("p1", "likes", 2)
+        await writing.wait()
+        buffer.increment("p1", "saves")
+
+        stopping = asyncio.create_task(buffer.stop())
+        await asyncio.sleep(0)
+        release.set()
+        await stopping
+
+    run(main)
+
+    assert stored() == (12, 2)
+    assert buffer.pending("p1") == {"likes": 0, "saves": 0}
@@ -0,0 +1,26 @@
+import asyncio
+from sqlalchemy import select
+from core.database import AsyncSessionLocal, to_async_url
+from models.user import User
+
+
+def test_to_async_url_swaps_driver():
+    assert to_async_url("postgresql://u:p@h/db") == "postgresql+asyncpg://u:p@h/db"
+    assert (
+        to_async_url("postgresql+psycopg2://u:p@h/db")
+        == "postgresql+asyncpg://u:p@h/db"
+    )
+    assert to_async_url("sqlite:///dev.db") == "sqlite+aiosqlite:///dev.db"
+    assert to_async_url("mysql+aiomysql://h/db") == "mysql+aiomysql://h/db"
+
+
+def test_async_session_round_trip():
+    async def run():
+        async with AsyncSessionLocal() as db:
+            db.add(User(id="u1", email="a@example.com", name="A"))
+            await db.commit()
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(User.name).filter(User.id == "u1"))
+            return result.scalar_one()
+
+    assert asyncio.run(run()) == "A"
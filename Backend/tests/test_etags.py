@@ -0,0 +1,111 @@
+"""Conditional GETs: 304 while nothing changed, 200 once anything did"""
+import asyncio
+import pytest
+from core.database import SessionLocal, async_engine
+from models.post import Post
+from models.user import User
+from services.counter_buffer import post_counters
+from services.feed_cache import MemoryCacheBackend, feed_cache
+
+
+@pytest.fixture(autouse=True)
+def post():
+    db = SessionLocal()
+    db.add(User(id="u1", email="u1@example.com", name="u1"))
+    db.add(Post(id="p1", user_id="u1", image_url="/x.jpg"))
+    db.commit()
+    db.close()
+    yield
+    # Likes made through the API stay buffered otherwise
+    flush()
+
+
+@pytest.fixture(params=["uncached", "cached"])
+def feed_url(request, monkeypatch):
+    """The wall feed, read through the feed cache or around it"""
+    if request.param == "cached":
+        monkeypatch.setattr(feed_cache, "backend", MemoryCacheBackend(100, 15))
+        monkeypatch.setattr(feed_cache, "ttl", 15)
+    return "/api/posts/"
+
+
+def flush():
+    async def run():
+        await post_counters.flush()
+        await async_engine.dispose()
+
+    asyncio.run(run())
+
+
+def etag_of(client, url: str) -> str:
+    """Fetch url, check that its ETag revalidates to a 304, and return it"""
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    unchanged = client.get(url, headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304
+    assert unchanged.headers["ETag"] == etag
+    assert unchanged.content == b""
+    return etag
+
+
+def assert_modified(client, url: str, etag: str) -> str:
+    """url no longer answers 304 to etag; returns its new ETag"""
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    return etag_of(client, url)
+
+
+def like(client) -> None:
+    assert client.post("/api/posts/p1/like").status_code == 200
+
+
+def edit_author(client) -> None:
+    assert client.put("/api/users/u1", json={"bio": "New bio"}).status_code == 200
+
+
+def edit_post(client) -> None:
+    assert client.put("/api/posts/p1", json={"title": "New title"}).status_code == 200
+
+
+@pytest.mark.parametrize("change", [like, edit_author, edit_post])
+def test_post_is_modified_by(client, change):
+    etag = etag_of(client, "/api/posts/p1")
+    change(client)
+    assert_modified(client, "/api/posts/p1", etag)
+
+
+@pytest.mark.parametrize("change", [like, edit_author, edit_post])
+def test_feed_page_is_modified_by(client, feed_url, change):
+    etag = etag_of(client, feed_url)
+    change(client)
+    assert_modified(client, feed_url, etag)
+
+
+def test_flushed_like_modifies_the_post_again(client):
+    like(client)
+    buffered = etag_of(client, "/api/posts/p1")
+    flush()
+    flushed = assert_modified(client, "/api/posts/p1", buffered)
+    assert client.get("/api/posts/p1").json()["likes"] == 1
+    assert etag_of(client, "/api/posts/p1") == flushed
+
+
+def test_flushed_like_modifies_the_feed_page_again(client):
+    like(client)
+    buffered = etag_of(client, "/api/posts/")
+    flush()
+    assert_modified(client, "/api/posts/", buffered)
+
+
+def test_user_is_modified_by_a_profile_edit(client):
+    etag = etag_of(client, "/api/users/u1")
+    edit_author(client)
+    assert_modified(client, "/api/users/u1", etag)
+
+
+def test_unknown_etag_gets_the_body(client):
+    response = client.get("/api/posts/p1", headers={"If-None-Match": '"stale"'})
+    assert response.status_code == 200
+    assert response.json()["id"] == "p1"
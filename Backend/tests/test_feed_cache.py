@@ -0,0 +1,137 @@
+"""Feed page caching: what is cached, for how long, and what evicts it"""
+import asyncio
+import time
+from types import SimpleNamespace
+import pytest
+from core.database import SessionLocal, async_engine
+from models.post import Post
+from models.user import User
+from services.counter_buffer import post_counters
+from services.feed_cache import MemoryCacheBackend, feed_cache
+
+TTL = 15
+MAX_PAGE = 2
+
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch):
+    """The feed cache switched on, empty, with fresh counters"""
+    monkeypatch.setattr(feed_cache, "backend", MemoryCacheBackend(100, TTL))
+    monkeypatch.setattr(feed_cache, "ttl", TTL)
+    monkeypatch.setattr(feed_cache, "max_page", MAX_PAGE)
+    for counter in ("hits", "misses", "invalidations"):
+        monkeypatch.setattr(feed_cache, counter, 0)
+    yield feed_cache
+
+    # Likes made through the API stay buffered otherwise
+    async def drain():
+        await post_counters.flush()
+        await async_engine.dispose()
+
+    asyncio.run(drain())
+
+
+@pytest.fixture(autouse=True)
+def posts():
+    db = SessionLocal()
+    for user_id in ("u1", "u2"):
+        db.add(User(id=user_id, email=f"{user_id}@example.com", name=user_id))
+        for i in range(3):
+            db.add(Post(id=f"{user_id}-p{i}", user_id=user_id, image_url="/x.jpg"))
+    db.commit()
+    db.close()
+
+
+def feed(client, **params) -> dict:
+    response = client.get("/api/posts/", params={"page_size": 2, **params})
+    assert response.status_code == 200
+    return response.json()
+
+
+def lookups(cache) -> tuple:
+    return cache.hits, cache.misses
+
+
+def test_repeated_page_is_served_from_the_cache(client, cache):
+    first = feed(client)
+    assert lookups(cache) == (0, 1)
+    assert feed(client) == first
+    assert lookups(cache) == (1, 1)
+
+
+def test_pages_are_cached_per_request(client, cache):
+    feed(client)
+    feed(client, page=2)
+    feed(client, user_id="u1")
+    feed(client, tags=["denim"])
+    assert lookups(cache) == (0, 4)
+
+
+def test_creating_a_post_evicts_the_global_and_author_feeds(
+    client, auth_headers, cache
+):
+    for user_id in (None, "u1", "u2"):
+        feed(client, user_id=user_id)
+
+    created = client.post(
+        "/api/posts/", json={"image_url": "/y.jpg"}, headers=auth_headers("u1")
+    )
+    assert created.status_code == 201
+
+    hits, misses = lookups(cache)
+    assert feed(client)["total"] == 7
+    assert feed(client, user_id="u1")["total"] == 4
+    assert feed(client, user_id="u2")["total"] == 3
+    # Only the other user's feed was still cached
+    assert lookups(cache) == (hits + 1, misses + 2)
+
+
+def test_deleting_a_post_evicts_the_global_and_author_feeds(client, cache):
+    for user_id in (None, "u1", "u2"):
+        feed(client, user_id=user_id)
+
+    assert client.delete("/api/posts/u1-p0").status_code == 200
+
+    hits, misses = lookups(cache)
+    assert feed(client)["total"] == 5
+    assert feed(client, user_id="u1")["total"] == 2
+    assert feed(client, user_id="u2")["total"] == 3
+    assert lookups(cache) == (hits + 1, misses + 2)
+
+
+def test_liking_a_post_evicts_the_global_and_author_feeds(client, cache):
+    for user_id in (None, "u1", "u2"):
+        feed(client, user_id=user_id, page_size=3)
+
+    assert client.post("/api/posts/u1-p0/like").status_code == 200
+
+    hits, misses = lookups(cache)
+    items = feed(client, user_id="u1", page_size=3)["items"]
+    assert {post["id"]: post["likes"] for post in items}["u1-p0"] == 1
+    feed(client, page_size=3)
+    feed(client, user_id="u2", page_size=3)
+    assert lookups(cache) == (hits + 1, misses + 2)
+
+
+def test_entries_expire_after_the_ttl(client, cache, monkeypatch):
+    feed(client)
+    later = time.monotonic() + TTL + 1
+    monkeypatch.setattr("core.cache.time", SimpleNamespace(monotonic=lambda: later))
+
+    feed(client)
+    assert lookups(cache) == (0, 2)
+
+
+def test_only_the_first_offset_pages_are_cached(client, cache):
+    for page in range(1, MAX_PAGE + 2):
+        feed(client, page=page)
+        feed(client, page=page)
+    # Page MAX_PAGE + 1 bypassed the cache both times
+    assert lookups(cache) == (MAX_PAGE, MAX_PAGE)
+
+
+def test_cursor_pages_are_cached_at_any_depth(client, cache):
+    cursor = feed(client)["next_cursor"]
+    deep = feed(client, cursor=cursor)
+    assert feed(client, cursor=cursor) == deep
+    assert lookups(cache) == (1, 2)
@@ -0,0 +1,169 @@
+"""Garment downloads only ever connect to public addresses"""
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import services.garment_fetcher as garment_fetcher_module
+from services.garment_fetcher import GarmentFetcher, GarmentFetchError
+
+IMAGE = b"\x89PNG\r\n\x1a\n" + b"\0" * 64
+
+
+class ShopHandler(BaseHTTPRequestHandler):
+    requests = 0
+
+    def do_GET(self):
+        ShopHandler.requests += 1
+        if self.path.startswith("/redirect?"):
+            self.send_response(302)
+            self.send_header("Location", self.path.split("?", 1)[1])
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(IMAGE)))
+        self.end_headers()
+        self.wfile.write(IMAGE)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def shop():
+    """Port of a local shop serving /shirt.png and /redirect?<location>"""
+    ShopHandler.requests = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ShopHandler)
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+    )
+    thread.start()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def dns(monkeypatch):
+    """
+    Names resolving to the local shop or to internal addresses
+
+    The shop's 127.0.0.1 counts as public, standing in for a real shop;
+    every other private address is still refused.
+    """
+    answers = {
+        "shop.test": ["127.0.0.1"],
+        "metadata.test": ["169.254.169.254"],
+        "mixed.test": ["127.0.0.1", "10.0.0.5"],
+    }
+    real_is_public = garment_fetcher_module.is_public_address
+
+    async def resolve(host, port):
+        return answers[host]
+
+    monkeypatch.setattr(garment_fetcher_module, "resolve", resolve)
+    monkeypatch.setattr(
+        garment_fetcher_module,
+        "is_public_address",
+        lambda address: address == "127.0.0.1" or real_is_public(address),
+    )
+    return answers
+
+
+def fetch(tmp_path, url, allow_private_hosts=False):
+    async def run():
+        fetcher = GarmentFetcher(tmp_path, 10, 2, 5.0, 3600, allow_private_hosts)
+        fetcher.start()
+        try:
+            return (await fetcher.fetch(url)).read_bytes()
+        finally:
+            await fetcher.stop()
+
+    return asyncio.run(run())
+
+
+def test_fetches_from_the_checked_address(tmp_path, shop, dns):
+    # shop.test only exists in the checked answers, so the connection
+    # went to the address that was vetted
+    assert fetch(tmp_path, f"http://shop.test:{shop}/shirt.png") == IMAGE
+
+
+@pytest.mark.parametrize(
+    "host", ["127.0.0.1", "localhost", "[::1]", "10.0.0.1", "169.254.169.254"]
+)
+def test_refuses_private_literals(tmp_path, shop, host):
+    with pytest.raises(GarmentFetchError):
+        fetch(tmp_path, f"http://{host}:{shop}/shirt.png")
+    assert ShopHandler.requests == 0
+
+
+def test_refuses_a_name_resolving_to_localhost(tmp_path, shop, monkeypatch):
+    # Real DNS, no literal in the URL for the early check to catch
+    monkeypatch.setattr(
+        GarmentFetcher, "_check_url", lambda self, url: url.split("/")[2]
+    )
+    with pytest.raises(GarmentFetchError):
+        fetch(tmp_path, f"http://localhost:{shop}/shirt.png")
+    assert ShopHandler.requests == 0
+
+
+@pytest.mark.parametrize("host", ["metadata.test", "mixed.test"])
+def test_refuses_a_name_with_any_private_address(tmp_path, shop, dns, host):
+    with pytest.raises(GarmentFetchError):
+        fetch(tmp_path, f"http://{host}:{shop}/shirt.png")
+    assert ShopHandler.requests == 0
+
+
+def test_refuses_a_redirect_to_a_private_address(tmp_path, shop, dns):
+    target = f"http://metadata.test:{shop}/latest/meta-data/"
+    with pytest.raises(GarmentFetchError):
+        fetch(tmp_path, f"http://shop.test:{shop}/redirect?{target}")
+    assert ShopHandler.requests == 1
+
+
+def test_private_hosts_allowed_for_development(tmp_path, shop):
+    url = f"http://127.0.0.1:{shop}/shirt.png"
+    assert fetch(tmp_path, url, allow_private_hosts=True) == IMAGE
+
+
+def test_host_limit_lasts_only_while_the_host_is_busy(tmp_path, monkeypatch):
+    running = {"a.test": 0, "b.test": 0}
+    peaks = dict(running)
+    both_started = []
+
+    async def download(self, url, body_path, *args):
+        host = url.split("/")[2]
+        running[host] += 1
+        peaks[host] = max(peaks[host], running[host])
+        if all(running.values()):
+            both_started[0].set()
+        await asyncio.sleep(0.01)
+        running[host] -= 1
+        return body_path
+
+    monkeypatch.setattr(GarmentFetcher, "_download", download)
+
+    async def run():
+        fetcher = GarmentFetcher(tmp_path, 10, 2, 5.0, 3600)
+        urls = [f"http://{host}/{i}.png" for host in running for i in range(5)]
+        both_started.append(asyncio.Event())
+        fetching = asyncio.create_task(fetcher.fetch_all(urls))
+        await both_started[0].wait()
+        busy = set(fetcher._host_limits)
+        await fetching
+        return busy, fetcher._host_limits
+
+    busy, after = asyncio.run(run())
+    assert busy == {"a.test", "b.test"}
+    assert peaks == {"a.test": 2, "b.test": 2}
+    assert after == {}
+
+
+def test_transport_checks_the_installed_httpx(monkeypatch):
+    monkeypatch.setattr(
+        garment_fetcher_module.httpx.AsyncHTTPTransport,
+        "__init__",
+        lambda self, **kwargs: None,
+    )
+    with pytest.raises(RuntimeError, match="_pool"):
+        GarmentFetcher("unused", 10, 2, 5.0, 3600).start()
@@ -0,0 +1,147 @@
+"""Google ID token checks against a local JWKS file"""
+import asyncio
+import json
+import time
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+import routes.auth
+from core.google_tokens import (
+    FileKeySource,
+    GoogleTokenError,
+    GoogleTokenVerifier,
+    SigningKeysUnavailable,
+)
+
+AUDIENCE = "test-client-id"
+
+
+def rsa_key() -> bytes:
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+
+
+@pytest.fixture(scope="module")
+def private_key():
+    return rsa_key()
+
+
+@pytest.fixture
+def jwks_file(tmp_path, private_key):
+    public = jwk.construct(private_key, "RS256").public_key().to_dict()
+    path = tmp_path / "jwks.json"
+    path.write_text(json.dumps({"keys": [{**public, "kid": "k1", "use": "sig"}]}))
+    return path
+
+
+def id_token(private_key, kid="k1", **claims) -> str:
+    now = int(time.time())
+    payload = {
+        "iss": "https://accounts.google.com",
+        "aud": AUDIENCE,
+        "sub": "google-1",
+        "email": "signed-in@example.com",
+        "email_verified": True,
+        "iat": now,
+        "exp": now + 600,
+        **claims,
+    }
+    return jwt.encode(payload, private_key, algorithm="RS256", headers={"kid": kid})
+
+
+def verify(verifier, token):
+    return asyncio.run(verifier.verify(token))
+
+
+def test_valid_token(jwks_file, private_key):
+    verifier = GoogleTokenVerifier(FileKeySource(jwks_file), AUDIENCE)
+    assert verify(verifier, id_token(private_key))["sub"] == "google-1"
+
+
+def test_wrong_audience_is_rejected(jwks_file, private_key):
+    verifier = GoogleTokenVerifier(FileKeySource(jwks_file), AUDIENCE)
+    with pytest.raises(GoogleTokenError):
+        verify(verifier, id_token(private_key, aud="another-app"))
+
+
+def test_no_keys_is_unavailable_not_invalid(tmp_path, private_key):
+    verifier = GoogleTokenVerifier(FileKeySource(tmp_path / "missing.json"), AUDIENCE)
+    with pytest.raises(SigningKeysUnavailable):
+        verify(verifier, id_token(private_key))
+
+
+def test_stale_keys_are_kept_through_an_outage(jwks_file, private_key):
+    verifier = GoogleTokenVerifier(FileKeySource(jwks_file), AUDIENCE)
+    verify(verifier, id_token(private_key))
+    jwks_file.unlink()
+    verifier._expires_at = verifier._soft_expires_at = 0.0
+    assert verify(verifier, id_token(private_key))["sub"] == "google-1"
+
+
+def test_unknown_kid_during_an_outage_is_unavailable(jwks_file, private_key):
+    verifier = GoogleTokenVerifier(FileKeySource(jwks_file), AUDIENCE)
+    verify(verifier, id_token(private_key))
+    jwks_file.unlink()
+    verifier._last_refresh = 0.0
+    with pytest.raises(SigningKeysUnavailable):
+        verify(verifier, id_token(rsa_key(), kid="k2"))
+
+
+def test_failed_refresh_rate_limits_unknown_kids(jwks_file, private_key):
+    verifier = GoogleTokenVerifier(FileKeySource(jwks_file), AUDIENCE)
+    verify(verifier, id_token(private_key))
+    jwks_file.unlink()
+    fetch = verifier.source.fetch
+    fetches = []
+
+    async def counting_fetch():
+        fetches.append(1)
+        return await fetch()
+
+    verifier.source.fetch = counting_fetch
+    verifier._last_refresh = 0.0
+    for _ in range(3):
+        with pytest.raises(SigningKeysUnavailable):
+            verify(verifier, id_token(rsa_key(), kid="k2"))
+    # Only the first login tried the source; the rest wait out the interval
+    assert len(fetches) == 1
+    assert verify(verifier, id_token(private_key))["sub"] == "google-1"
+
+
+def test_unknown_kid_with_fresh_keys_is_invalid(jwks_file, private_key):
+    verifier = GoogleTokenVerifier(FileKeySource(jwks_file), AUDIENCE)
+    verify(verifier, id_token(private_key))
+    verifier._last_refresh = 0.0
+    with pytest.raises(GoogleTokenError):
+        verify(verifier, id_token(rsa_key(), kid="k2"))
+
+
+@pytest.mark.parametrize(
+    "available, status", [(True, 200), (False, 503)], ids=["keys", "no keys"]
+)
+def test_google_login(
+    client, monkeypatch, tmp_path, jwks_file, private_key, available, status
+):
+    source = FileKeySource(jwks_file if available else tmp_path / "missing.json")
+    monkeypatch.setattr(
+        routes.auth, "google_tokens", GoogleTokenVerifier(source, AUDIENCE)
+    )
+    response = client.post("/api/auth/google", json={"token": id_token(private_key)})
+    assert response.status_code == status, response.text
+    if not available:
+        assert "Retry-After" in response.headers
+
+
+def test_google_login_with_a_bad_token(client, monkeypatch, jwks_file, private_key):
+    monkeypatch.setattr(
+        routes.auth,
+        "google_tokens",
+        GoogleTokenVerifier(FileKeySource(jwks_file), AUDIENCE),
+    )
+    token = id_token(private_key, exp=int(time.time()) - 60)
+    assert client.post("/api/auth/google", json={"token": token}).status_code == 401
@@ -0,0 +1,21 @@
+from core.config import settings
+
+TOKEN = {"X-Internal-Token": "test-internal-token"}
+
+
+def test_internal_endpoints_need_the_token(client):
+    assert client.get("/api/internal/pool").status_code == 403
+    wrong = client.get("/api/internal/pool", headers={"X-Internal-Token": "guess"})
+    assert wrong.status_code == 403
+
+    response = client.get("/api/internal/pool", headers=TOKEN)
+    assert response.status_code == 200
+    assert "pools" in response.json()
+
+
+def test_internal_endpoints_are_hidden_without_a_configured_token(
+    client, monkeypatch
+):
+    monkeypatch.setattr(settings, "INTERNAL_API_TOKEN", None)
+
+    assert client.get("/api/internal/admission", headers=TOKEN).status_code == 404
@@ -0,0 +1,129 @@
+"""Queued generations: their states, the timeout and the depth limit"""
+import asyncio
+import pytest
+from schemas.ai import AIGenerationRequest, AIGenerationResponse
+from services.ai_service import AIService
+from services.job_queue import JobQueue, MemoryJobStore, QueueFullError
+
+REQUEST = AIGenerationRequest(
+    user_image="https://example.com/me.jpg",
+    garments=[{"id": "g1", "type": "top", "image_url": "https://example.com/g1.jpg"}],
+)
+
+
+@pytest.fixture
+def generate(monkeypatch):
+    """Replace the generation with one that records its requests"""
+    calls = []
+
+    async def generate_outfit(request):
+        calls.append(request)
+        return AIGenerationResponse(image_url="/out.png", id="out", processing_time=0.1)
+
+    monkeypatch.setattr(AIService, "generate_outfit", generate_outfit)
+    return calls
+
+
+def make_queue(store=None, **options) -> JobQueue:
+    settings = dict(workers=1, max_depth=2, job_timeout=5, result_ttl=60)
+    settings.update(options)
+    return JobQueue(store or MemoryJobStore(), **settings)
+
+
+async def statuses(queue: JobQueue, job_id: str) -> list:
+    return [state.status async for state in queue.watch(job_id, heartbeat=1)]
+
+
+def test_job_is_streamed_until_it_succeeds(generate):
+    async def run():
+        queue = make_queue()
+        job = await queue.submit(REQUEST)
+        watching = asyncio.create_task(statuses(queue, job.id))
+        await asyncio.sleep(0)
+        queue.start()
+        seen = await watching
+        await queue.stop()
+        return seen, await queue.get(job.id)
+
+    seen, finished = asyncio.run(run())
+    assert seen == ["queued", "running", "succeeded"]
+    assert finished.result.image_url == "/out.png"
+    assert generate == [REQUEST]
+
+
+def test_states_are_read_from_the_store():
+    async def run():
+        store = MemoryJobStore()
+        job = await make_queue(store).submit(REQUEST)
+        # Any queue sharing the store, as another worker would, answers for it
+        return await make_queue(store).get(job.id), await make_queue().get(job.id)
+
+    shared, other = asyncio.run(run())
+    assert shared.status == "queued"
+    assert other is None
+
+
+def test_slow_generation_times_out(monkeypatch):
+    async def generate_outfit(request):
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(AIService, "generate_outfit", generate_outfit)
+
+    async def run():
+        queue = make_queue(job_timeout=0.01)
+        job = await queue.submit(REQUEST)
+        queue.start()
+        seen = await statuses(queue, job.id)
+        await queue.stop()
+        return seen, await queue.get(job.id)
+
+    seen, finished = asyncio.run(run())
+    assert seen[-1] == "timed_out"
+    assert finished.error == "Generation exceeded 0.01s"
+
+
+def test_queue_refuses_jobs_beyond_its_depth():
+    async def run():
+        queue = make_queue(max_depth=2)
+        await queue.submit(REQUEST)
+        await queue.submit(REQUEST)
+        with pytest.raises(QueueFullError):
+            await queue.submit(REQUEST)
+        return queue.depth
+
+    assert asyncio.run(run()) == 2
+
+
+def test_full_queue_answers_503(client, monkeypatch):
+    async def full():
+        queue = make_queue(max_depth=1)
+        await queue.submit(REQUEST)
+        return queue
+
+    monkeypatch.setattr("routes.ai.generation_jobs", asyncio.run(full()))
+    response = client.post("/api/ai/jobs", json=REQUEST.model_dump())
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+
+
+def test_stop_fails_queued_jobs():
+    async def run():
+        queue = make_queue()
+        job = await queue.submit(REQUEST)
+        await queue.stop()
+        return await queue.get(job.id), queue.depth
+
+    stopped, depth = asyncio.run(run())
+    assert (stopped.status, stopped.error) == ("failed", "Server shutting down")
+    assert depth == 0
+
+
+def test_submitted_job_can_be_polled(client, monkeypatch):
+    queue = make_queue()
+    monkeypatch.setattr("routes.ai.generation_jobs", queue)
+
+    submitted = client.post("/api/ai/jobs", json=REQUEST.model_dump())
+    assert submitted.status_code == 202
+    job_id = submitted.json()["id"]
+    assert client.get(f"/api/ai/jobs/{job_id}").json()["status"] == "queued"
+    assert client.get("/api/ai/jobs/job-missing").status_code == 404
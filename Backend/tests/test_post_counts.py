@@ -0,0 +1,68 @@
+import asyncio
+from core.database import SessionLocal
+from models.post import Post
+from models.post_counter import PostCounter
+from models.user import User
+from services.post_count_service import GLOBAL_SCOPE, PostCountService
+
+
+def add_posts(user_id: str, count: int, start: int = 0) -> None:
+    db = SessionLocal()
+    if db.get(User, user_id) is None:
+        db.add(User(id=user_id, email=f"{user_id}@example.com", name=user_id))
+    for i in range(start, start + count):
+        db.add(Post(id=f"{user_id}-p{i}", user_id=user_id, image_url="/x.jpg"))
+    db.commit()
+    db.close()
+
+
+def counters() -> dict:
+    db = SessionLocal()
+    rows = {row.scope: row.count for row in db.query(PostCounter)}
+    db.close()
+    return rows
+
+
+def totals(client, user_id: str):
+    everyone = client.get("/api/posts/").json()["total"]
+    theirs = client.get("/api/posts/", params={"user_id": user_id}).json()["total"]
+    return everyone, theirs
+
+
+def test_unseeded_totals_are_counted_without_writing(client):
+    add_posts("u1", 3)
+    add_posts("u2", 2)
+
+    assert totals(client, "u1") == (5, 3)
+    assert counters() == {}
+
+
+def test_seeding_replaces_rows_created_before_it(client, auth_headers):
+    add_posts("u1", 2)
+    # A post created before seeding leaves a partial row for its author
+    response = client.post(
+        "/api/posts/", json={"image_url": "/y.jpg"}, headers=auth_headers("u1")
+    )
+    assert response.status_code == 201
+    assert counters() == {"u1": 1}
+
+    asyncio.run(PostCountService.seed_counters())
+
+    assert counters() == {GLOBAL_SCOPE: 3, "u1": 3}
+    assert totals(client, "u1") == (3, 3)
+
+
+def test_counters_follow_creates_and_deletes_after_seeding(client, auth_headers):
+    add_posts("u1", 2)
+    add_posts("u2", 0)
+    asyncio.run(PostCountService.seed_counters())
+
+    created = client.post(
+        "/api/posts/", json={"image_url": "/y.jpg"}, headers=auth_headers("u2")
+    ).json()
+    assert totals(client, "u2") == (3, 1)
+
+    assert client.delete(f"/api/posts/{created['id']}").status_code == 200
+    client.delete("/api/posts/u1-p0")
+    assert totals(client, "u1") == (1, 1)
+    assert totals(client, "u2") == (1, 0)
@@ -0,0 +1,136 @@
+"""Image variants and layout metadata are rendered after the response"""
+import asyncio
+import hashlib
+import io
+import pytest
+from PIL import Image
+from core.database import AsyncSessionLocal, SessionLocal, async_engine
+from models.draft import Draft
+from models.post import Post
+from models.user import User
+from schemas.draft import DraftCreate, DraftUpdate
+from schemas.post import PostCreate
+from services.draft_service import DraftService
+from services.image_variants import image_variants
+from services.post_service import PostService
+from services.upload_service import UploadService
+
+
+@pytest.fixture
+def image_url():
+    db = SessionLocal()
+    db.add(User(id="author", email="author@example.com", name="Author"))
+    db.commit()
+    db.close()
+    buffer = io.BytesIO()
+    Image.new("RGB", (800, 600), "navy").save(buffer, "PNG")
+    image_id = hashlib.sha256(buffer.getvalue()).hexdigest() + ".png"
+    (UploadService.images_dir() / image_id).write_bytes(buffer.getvalue())
+    yield UploadService.url_for(image_id)
+    for path in UploadService.images_dir().iterdir():
+        path.unlink()
+
+
+def variant_files(image_url):
+    stem = UploadService.id_from_url(image_url).rsplit(".", 1)[0]
+    return list(UploadService.images_dir().glob(f"{stem}.w*"))
+
+
+def test_post_is_created_before_its_variants(image_url):
+    async def run():
+        async with AsyncSessionLocal() as db:
+            post = await PostService.create(
+                db, "author", PostCreate(image_url=image_url)
+            )
+            created = (post.image_variants, post.width)
+        await image_variants.stop()
+        async with AsyncSessionLocal() as db:
+            stored = await db.get(Post, post.id)
+        await async_engine.dispose()
+        return created, stored
+
+    (variants, width), stored = asyncio.run(run())
+    assert variants is None and width is None
+    assert [v["width"] for v in stored.image_variants["webp"]] == [640, 320]
+    assert (stored.width, stored.height) == (800, 600)
+    assert stored.aspect_ratio == pytest.approx(800 / 600, abs=1e-4)
+
+
+def test_draft_is_created_before_its_variants(image_url):
+    async def run():
+        async with AsyncSessionLocal() as db:
+            draft = await DraftService.create(
+                db, "author", DraftCreate(image_url=image_url)
+            )
+            created = draft.image_variants
+        await image_variants.stop()
+        async with AsyncSessionLocal() as db:
+            stored = await db.get(Draft, draft.id)
+        await async_engine.dispose()
+        return created, stored
+
+    created, stored = asyncio.run(run())
+    assert created is None
+    assert [v["width"] for v in stored.image_variants["webp"]] == [640, 320]
+    assert len(variant_files(image_url)) == 4
+
+
+def test_draft_response_lists_its_variants(
+    image_url, client, auth_headers, monkeypatch
+):
+    spawned = []
+    monkeypatch.setattr(image_variants, "spawn", spawned.append)
+    created = client.post(
+        "/api/drafts/", json={"image_url": image_url}, headers=auth_headers("author")
+    )
+    assert created.status_code == 201
+    assert created.json()["image_variants"] is None
+
+    async def render():
+        await spawned.pop()
+        await async_engine.dispose()
+
+    asyncio.run(render())
+    draft = client.get(f"/api/drafts/{created.json()['id']}").json()
+    assert [v["width"] for v in draft["image_variants"]["jpeg"]] == [640, 320]
+
+
+def test_variants_of_a_replaced_image_are_not_stored(image_url):
+    async def run():
+        async with AsyncSessionLocal() as db:
+            draft = Draft(user_id="author", image_url="/elsewhere.jpg")
+            db.add(draft)
+            await db.commit()
+        await DraftService.render_image(draft.id, image_url)
+        async with AsyncSessionLocal() as db:
+            stored = await db.get(Draft, draft.id)
+        await async_engine.dispose()
+        return stored
+
+    assert asyncio.run(run()).image_variants is None
+
+
+def test_new_draft_image_drops_the_old_variants(image_url, monkeypatch):
+    spawned = []
+    monkeypatch.setattr(image_variants, "spawn", spawned.append)
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            draft = Draft(
+                user_id="author", image_url="/old.jpg", image_variants={"webp": []}
+            )
+            db.add(draft)
+            await db.commit()
+            updated = await DraftService.update(
+                db, draft.id, DraftUpdate(image_url=image_url)
+            )
+            dropped = updated.image_variants
+        await spawned.pop()
+        async with AsyncSessionLocal() as db:
+            stored = await db.get(Draft, draft.id)
+        await async_engine.dispose()
+        return dropped, stored
+
+    dropped, stored = asyncio.run(run())
+    assert dropped is None
+    assert [v["width"] for v in stored.image_variants["webp"]] == [640, 320]
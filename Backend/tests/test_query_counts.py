@@ -0,0 +1,71 @@
+"""
+Queries per request on the post endpoints, read from X-Query-Count
+
+Authors must be loaded in bulk, so these counts do not grow with the
+number of posts or authors on a page.
+"""
+import asyncio
+import pytest
+from core.config import settings
+from core.database import SessionLocal
+from models.post import Post
+from models.user import User
+from services.post_count_service import PostCountService
+
+AUTHORS = 10
+POSTS = 50
+
+
+@pytest.fixture(autouse=True)
+def feed(monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_COUNT_HEADER", True)
+    db = SessionLocal()
+    for u in range(AUTHORS):
+        db.add(User(id=f"u{u}", email=f"u{u}@example.com", name=f"User {u}"))
+    for i in range(POSTS):
+        db.add(
+            Post(id=f"p{i:02d}", user_id=f"u{i % AUTHORS}", image_url="/x.jpg", tags=[])
+        )
+    db.commit()
+    db.close()
+    asyncio.run(PostCountService.seed_counters())
+
+
+def queries(response) -> int:
+    assert response.status_code < 400, response.text
+    return int(response.headers["X-Query-Count"])
+
+
+@pytest.mark.parametrize("page_size", [1, 20, POSTS])
+def test_feed_page(client, page_size):
+    # Total from the counter row, the page, then its authors in one IN query
+    response = client.get("/api/posts/", params={"page_size": page_size})
+    assert len(response.json()["items"]) == page_size
+    assert queries(response) == 3
+
+
+def test_feed_page_by_cursor(client):
+    first = client.get("/api/posts/", params={"page_size": 20}).json()
+    response = client.get(
+        "/api/posts/", params={"page_size": 20, "cursor": first["next_cursor"]}
+    )
+    assert queries(response) == 3
+
+
+def test_user_feed_page(client):
+    assert queries(client.get("/api/posts/", params={"user_id": "u3"})) == 3
+
+
+def test_batch(client):
+    response = client.get("/api/posts/batch", params={"ids": "p01,p02,p13,p24"})
+    assert queries(response) == 1
+
+
+def test_post_detail(client):
+    assert queries(client.get("/api/posts/p07")) == 1
+
+
+def test_like_and_save(client):
+    # Counts are buffered, so a like is just the read of the post
+    assert queries(client.post("/api/posts/p07/like")) == 1
+    assert queries(client.post("/api/posts/p07/save")) == 1
@@ -0,0 +1,89 @@
+import asyncio
+import pytest
+from core.database import SessionLocal, async_engine
+from models.post import Post
+from models.user import User
+from services.search_index import tokenize
+from services.search_service import InvertedIndex, SearchService
+
+
+@pytest.fixture(autouse=True)
+def fresh_search(monkeypatch):
+    """Rebuild the in-process indexes and tag histogram for every test"""
+    monkeypatch.setattr(SearchService, "_post_index", InvertedIndex())
+    monkeypatch.setattr(SearchService, "_user_index", InvertedIndex())
+    monkeypatch.setattr(SearchService, "_built", False)
+    monkeypatch.setattr(SearchService, "_tags", None)
+    monkeypatch.setattr(SearchService, "_tags_expire_at", 0.0)
+    monkeypatch.setattr(SearchService, "_tags_refresh", None)
+
+
+@pytest.fixture
+def corpus():
+    db = SessionLocal()
+    db.add(User(id="u1", email="z@example.com", name="Zoë Ångström", username="zoe"))
+    db.add(User(id="u2", email="m@example.com", name="Max Mustermann", username="max"))
+    posts = [
+        ("p1", "u1", "Robe d'été rosée", ["été", "linen"]),
+        ("p2", "u2", "Linen blazer", ["linen", "street-style"]),
+        ("p3", "u2", "Wide leg trousers", ["street-style"]),
+    ]
+    for post_id, user_id, title, tags in posts:
+        db.add(Post(id=post_id, user_id=user_id, image_url="/x.jpg", title=title, tags=tags))
+    db.commit()
+    db.close()
+
+
+def test_tokenize_keeps_words_in_any_script():
+    assert tokenize("Robe d'été, Ärmel_lang 2024 東京") == [
+        "robe", "d", "été", "ärmel", "lang", "2024", "東京",
+    ]
+
+
+def test_search_matches_non_ascii_prefixes(client, corpus):
+    body = client.get("/api/search/", params={"q": "ros"}).json()
+    assert [post["id"] for post in body["posts"]] == ["p1"]
+
+    body = client.get("/api/search/", params={"q": "ångs"}).json()
+    assert [user["id"] for user in body["users"]] == ["u1"]
+
+
+def test_tags_match_every_word_by_prefix_most_used_first(client, corpus):
+    body = client.get("/api/search/", params={"q": "li"}).json()
+    assert body["tags"] == [{"tag": "linen", "count": 2}]
+
+    body = client.get("/api/search/", params={"q": "sty str"}).json()
+    assert body["tags"] == [{"tag": "street-style", "count": 2}]
+
+    body = client.get("/api/search/", params={"q": "ét"}).json()
+    assert body["tags"] == [{"tag": "été", "count": 1}]
+
+
+def test_expired_tag_histogram_is_refreshed_once(corpus, monkeypatch):
+    refreshes = []
+    refresh = SearchService._refresh_tags
+
+    async def counting_refresh():
+        refreshes.append(1)
+        await refresh()
+
+    monkeypatch.setattr(SearchService, "_refresh_tags", staticmethod(counting_refresh))
+
+    async def keystrokes():
+        try:
+            results = await asyncio.gather(
+                *(SearchService._search_tags("lin", 10) for _ in range(50))
+            )
+            # Expired again: callers get the loaded histogram, not a wait
+            SearchService._tags_expire_at = 0.0
+            stale = await SearchService._search_tags("lin", 10)
+            await SearchService._tags_refresh
+            return results, stale
+        finally:
+            await async_engine.dispose()
+
+    results, stale = asyncio.run(keystrokes())
+    assert all(result == results[0] for result in results)
+    assert results[0][0].tag == "linen"
+    assert stale == results[0]
+    assert len(refreshes) == 2
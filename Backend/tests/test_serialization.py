@@ -0,0 +1,121 @@
+import asyncio
+from datetime import datetime
+import pytest
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from core.serialization import RowEncoder
+from models.draft import Draft
+from models.post import Post
+from models.user import User
+from schemas.draft import DraftListResponse
+from schemas.post import PostListResponse, PostResponse
+
+
+def response_model_body(model, content) -> bytes:
+    """Bytes FastAPI renders for content returned with response_model=model"""
+    field = create_response_field(name="Response", type_=model)
+    data = asyncio.run(
+        serialize_response(field=field, response_content=content, is_coroutine=True)
+    )
+    return JSONResponse(data).body
+
+
+def test_post_page_bytes_match_response_model():
+    author = User(
+        id="u1",
+        email="a@example.com",
+        name="Ann",
+        username="ann",
+        created_at=datetime(2024, 1, 2, 3, 4, 5, 678901),
+        updated_at=datetime(2024, 1, 2, 3, 4, 5),
+    )
+    posts = [
+        Post(
+            id="p1",
+            user_id="u1",
+            user=author,
+            image_url="/uploads/a.jpg",
+            image_variants={"webp": [{"width": 640, "url": "/uploads/a.w640.webp"}]},
+            width=1080,
+            height=1350,
+            aspect_ratio=1.0,
+            title="Linen — été",
+            tags=["summer", "linen"],
+            likes=3,
+            saves=0,
+            is_ai_generated=True,
+            created_at=datetime(2024, 1, 2, 3, 4, 5),
+        ),
+        Post(
+            id="p2",
+            user_id="u1",
+            user=author,
+            image_url="/uploads/b.jpg",
+            tags=[],
+            likes=0,
+            saves=1,
+            is_ai_generated=False,
+            created_at=datetime(2024, 1, 1),
+        ),
+    ]
+    page = {
+        "items": posts,
+        "page": 1,
+        "page_size": 2,
+        "total": 2,
+        "has_more": True,
+        "next_cursor": "abc",
+    }
+
+    assert RowEncoder(PostListResponse).dumps(page) == response_model_body(
+        PostListResponse, PostListResponse(**page)
+    )
+
+
+def test_draft_list_bytes_match_response_model():
+    drafts = [
+        Draft(
+            id="d1",
+            user_id="u1",
+            image_url="/uploads/d.jpg",
+            garments=[{"id": "g1", "type": "top", "image_url": "https://shop/g.jpg"}],
+            style_params={"fit": "loose", "weight": 0.5},
+            created_at=datetime(2024, 1, 2),
+            updated_at=datetime(2024, 1, 3),
+        )
+    ]
+    content = {"items": drafts, "total": 1}
+
+    assert RowEncoder(DraftListResponse).dumps(content) == response_model_body(
+        DraftListResponse, DraftListResponse(**content)
+    )
+
+
+def null_post() -> Post:
+    """A post row whose tags column is NULL"""
+    author = User(
+        id="u1", email="a@example.com", name="Ann", created_at=datetime(2024, 1, 1)
+    )
+    return Post(
+        id="p1",
+        user_id="u1",
+        user=author,
+        image_url="/uploads/a.jpg",
+        tags=None,
+        likes=0,
+        saves=0,
+        is_ai_generated=False,
+        created_at=datetime(2024, 1, 2),
+    )
+
+
+def test_null_column_renders_as_the_field_default():
+    assert RowEncoder(PostResponse).dump(null_post())["tags"] == []
+
+
+def test_null_column_without_a_default_is_refused():
+    post = null_post()
+    post.likes = None
+    with pytest.raises(ValueError, match="PostResponse.likes is null"):
+        RowEncoder(PostResponse).dump(post)
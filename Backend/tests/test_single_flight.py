@@ -0,0 +1,140 @@
+import asyncio
+import base64
+import pytest
+from core.single_flight import SingleFlight
+from schemas.ai import AIGenerationRequest, AIGenerationResponse
+from services import ai_service
+from services.ai_service import AIService, generation_flights
+from services.generation_cache import GenerationCache
+
+DUPLICATES = 50
+
+
+class FakeModel:
+    """Stands in for the model call: counts calls and notes cancellations"""
+
+    def __init__(self, seconds: float = 0.05):
+        self.seconds = seconds
+        self.calls = 0
+        self.cancelled = 0
+
+    async def __call__(self, request) -> AIGenerationResponse:
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.seconds)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return AIGenerationResponse(
+            image_url="/uploads/generated.png",
+            id=f"gen-{self.calls}",
+            processing_time=self.seconds,
+            success=True,
+            message="ok",
+        )
+
+
+@pytest.fixture
+def model(monkeypatch, tmp_path):
+    fake = FakeModel()
+    monkeypatch.setattr(AIService, "_run_generation", staticmethod(fake))
+    monkeypatch.setattr(
+        ai_service, "generation_cache", GenerationCache(str(tmp_path), 100, 3600)
+    )
+    return fake
+
+
+def generation_request(garment: str = "g1") -> AIGenerationRequest:
+    return AIGenerationRequest(
+        user_image=base64.b64encode(b"not really a png").decode(),
+        garments=[{"id": garment, "type": "top", "image_url": "https://shop/g.jpg"}],
+    )
+
+
+def test_concurrent_duplicate_generations_share_one_model_call(model):
+    async def burst():
+        return await asyncio.gather(
+            *(AIService.generate_outfit(generation_request()) for _ in range(DUPLICATES))
+        )
+
+    results = asyncio.run(burst())
+
+    assert model.calls == 1
+    assert {result.id for result in results} == {"gen-1"}
+    assert generation_flights.in_flight == 0
+
+
+def test_distinct_generations_are_not_coalesced(model):
+    async def burst():
+        return await asyncio.gather(
+            *(AIService.generate_outfit(generation_request(f"g{i}")) for i in range(5))
+        )
+
+    asyncio.run(burst())
+
+    assert model.calls == 5
+
+
+def test_generation_is_cancelled_when_every_waiter_times_out(model):
+    model.seconds = 10
+
+    async def burst():
+        waiters = [
+            asyncio.wait_for(AIService.generate_outfit(generation_request()), 0.5)
+            for _ in range(DUPLICATES)
+        ]
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0)  # let the shared task observe its cancellation
+        return results
+
+    results = asyncio.run(burst())
+
+    assert all(isinstance(result, asyncio.TimeoutError) for result in results)
+    assert model.calls == 1
+    assert model.cancelled == 1
+    assert generation_flights.in_flight == 0
+
+
+def test_work_continues_while_any_waiter_remains():
+    flights = SingleFlight()
+    started = []
+
+    async def work():
+        started.append(1)
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def scenario():
+        impatient = asyncio.create_task(flights.do("k", work))
+        patient = asyncio.create_task(flights.do("k", work))
+        await asyncio.sleep(0.01)
+        impatient.cancel()
+        return await patient, impatient
+
+    result, impatient = asyncio.run(scenario())
+
+    assert result == "done"
+    assert impatient.cancelled()
+    assert len(started) == 1
+    assert flights.stats()["abandoned"] == 0
+
+
+def test_call_after_abandoned_flight_starts_fresh():
+    flights = SingleFlight()
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return len(runs)
+
+    async def scenario():
+        first = asyncio.create_task(flights.do("k", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        await asyncio.sleep(0)
+        # Arrives while the cancelled task may still be winding down
+        return await flights.do("k", work)
+
+    assert asyncio.run(scenario()) == 2
+    assert flights.stats()["abandoned"] == 1
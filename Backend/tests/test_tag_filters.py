@@ -0,0 +1,69 @@
+"""Feed pages filtered by tags"""
+import asyncio
+import pytest
+from core.database import SessionLocal
+from models.post import Post, tag_filters
+from models.user import User
+from services.post_count_service import PostCountService
+
+POST_TAGS = {
+    "p1": ["street", "denim"],
+    "p2": ["street"],
+    "p3": ["denim", "boho"],
+    "p4": [],
+    "p5": None,
+}
+
+
+@pytest.fixture(autouse=True)
+def posts():
+    db = SessionLocal()
+    db.add(User(id="u1", email="u1@example.com", name="User 1"))
+    for post_id, tags in POST_TAGS.items():
+        db.add(Post(id=post_id, user_id="u1", image_url="/x.jpg", tags=tags))
+    db.commit()
+    db.close()
+    asyncio.run(PostCountService.seed_counters())
+
+
+def page(client, **params):
+    response = client.get("/api/posts/", params=params)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    return sorted(post["id"] for post in body["items"]), body["total"]
+
+
+@pytest.mark.parametrize(
+    "params, expected",
+    [
+        ({"tags": "street"}, ["p1", "p2"]),
+        ({"tags": ["street", "denim"]}, ["p1"]),
+        ({"tags": ["street", "street"]}, ["p1", "p2"]),
+        ({"tags": "vintage"}, []),
+        ({"any_tags": "street"}, ["p1", "p2"]),
+        ({"any_tags": ["street", "boho"]}, ["p1", "p2", "p3"]),
+        ({"tags": "denim", "any_tags": ["street", "vintage"]}, ["p1"]),
+    ],
+)
+def test_tag_filtered_page(client, params, expected):
+    assert page(client, **params) == (expected, len(expected))
+
+
+def test_tag_filter_with_user_and_cursor(client):
+    first = client.get(
+        "/api/posts/", params={"any_tags": "denim", "user_id": "u1", "page_size": 1}
+    ).json()
+    second = client.get(
+        "/api/posts/",
+        params={"any_tags": "denim", "page_size": 1, "cursor": first["next_cursor"]},
+    ).json()
+    assert sorted(p["id"] for p in first["items"] + second["items"]) == ["p1", "p3"]
+
+
+def test_unsupported_database_is_a_bad_request(client, monkeypatch):
+    def other_database(dialect, tags=None, any_tags=None):
+        return tag_filters("mysql", tags, any_tags)
+
+    monkeypatch.setattr("services.post_service.tag_filters", other_database)
+    response = client.get("/api/posts/", params={"tags": "street"})
+    assert response.status_code == 400
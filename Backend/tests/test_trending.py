@@ -0,0 +1,148 @@
+"""Trending ranking: rebuilds, incremental rescoring, deletes and snapshots"""
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from core.database import SessionLocal, async_engine
+from models.post import Post
+from models.user import User
+from services.counter_buffer import post_counters
+from services.trending import TrendingEngine
+
+ENGAGEMENT = {"p1": (2, 0), "p2": (5, 0), "p3": (0, 3), "p4": (0, 0)}
+
+
+def make_engine() -> TrendingEngine:
+    """A ranking of three, filled two posts per batch"""
+    return TrendingEngine(
+        size=3,
+        interval=30,
+        rebuild_interval=3600,
+        window_days=7,
+        batch_size=2,
+        decay_seconds=45000,
+        save_weight=2.0,
+        ai_boost=1.2,
+    )
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    """The engine behind the API"""
+    engine = make_engine()
+    for module in ("services.feed_service", "services.post_service"):
+        monkeypatch.setattr(f"{module}.trending", engine)
+    return engine
+
+
+@pytest.fixture(autouse=True)
+def posts():
+    """Posts created together an hour ago, unchanged since"""
+    db = SessionLocal()
+    db.add(User(id="u1", email="u1@example.com", name="u1"))
+    hour_ago = datetime.utcnow() - timedelta(hours=1)
+    for post_id, (likes, saves) in ENGAGEMENT.items():
+        db.add(
+            Post(
+                id=post_id,
+                user_id="u1",
+                image_url="/x.jpg",
+                likes=likes,
+                saves=saves,
+                created_at=hour_ago,
+                updated_at=hour_ago,
+            )
+        )
+    db.commit()
+    db.close()
+
+
+def run(*steps):
+    async def main():
+        for step in steps:
+            await step()
+        await async_engine.dispose()
+
+    asyncio.run(main())
+
+
+def trending_ids(client) -> list:
+    response = client.get("/api/posts/", params={"feed": "trending"})
+    assert response.status_code == 200
+    return [post["id"] for post in response.json()["items"]]
+
+
+def test_rebuild_ranks_posts_by_engagement(engine, client):
+    run(engine.rebuild)
+
+    # A save counts as two likes; p4 has none and falls outside the top 3
+    assert engine.page(0, 10) == ["p3", "p2", "p1"]
+    assert trending_ids(client) == ["p3", "p2", "p1"]
+
+
+def test_newer_post_needs_less_engagement(engine):
+    db = SessionLocal()
+    db.get(Post, "p2").created_at -= timedelta(seconds=45000)
+    db.commit()
+    db.close()
+
+    run(engine.rebuild)
+    # 45000s older, p2 would need over 10x p1's likes, and now trails p4
+    assert engine.page(0, 10) == ["p3", "p1", "p4"]
+
+
+def test_likes_reorder_the_ranking_on_update(engine, client):
+    run(engine.rebuild)
+    rescored = engine.rescored
+
+    for _ in range(10):
+        assert client.post("/api/posts/p1/like").status_code == 200
+    # Flushing the buffered likes bumps updated_at, which update looks for
+    run(post_counters.flush, engine.update)
+
+    assert engine.page(0, 10) == ["p1", "p3", "p2"]
+    # Only the liked post was rescored
+    assert engine.rescored - rescored == 1
+    assert trending_ids(client) == ["p1", "p3", "p2"]
+
+
+def test_post_outside_the_ranking_enters_on_update(engine):
+    run(engine.rebuild)
+    db = SessionLocal()
+    db.get(Post, "p4").likes = 50
+    db.commit()
+    db.close()
+
+    run(engine.update)
+    assert engine.page(0, 10) == ["p4", "p3", "p2"]
+
+
+def test_deleted_post_leaves_the_ranking(engine, client):
+    run(engine.rebuild)
+
+    assert client.delete("/api/posts/p2").status_code == 200
+    assert engine.page(0, 10) == ["p3", "p1"]
+
+    # One deleted behind the engine's back is dropped when a page misses it
+    db = SessionLocal()
+    db.delete(db.get(Post, "p1"))
+    db.commit()
+    db.close()
+    assert trending_ids(client) == ["p3"]
+    assert len(engine) == 1
+
+
+def test_starting_worker_serves_the_snapshot(engine):
+    run(engine.rebuild)
+    starting = make_engine()
+    run(starting.load_snapshot)
+
+    assert starting.page(0, 10) == ["p3", "p2", "p1"]
+    assert list(starting._scores) == pytest.approx(list(engine._scores))
+
+
+def test_snapshot_never_replaces_a_ranking(engine):
+    run(engine.rebuild)
+    engine.discard(["p1"])
+    run(engine.load_snapshot)
+
+    assert engine.page(0, 10) == ["p3", "p2"]
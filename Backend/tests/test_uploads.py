@@ -0,0 +1,70 @@
+"""Image uploads: who may upload, and what /uploads serves"""
+import io
+import os
+from pathlib import Path
+import pytest
+from PIL import Image
+from core.config import settings
+from core.database import SessionLocal
+from models.user import User
+
+
+@pytest.fixture
+def user():
+    db = SessionLocal()
+    db.add(User(id="uploader", email="uploader@example.com", name="Uploader"))
+    db.commit()
+    db.close()
+    return "uploader"
+
+
+def png() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 8), "red").save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def upload(client, headers=None):
+    return client.post(
+        "/api/uploads/",
+        files={"file": ("red.png", png(), "image/png")},
+        headers=headers or {},
+    )
+
+
+def test_upload_requires_authentication(client):
+    assert upload(client).status_code == 401
+
+
+def test_uploaded_image_is_served(client, auth_headers, user):
+    response = upload(client, auth_headers(user))
+    assert response.status_code == 201, response.text
+    served = client.get(response.json()["url"])
+    assert served.status_code == 200
+    assert served.content == png()
+
+
+def test_caches_are_not_served(client):
+    for cache in ("generation_cache", "garment_cache"):
+        directory = Path(settings.UPLOAD_DIR) / cache
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / "entry.json").write_text("{}")
+        assert client.get(f"/uploads/{cache}/entry.json").status_code == 404
+
+
+def test_reupload_while_gc_removes_the_blob(client, auth_headers, user, monkeypatch):
+    first = upload(client, auth_headers(user)).json()
+    path = Path(settings.UPLOAD_DIR) / "images" / first["id"]
+    utime = os.utime
+
+    def collected_first(target, *args, **kwargs):
+        # GC renames the blob away just before the upload touches it
+        if Path(target) == path and path.exists():
+            path.rename(path.with_name(f".{path.name}.gc"))
+        return utime(target, *args, **kwargs)
+
+    monkeypatch.setattr(os, "utime", collected_first)
+    response = upload(client, auth_headers(user))
+    assert response.status_code == 201, response.text
+    assert response.json()["id"] == first["id"]
+    assert path.read_bytes() == png()
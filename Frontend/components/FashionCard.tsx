@@ -61,9 +61,16 @@ export default function FashionCard({ post }: FashionCardProps) {
         )}
 
         {/* Image */}
+        {/* Space is reserved from the stored aspect ratio before the image loads */}
         <div
           className="w-full bg-gradient-to-br from-rose via-lavender to-sage"
-          style={{ paddingBottom: `${Math.random() * 40 + 60}%` }}
+          style={{
+            paddingBottom: post.aspectRatio
+              ? `${100 / post.aspectRatio}%`
+              : `${Math.random() * 40 + 60}%`,
+            backgroundColor: post.dominantColor,
+            backgroundImage: post.dominantColor ? 'none' : undefined,
+          }}
         >
           {/* TODO: Replace with actual image */}
         </div>
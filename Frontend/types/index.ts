@@ -10,11 +10,22 @@ export interface User {
 }
 
 // Post Types
+export interface ImageVariant {
+  width: number;
+  url: string;
+}
+
 export interface Post {
   id: string;
   userId: string;
   user: User;
   imageUrl: string;
+  imageVariants?: Record<string, ImageVariant[]>;
+  width?: number;
+  height?: number;
+  aspectRatio?: number;
+  dominantColor?: string;
+  blurhash?: string;
   title?: string;
   description?: string;
   tags: string[];
@@ -49,11 +60,22 @@ export interface Garment {
 
 // AI Generation Types
 export interface AIGenerationRequest {
-  userImage: string;
+  userImage?: string;
+  userImageId?: string;
   garments: Garment[];
   styleParams?: StyleParams;
 }
 
+// Upload Types
+export interface UploadResponse {
+  id: string;
+  url: string;
+  size: number;
+  format: string;
+  width: number;
+  height: number;
+}
+
 export interface StyleParams {
   style?: string;
   fit?: 'loose' | 'regular' | 'tight';
@@ -64,6 +86,7 @@ export interface AIGenerationResponse {
   imageUrl: string;
   id: string;
   processingTime: number;
+  cached?: boolean;
 }
 
 // Auth Types
@@ -88,4 +111,11 @@ export interface PaginatedResponse<T> {
   pageSize: number;
   total: number;
   hasMore: boolean;
+  nextCursor?: string;
+}
+
+// GET /api/posts/batch and /api/users/batch
+export interface BatchResponse<T> {
+  items: T[];
+  missing: string[];
 }